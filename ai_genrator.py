@@ -1,56 +1,135 @@
 import os
 import json
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import cv2
 from datetime import datetime
 from dotenv import load_dotenv
 from PIL import Image
 import numpy as np
 import base64
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 # GROQ SDK
 from groq import Groq
 
+from groq_client import RateLimitedGroq
+from transcriber import Transcriber, TranscriptCache, get_transcriber, transcribe_video
+
 # Load ENV
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Frame preprocessing for the vision model. Frames are downscaled so their
+# longest side is FRAME_MAX_SIDE (aspect ratio preserved) and JPEG-encoded
+# straight from the decoded NumPy array.
+FRAME_MAX_SIDE = int(os.getenv("AI_FRAME_MAX_SIDE", "512"))
+FRAME_JPEG_QUALITY = int(os.getenv("AI_FRAME_JPEG_QUALITY", "80"))
+FRAME_RESAMPLE = os.getenv("AI_FRAME_RESAMPLE", "area")
+
+# OpenCV interpolation flags. "area" is the fast, alias-free choice for
+# downscaling; "lanczos" matches the old PIL behaviour at a higher CPU cost.
+_RESAMPLE_FILTERS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
+
+
+# Minimum seconds between partial-metadata callbacks while streaming
+STREAM_UPDATE_INTERVAL = float(os.getenv("AI_STREAM_UPDATE_INTERVAL", "0.5"))
+
+# Connection pool for the Groq API, shared by every job in the process
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "1") != "0"
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "10"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "120"))
+
+
+def _build_http_client():
+    """httpx client with keep-alive pooling and HTTP/2 when h2 is installed"""
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+        keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(60.0, connect=10.0)
+    if GROQ_HTTP2:
+        try:
+            return httpx.Client(http2=True, limits=limits, timeout=timeout)
+        except ImportError:
+            logger.warning("h2 package not installed — Groq client falling back to HTTP/1.1 keep-alive")
+    return httpx.Client(limits=limits, timeout=timeout)
+
 
 class AIMetadataGenerator:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, frame_max_side: int = FRAME_MAX_SIDE,
+                 jpeg_quality: int = FRAME_JPEG_QUALITY, resample: str = FRAME_RESAMPLE,
+                 transcriber: Optional[Transcriber] = None):
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("Groq API key not found! Set GROQ_API_KEY in environment.")
 
-        # Initialize Groq client without proxies (Render compatibility)
-        try:
-            self.client = Groq(api_key=self.api_key)
-        except TypeError as e:
-            # If proxies parameter issue, try without any extra params
-            if 'proxies' in str(e):
-                # Some environments auto-inject proxy settings
-                # Create client with minimal params only
-                import httpx
-                self.client = Groq(
-                    api_key=self.api_key,
-                    http_client=httpx.Client()
-                )
-            else:
-                raise
+        # Pass our own httpx client: avoids the SDK's proxies kwarg (Render
+        # compatibility) and keeps a persistent keep-alive / HTTP/2 pool.
+        # SDK retries are disabled — RateLimitedGroq retries 429s and transient
+        # (connection, timeout, 5xx) errors itself.
+        client = Groq(
+            api_key=self.api_key,
+            http_client=_build_http_client(),
+            max_retries=0
+        )
+        self.client = RateLimitedGroq(client)
         
         self.model = "meta-llama/llama-4-scout-17b-16e-instruct"  # New vision-capable model
         self.text_model = "llama-3.3-70b-versatile"  # Text model
 
-    def _image_to_base64(self, image: Image.Image) -> str:
-        """Convert PIL Image to base64 string"""
+        self.frame_max_side = frame_max_side
+        self.jpeg_quality = max(1, min(int(jpeg_quality), 100))
+        if resample not in _RESAMPLE_FILTERS:
+            raise ValueError(f"Unknown resample filter '{resample}'. Use one of: {', '.join(_RESAMPLE_FILTERS)}")
+        self.resample = resample
+
+        # Optional speech transcription (AI_TRANSCRIBE=off|groq|whisper)
+        self.transcriber = transcriber or get_transcriber(client=self.client)
+        self.transcript_cache = TranscriptCache()
+
+    def _image_to_base64(self, image) -> str:
+        """Convert a PIL Image or BGR NumPy frame to a base64 JPEG string"""
+        if isinstance(image, np.ndarray):
+            return base64.b64encode(self._encode_frame(image)).decode("utf-8")
         buffered = BytesIO()
-        image.save(buffered, format="JPEG")
+        image.save(buffered, format="JPEG", quality=self.jpeg_quality)
         return base64.b64encode(buffered.getvalue()).decode("utf-8")
 
-    def extract_video_frames(self, video_path: str, num_frames: int = 3) -> List[Image.Image]:
-        """Extract key frames from video"""
+    def _resize_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale a frame so its longest side is at most frame_max_side"""
+        height, width = frame.shape[:2]
+        longest = max(height, width)
+        if not self.frame_max_side or longest <= self.frame_max_side:
+            return frame
+        scale = self.frame_max_side / longest
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(frame, size, interpolation=_RESAMPLE_FILTERS[self.resample])
+
+    def _encode_frame(self, frame: np.ndarray) -> bytes:
+        """JPEG-encode a BGR frame directly with OpenCV (no PIL / BytesIO copy)"""
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return buf.tobytes()
+
+    def _read_frames(self, video_path: str, num_frames: int) -> List[np.ndarray]:
+        """Decode num_frames evenly spaced frames as resized BGR arrays"""
+        cap = cv2.VideoCapture(video_path)
         try:
-            cap = cv2.VideoCapture(video_path)
             frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             frames = []
 
@@ -60,30 +139,62 @@ class AIMetadataGenerator:
                 ret, frame = cap.read()
 
                 if ret:
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    pil_image = Image.fromarray(frame_rgb)
-                    pil_image = pil_image.resize((512, 512), Image.Resampling.LANCZOS)
-                    frames.append(pil_image)
+                    frames.append(self._resize_frame(frame))
 
-            cap.release()
             return frames
+        finally:
+            cap.release()
 
+    def extract_video_frames(self, video_path: str, num_frames: int = 3) -> List[Image.Image]:
+        """Extract key frames from video"""
+        try:
+            return [
+                Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                for frame in self._read_frames(video_path, num_frames)
+            ]
+        except Exception as e:
+            print(f"Frame Error: {e}")
+            return []
+
+    def encode_video_frames(self, video_path: str, num_frames: int = 3) -> List[str]:
+        """Extract key frames and return them as base64 JPEG payloads for the vision API"""
+        try:
+            frames = self._read_frames(video_path, num_frames)
         except Exception as e:
             print(f"Frame Error: {e}")
             return []
 
-    def analyze_video_content(self, video_path: str) -> str:
+        payloads = []
+        total_bytes = 0
+        started = time.perf_counter()
+        for frame in frames:
+            jpeg = self._encode_frame(frame)
+            total_bytes += len(jpeg)
+            payloads.append(base64.b64encode(jpeg).decode("utf-8"))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if payloads:
+            h, w = frames[0].shape[:2]
+            logger.info(
+                f"Encoded {len(payloads)} frames at {w}x{h} q={self.jpeg_quality}: "
+                f"{total_bytes / 1024:.1f} KB JPEG in {elapsed_ms:.1f} ms"
+            )
+        return payloads
+
+    def transcribe_audio(self, video_path: str, content_hash: Optional[str] = None) -> str:
+        """Transcribe the video's speech (empty string if disabled or silent)"""
+        return transcribe_video(video_path, self.transcriber, self.transcript_cache, content_hash)
+
+    def analyze_video_content(self, video_path: str, transcript: str = "") -> str:
         """Analyze extracted video frames with Groq Vision"""
         try:
-            frames = self.extract_video_frames(video_path, 3)
-            if not frames:
+            frames = self.encode_video_frames(video_path, 3)
+            if not frames and not transcript:
                 return "Unable to analyze video content."
 
             combined = []
 
-            for i, frame in enumerate(frames):
-                base64_image = self._image_to_base64(frame)
-                
+            for i, base64_image in enumerate(frames):
                 response = self.client.chat.completions.create(
                     model=self.model,
                     messages=[
@@ -114,6 +225,11 @@ class AIMetadataGenerator:
 
                 combined.append(response.choices[0].message.content)
 
+            transcript_section = f"""
+                        Audio transcript of the speech in the video:
+                        {transcript[:4000]}
+                        """ if transcript else ""
+
             final_resp = self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[
@@ -121,7 +237,7 @@ class AIMetadataGenerator:
                         "role": "user",
                         "content": f"""Based on these frame analyses:
                         {' '.join(combined)}
-                        
+                        {transcript_section}
                         Create a single concise summary of the video."""
                     }
                 ],
@@ -134,7 +250,25 @@ class AIMetadataGenerator:
             print(f"Analysis Error: {e}")
             return "Video analysis unavailable."
 
-    def generate_title(self, video_analysis: str) -> str:
+    def _stream_text(self, prompt: str, max_tokens: int,
+                     on_partial: Callable[[str], None]) -> str:
+        """Stream a text completion, passing the accumulated text to on_partial"""
+        stream = self.client.chat.completions.create(
+            model=self.text_model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            stream=True
+        )
+        parts = []
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_partial("".join(parts))
+        return "".join(parts).strip()
+
+    def generate_title(self, video_analysis: str,
+                       on_partial: Optional[Callable[[str], None]] = None) -> str:
         """Generate YouTube Shorts Title"""
         prompt = f"""
         Create a viral YouTube Shorts title under 99 characters.
@@ -146,16 +280,21 @@ class AIMetadataGenerator:
         """
 
         try:
+            if on_partial:
+                title = self._stream_text(prompt, 100, on_partial)
+                return title or "🔥 Viral Moment You Won't Believe! #shorts #viral #trending"
             resp = self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=100
             )
             return resp.choices[0].message.content.strip() if resp.choices[0].message.content else "🔥 Viral Moment You Won't Believe! #shorts #viral #trending"
-        except:
+        except Exception as e:
+            print("Title Error:", e)
             return "🔥 Viral Moment You Won't Believe! #shorts #viral #trending"
 
-    def generate_description(self, video_analysis: str) -> str:
+    def generate_description(self, video_analysis: str,
+                             on_partial: Optional[Callable[[str], None]] = None) -> str:
         """Generate YouTube Shorts Description"""
         prompt = f"""
         Based on this video:
@@ -172,6 +311,8 @@ class AIMetadataGenerator:
         """
 
         try:
+            if on_partial:
+                return self._stream_text(prompt, 2048, on_partial)
             resp = self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[{"role": "user", "content": prompt}],
@@ -210,18 +351,61 @@ class AIMetadataGenerator:
         
         return tags, hashtags
 
-    def generate_complete_metadata(self, video_path: str) -> Dict:
-        """Generate full metadata"""
+    def _stream_title_and_description(self, analysis: str,
+                                      on_update: Callable[[Dict], None]) -> tuple:
+        """
+        Generate title and description concurrently with streaming, pushing
+        partial {"title", "description"} snapshots to on_update (throttled).
+        """
+        print("🎯📝 Streaming title and description...")
+        partial = {"video_analysis": analysis, "title": "", "description": "", "partial": True}
+        lock = threading.Lock()
+        last_push = [0.0]
+
+        def push(key: str, text: str):
+            with lock:
+                partial[key] = text
+                now = time.monotonic()
+                if now - last_push[0] < STREAM_UPDATE_INTERVAL:
+                    return
+                last_push[0] = now
+                snapshot = dict(partial)
+            on_update(snapshot)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            title_future = pool.submit(self.generate_title, analysis, lambda t: push("title", t))
+            desc_future = pool.submit(self.generate_description, analysis, lambda d: push("description", d))
+            title, description = title_future.result(), desc_future.result()
+
+        with lock:
+            partial.update(title=title, description=description)
+            snapshot = dict(partial)
+        on_update(snapshot)
+        return title, description
+
+    def generate_complete_metadata(self, video_path: str, content_hash: Optional[str] = None,
+                                   on_update: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Generate full metadata.
+
+        With on_update, title and description are streamed in parallel and
+        partial metadata is reported as it arrives.
+        """
+        transcript = self.transcribe_audio(video_path, content_hash)
+
         print("🤖 Analyzing video frames with AI...")
-        analysis = self.analyze_video_content(video_path)
+        analysis = self.analyze_video_content(video_path, transcript)
         print("📹 Video analysis complete")
 
-        print("🎯 Generating viral shorts title with hashtags...")
-        title = self.generate_title(analysis)
+        if on_update:
+            title, description = self._stream_title_and_description(analysis, on_update)
+        else:
+            print("🎯 Generating viral shorts title with hashtags...")
+            title = self.generate_title(analysis)
+
+            print("📝 Generating description optimized for shorts...")
+            description = self.generate_description(analysis)
 
-        print("📝 Generating description optimized for shorts...")
-        description = self.generate_description(analysis)
-        
         print("🏷️ Extracting tags and hashtags...")
         tags, hashtags = self.extract_tags_and_hashtags(description)
         
@@ -230,6 +414,7 @@ class AIMetadataGenerator:
 
         return {
             "video_analysis": analysis,
+            "transcript": transcript,
             "title": title,
             "description": description,
             "tags": tags,
@@ -248,10 +433,33 @@ class AIMetadataGenerator:
             print("Save Error:", e)
 
 
+# ---------------- SHARED INSTANCE -----------------
+
+_generator: Optional[AIMetadataGenerator] = None
+_generator_pid: Optional[int] = None
+_generator_lock = threading.Lock()
+
+
+def get_generator(api_key=None) -> AIMetadataGenerator:
+    """
+    Process-wide AIMetadataGenerator so back-to-back jobs reuse the same warm
+    Groq connection pool. Rebuilt after fork — pooled sockets must not be
+    shared between gunicorn workers.
+    """
+    global _generator, _generator_pid
+    pid = os.getpid()
+    if _generator is None or _generator_pid != pid:
+        with _generator_lock:
+            if _generator is None or _generator_pid != pid:
+                _generator = AIMetadataGenerator(api_key)
+                _generator_pid = pid
+    return _generator
+
+
 # ---------------- RUNNER -----------------
 
 if __name__ == "__main__":
-    generator = AIMetadataGenerator()
+    generator = get_generator()
 
     video_path = r"C:\Users\DELL\OneDrive\Desktop\youtube automation ai\downloads\reel_39477079.mp4"
 
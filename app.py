@@ -6,16 +6,13 @@ Full web platform with auth, payments, token system, and video pipeline.
 from flask import Flask, render_template, request, jsonify, send_file, session, url_for, redirect
 import os
 import uuid
-import threading
-import tempfile
 import time
 from datetime import datetime
-from typing import Optional
+from urllib.parse import unquote
 import logging
 import secrets
 from dotenv import load_dotenv
 from werkzeug.middleware.proxy_fix import ProxyFix
-from flask_session import Session
 from flask_login import login_required, current_user
 
 load_dotenv()
@@ -29,17 +26,25 @@ elif os.getenv('ENVIRONMENT') != 'production':
 # Google sometimes returns more scopes than requested
 os.environ['OAUTHLIB_RELAX_TOKEN_SCOPE'] = '1'
 
-from downloader import download_reel_with_audio
-from uploader import upload_to_youtube, check_authentication, get_channel_info
-from ai_genrator import AIMetadataGenerator
-from video_editor import VideoEditor
-from models import init_db, get_user_stats, get_recent_uploads, get_user_by_id, increment_uploads, update_youtube_credentials
+from downloader import get_endpoint_health
+from uploader import check_authentication, get_channel_info, oauth_scopes, credentials_json
+from groq_client import get_metrics as groq_rate_metrics
+from models import init_db, get_user_stats, get_recent_uploads, get_user_by_id, update_youtube_credentials
 from auth import auth_bp, init_login_manager
 from payments import payments_bp
 from token_system import (
-    check_balance, use_tokens, refill_daily_tokens,
-    get_all_plans, get_token_packs, calculate_upload_cost, TOKEN_COSTS
+    check_balance, use_tokens, use_tokens_batch,
+    get_all_plans, get_token_packs, get_plan_info, calculate_upload_cost, TOKEN_COSTS
 )
+from bulk_import import parse_reel_urls
+import device_upload
+import disk_janitor
+import job_queue
+import scheduler
+import worker
+import session_store
+from page_cache import public_page, is_public_request
+import assets
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,27 +55,26 @@ app = Flask(__name__)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1, x_prefix=1)
 
 app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
-_sess_dir = os.path.join(tempfile.gettempdir(), 'flask_session')
-os.makedirs(_sess_dir, exist_ok=True)
 app.config.update(
-    SESSION_TYPE='filesystem',
-    SESSION_FILE_DIR=_sess_dir,
     SESSION_PERMANENT=True,
     SESSION_USE_SIGNER=True,
     PERMANENT_SESSION_LIFETIME=2592000,
     SESSION_COOKIE_HTTPONLY=True,
     SESSION_COOKIE_SAMESITE='Lax',
     SESSION_COOKIE_SECURE=os.getenv('ENVIRONMENT') == 'production',
-    MAX_CONTENT_LENGTH=600 * 1024 * 1024,
+    MAX_CONTENT_LENGTH=device_upload.MAX_UPLOAD_BYTES,
 )
 
 # Initialize server-side sessions (prevents session sharing between users)
-Session(app)
+session_store.init_app(app)
 
 # Register Blueprints
 app.register_blueprint(auth_bp)
 app.register_blueprint(payments_bp)
 
+# Content-hashed, precompressed static files (built by `python -m assets build`)
+assets.init_app(app)
+
 # Initialize Flask-Login
 init_login_manager(app)
 
@@ -101,32 +105,10 @@ if not os.path.exists(CLIENT_SECRET):
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
 
-# Task store
-tasks: dict = {}
-
-
-class Task:
-    def __init__(self, task_id):
-        self.id = task_id
-        self.status = 'started'
-        self.progress = 0
-        self.message = 'Starting...'
-        self.error = None
-        self.yt_url = None
-        self.metadata = None
-
-
-def set_task(task_id, status, message, progress=None, **kw):
-    t = tasks.get(task_id)
-    if not t:
-        return
-    t.status = status
-    t.message = message
-    if progress is not None:
-        t.progress = progress
-    for k, v in kw.items():
-        setattr(t, k, v)
-    logger.info(f"[{task_id[:8]}] {status} {progress or ''}% - {message}")
+def disk_full_response():
+    resp = jsonify({'success': False, 'error': 'Server is low on disk space. Please try again in a few minutes.'})
+    resp.headers['Retry-After'] = str(disk_janitor.INTERVAL)
+    return resp, 507
 
 
 def get_redirect_uri():
@@ -146,13 +128,17 @@ def inject_globals():
 
 @app.before_request
 def _before():
-    session.permanent = True
-    # Auto-refill daily tokens for logged-in users
-    if current_user.is_authenticated:
-        try:
-            refill_daily_tokens(current_user.id)
-        except Exception:
-            pass
+    # Anonymous hits on cached public pages and health probes never touch
+    # the session store
+    if request.endpoint != 'health' and not is_public_request():
+        session.permanent = True
+    # Background threads start here, in each worker, never at import: under
+    # --preload the master would run them too and claim jobs nothing reaps.
+    # Media jobs run in-process unless MEDIA_WORKER=external (python -m worker);
+    # daily token refills run from the scheduler, not per request
+    disk_janitor.start()
+    scheduler.start()
+    worker.start_inline()
     # Security: enforce HTTPS in production
     if os.getenv('ENVIRONMENT') == 'production':
         if request.headers.get('X-Forwarded-Proto', 'http') != 'https':
@@ -165,11 +151,13 @@ def _before():
 # ─── Public Pages ─────────────────────────────────────────────────────────────
 
 @app.route('/')
+@public_page
 def index():
     return render_template('index.html', plans=get_all_plans())
 
 
 @app.route('/pricing')
+@public_page
 def pricing():
     return render_template('pricing.html',
                            plans=get_all_plans(),
@@ -177,36 +165,42 @@ def pricing():
 
 
 @app.route('/privacy')
+@public_page
 def privacy():
     from datetime import datetime
     return render_template('privacy.html', current_year=datetime.now().year)
 
 
 @app.route('/terms')
+@public_page
 def terms():
     from datetime import datetime
     return render_template('terms.html', current_year=datetime.now().year)
 
 
 @app.route('/about')
+@public_page
 def about():
     from datetime import datetime
     return render_template('about.html', current_year=datetime.now().year)
 
 
 @app.route('/contact')
+@public_page
 def contact():
     from datetime import datetime
     return render_template('contact.html', current_year=datetime.now().year)
 
 
 @app.route('/refund')
+@public_page
 def refund():
     from datetime import datetime
     return render_template('refund.html', current_year=datetime.now().year)
 
 
 @app.route('/robots.txt')
+@public_page
 def robots_txt():
     from flask import Response
     content = """User-agent: *
@@ -217,6 +211,8 @@ Disallow: /task/
 Disallow: /upload-video
 Disallow: /upload-music
 Disallow: /start-upload
+Disallow: /start-bulk-upload
+Disallow: /batch/
 
 Sitemap: https://autotubeai.me/sitemap.xml
 """
@@ -229,6 +225,7 @@ def favicon():
 
 
 @app.route('/sitemap.xml')
+@public_page
 def sitemap_xml():
     from flask import Response
     from datetime import datetime
@@ -244,11 +241,14 @@ def sitemap_xml():
         {'loc': 'https://autotubeai.me/terms', 'priority': '0.4', 'changefreq': 'yearly'},
         {'loc': 'https://autotubeai.me/refund', 'priority': '0.5', 'changefreq': 'yearly'},
     ]
-    xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml_content += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    for page in pages:
-        xml_content += f"  <url>\n    <loc>{page['loc']}</loc>\n    <lastmod>{today}</lastmod>\n    <changefreq>{page['changefreq']}</changefreq>\n    <priority>{page['priority']}</priority>\n  </url>\n"
-    xml_content += '</urlset>'
+    urls = ''.join(
+        f"  <url>\n    <loc>{page['loc']}</loc>\n    <lastmod>{today}</lastmod>\n"
+        f"    <changefreq>{page['changefreq']}</changefreq>\n    <priority>{page['priority']}</priority>\n  </url>\n"
+        for page in pages
+    )
+    xml_content = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                   f'{urls}</urlset>')
     return Response(xml_content, mimetype="application/xml")
 
 
@@ -325,7 +325,7 @@ def auth_start():
     import hashlib
     if not os.path.exists(CLIENT_SECRET):
         return jsonify({'error': 'client_secret.json not found'}), 500
-    scopes = ['https://www.googleapis.com/auth/youtube.upload']
+    scopes = oauth_scopes()
     flow = fm.InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET, scopes)
     redirect_uri = get_redirect_uri()
     flow.redirect_uri = redirect_uri
@@ -441,7 +441,7 @@ def auth_callback():
     # Save token bound to the original authenticated user directly into database
     oauth_user_id = session.get('oauth_user_id') or current_user.id
 
-    update_youtube_credentials(oauth_user_id, flow.credentials.to_json())
+    update_youtube_credentials(oauth_user_id, credentials_json(flow.credentials))
     logger.info(f"YouTube token saved to database for user {oauth_user_id}")
 
     # Clean up ALL OAuth session data
@@ -478,98 +478,99 @@ def youtube_logout():
         return jsonify({'success': False, 'error': str(e)})
 
 
-# ─── Upload Pipeline ─────────────────────────────────────────────────────────
+MUSIC_EXTS = {'.mp3', '.wav', '.m4a', '.aac'}
 
-def run_upload(task_id: str, video_path: str, is_temp: bool,
-               editing: Optional[dict], user_id: int):
-    edited_path = None
-    music_path = None
-    final_path = video_path
+
+@app.route('/upload-video', methods=['POST'])
+@login_required
+def upload_video():
+    """
+    Receive a device video. The raw file body (with an X-File-Name header) is
+    streamed straight to disk; multipart form posts are still accepted.
+    """
+    if not disk_janitor.admit(request.content_length or 0):
+        return disk_full_response()
+    try:
+        if request.mimetype == 'multipart/form-data':
+            f = request.files.get('video')
+            if not f or not f.filename:
+                return jsonify({'success': False, 'error': 'No file'})
+            upload = device_upload.receive(f.stream, f.filename)
+        else:
+            filename = unquote(request.headers.get('X-File-Name', ''))
+            if not filename:
+                return jsonify({'success': False, 'error': 'No file'})
+            upload = device_upload.receive(request.stream, filename, request.content_length)
+    except device_upload.UploadRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+    device_upload.register_upload(current_user.id, upload)
+    return jsonify({
+        'success': True,
+        'filepath': upload['path'],
+        'filename': os.path.basename(upload['path']),
+        'size': upload['size'],
+        'sha256': upload['sha256'],
+    })
+
+
+@app.route('/upload-video/init', methods=['POST'])
+@login_required
+def upload_video_init():
+    """Open or resume a chunked upload session."""
+    data = request.get_json(silent=True) or {}
+    if not disk_janitor.admit(data.get('size') if isinstance(data.get('size'), int) else 0):
+        return disk_full_response()
     try:
-        if editing and editing.get('enabled'):
-            set_task(task_id, 'editing', 'Editing video...', 20)
-            try:
-                editor = VideoEditor()
-                base = os.path.splitext(os.path.basename(video_path))[0]
-                edited_path = os.path.join(DOWNLOAD_DIR, f'{base}_edited.mp4')
-                music_src = editing.get('music_url') or editing.get('music_file')
-                music_path = editing.get('music_file')
-                editor.edit_video(
-                    video_path=video_path,
-                    output_path=edited_path,
-                    music_url=music_src,
-                    music_volume=editing.get('music_volume', 0.3),
-                    text_overlays=editing.get('text_overlays'),
-                )
-                final_path = edited_path
-            except Exception as e:
-                logger.error(f'Editing failed ({e})')
-                set_task(task_id, 'failed', f'Video editing failed: {str(e)}', error=str(e))
-                if user_id:
-                    increment_uploads(user_id, success=False)
-                return
-
-        set_task(task_id, 'analyzing', 'AI analyzing video and generating metadata...', 55)
-        try:
-            gen = AIMetadataGenerator(GROQ_API_KEY)
-            meta = gen.generate_complete_metadata(video_path=final_path)
-        except Exception as e:
-            logger.warning(f'AI failed ({e}), using fallback.')
-            meta = {
-                'title': 'Amazing Video Content',
-                'description': 'Check out this amazing content! #Video #Content',
-                'tags': ['video', 'content', 'entertainment'],
-                'keywords': ['video'],
-                'hashtags': ['#Video', '#Content'],
-            }
-
-        set_task(task_id, 'uploading', 'Uploading to YouTube...', 80, metadata=meta)
-        video_id = upload_to_youtube(
-            video_path=final_path,
-            title=meta['title'],
-            description=meta['description'],
-            tags=meta.get('tags', []),
-            privacy_status='public',
-            user_id=user_id,
+        upload = device_upload.start_session(
+            current_user.id,
+            data.get('filename', ''),
+            data.get('size'),
+            fingerprint=data.get('fingerprint'),
         )
-        yt_url = f'https://www.youtube.com/watch?v={video_id}'
-        set_task(task_id, 'done', 'Upload complete!', 100, yt_url=yt_url, metadata=meta)
+    except device_upload.UploadRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    return jsonify({'success': True, **upload})
 
-        # Track success
-        if user_id:
-            increment_uploads(user_id, success=True)
 
-    except Exception as e:
-        logger.error(f'Task failed: {e}')
-        set_task(task_id, 'failed', str(e), error=str(e))
-        if user_id:
-            increment_uploads(user_id, success=False)
-    finally:
-        for p in filter(None, [edited_path, music_path, video_path if is_temp else None]):
-            try:
-                if os.path.exists(p):
-                    os.remove(p)
-            except Exception:
-                pass
-
-
-VIDEO_EXTS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v'}
-MUSIC_EXTS = {'.mp3', '.wav', '.m4a', '.aac'}
+@app.route('/upload-video/<upload_id>', methods=['GET'])
+@login_required
+def upload_video_status(upload_id):
+    try:
+        return jsonify({'success': True, **device_upload.session_status(current_user.id, upload_id)})
+    except device_upload.UploadRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
 
 
-@app.route('/upload-video', methods=['POST'])
+@app.route('/upload-video/<upload_id>/chunk', methods=['PUT'])
 @login_required
-def upload_video():
-    f = request.files.get('video')
-    if not f or not f.filename:
-        return jsonify({'success': False, 'error': 'No file'})
-    ext = os.path.splitext(f.filename)[1].lower()
-    if ext not in VIDEO_EXTS:
-        return jsonify({'success': False, 'error': 'Unsupported video format'})
-    fname = f'local_{int(time.time())}{ext}'
-    path = os.path.join(DOWNLOAD_DIR, fname)
-    f.save(path)
-    return jsonify({'success': True, 'filepath': path, 'filename': fname})
+def upload_video_chunk(upload_id):
+    try:
+        upload = device_upload.put_chunk(
+            current_user.id, upload_id,
+            request.args.get('offset', -1, type=int),
+            request.stream,
+            checksum=request.headers.get('X-Chunk-SHA256'),
+        )
+    except device_upload.UploadRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    return jsonify({'success': True, 'bytes_received': upload['bytes_received']})
+
+
+@app.route('/upload-video/<upload_id>/finalize', methods=['POST'])
+@login_required
+def upload_video_finalize(upload_id):
+    try:
+        upload = device_upload.finish_session(current_user.id, upload_id)
+    except device_upload.UploadRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    return jsonify({
+        'success': True,
+        'filepath': upload['path'],
+        'filename': os.path.basename(upload['path']),
+        'size': upload['size'],
+        'sha256': upload['sha256'],
+    })
 
 
 @app.route('/upload-music', methods=['POST'])
@@ -581,6 +582,8 @@ def upload_music():
     ext = os.path.splitext(f.filename)[1].lower()
     if ext not in MUSIC_EXTS:
         return jsonify({'success': False, 'error': 'Unsupported music format'})
+    if not disk_janitor.admit(request.content_length or 0):
+        return disk_full_response()
     music_dir = os.path.join(DOWNLOAD_DIR, 'music')
     os.makedirs(music_dir, exist_ok=True)
     fname = f'music_{int(time.time())}{ext}'
@@ -601,6 +604,14 @@ def start_upload():
 
     # Check token balance
     has_editing = editing and editing.get('enabled')
+
+    # Admission: a download and/or an edited copy must fit on disk
+    expected = disk_janitor.JOB_BYTES_ESTIMATE if source == 'instagram' else 0
+    if has_editing:
+        expected += disk_janitor.JOB_BYTES_ESTIMATE
+    if not disk_janitor.admit(expected):
+        return disk_full_response()
+
     cost = calculate_upload_cost(has_editing=has_editing)
     ok, _, balance = check_balance(current_user.id, 'upload')
 
@@ -619,9 +630,8 @@ def start_upload():
     use_tokens(current_user.id, 'ai_analyze')
 
     task_id = str(uuid.uuid4())
-    tasks[task_id] = Task(task_id)
 
-    # Capture user ID now — current_user is unavailable inside background threads
+    # Capture user ID now — current_user is unavailable inside the worker
     user_id = current_user.id
 
     if source == 'instagram':
@@ -630,55 +640,140 @@ def start_upload():
             return jsonify({'success': False, 'error': 'URL is required'})
         if not RAPIDAPI_KEY:
             return jsonify({'success': False, 'error': 'RAPIDAPI_KEY not set in .env'})
-
-        def ig_flow():
-            vpath = None
-            try:
-                set_task(task_id, 'downloading', 'Downloading from Instagram...', 10)
-                vpath = download_reel_with_audio(url, DOWNLOAD_DIR)
-                if not vpath or not os.path.exists(vpath):
-                    raise RuntimeError('Download failed')
-                run_upload(task_id, vpath, True, editing, user_id)
-            except Exception as e:
-                set_task(task_id, 'failed', str(e), error=str(e))
-                # Clean up downloaded file if run_upload never got to handle it
-                if vpath and os.path.exists(vpath):
-                    try:
-                        os.remove(vpath)
-                        logger.info(f"Cleaned up leftover download: {vpath}")
-                    except Exception:
-                        pass
-
-        threading.Thread(target=ig_flow, daemon=True).start()
+        job_queue.enqueue(
+            task_id, 'instagram',
+            {'task_id': task_id, 'url': url, 'editing': editing, 'user_id': user_id},
+            user_id, [(task_id, url)],
+            paths=[editing.get('music_file')] if editing else (),
+        )
 
     elif source == 'device':
-        vpath = data.get('video_path', '').strip()
-        if not vpath or not os.path.exists(vpath):
+        upload = device_upload.lookup_upload(user_id, data.get('video_path', '').strip())
+        if not upload:
             return jsonify({'success': False, 'error': 'Video file not found'})
-        threading.Thread(
-            target=run_upload,
-            args=(task_id, vpath, True, editing, user_id),
-            daemon=True
-        ).start()
+        job_queue.enqueue(
+            task_id, 'device',
+            {'task_id': task_id, 'path': upload['path'], 'sha256': upload['sha256'],
+             'editing': editing, 'user_id': user_id},
+            user_id, [(task_id, None)],
+            paths=[upload['path'], editing.get('music_file') if editing else None],
+        )
     else:
         return jsonify({'success': False, 'error': 'source must be instagram or device'})
 
     return jsonify({'success': True, 'task_id': task_id})
 
 
+@app.route('/start-bulk-upload', methods=['POST'])
+@login_required
+def start_bulk_upload():
+    if not check_authentication(current_user.id):
+        return jsonify({'success': False, 'error': 'Not signed in to YouTube'}), 401
+    if not RAPIDAPI_KEY:
+        return jsonify({'success': False, 'error': 'RAPIDAPI_KEY not set in .env'})
+
+    user = get_user_by_id(current_user.id)
+    limit = get_plan_info(user['plan'] if user else 'free').get('bulk_limit', 0)
+    if not limit:
+        return jsonify({'success': False, 'error': 'Bulk upload is available on Pro plans'}), 403
+
+    data = request.get_json(silent=True) or {}
+    editing = data.get('editing')
+    items, invalid = parse_reel_urls(data.get('urls'))
+    if not items:
+        return jsonify({'success': False, 'error': 'No valid Instagram reel URLs', 'invalid': invalid})
+    if len(items) > limit:
+        return jsonify({'success': False, 'error': f'Too many reels: your plan allows {limit} per batch'}), 400
+
+    # At most three items are on disk at once (one per pipeline stage)
+    has_editing = editing and editing.get('enabled')
+    if not disk_janitor.admit(min(len(items), 3) * disk_janitor.JOB_BYTES_ESTIMATE * (2 if has_editing else 1)):
+        return disk_full_response()
+
+    # Charge the whole batch in one transaction — all items or none
+    per_item = calculate_upload_cost(has_editing=has_editing)
+    task_ids = [str(uuid.uuid4()) for _ in items]
+    charges = []
+    for task_id, (shortcode, _) in zip(task_ids, items):
+        charges.append(('upload', task_id, f'source:instagram bulk:{shortcode}'))
+        if has_editing:
+            charges.append(('video_edit', task_id, ''))
+        charges.append(('ai_analyze', task_id, ''))
+    ok, cost = use_tokens_batch(current_user.id, charges)
+    if not ok:
+        balance = user['tokens_balance'] if user else 0
+        return jsonify({
+            'success': False,
+            'error': f'Insufficient tokens. Need {cost} ({per_item} per reel), have {balance}.',
+            'tokens_needed': cost,
+            'tokens_balance': balance,
+        }), 402
+
+    batch_id = str(uuid.uuid4())
+    pipeline_items = [
+        {'task_id': task_id, 'url': url, 'shortcode': shortcode}
+        for task_id, (shortcode, url) in zip(task_ids, items)
+    ]
+    job_queue.enqueue(
+        batch_id, 'bulk',
+        {'items': pipeline_items, 'editing': editing, 'user_id': current_user.id},
+        current_user.id, [(task_id, url) for task_id, (_, url) in zip(task_ids, items)],
+        paths=[editing.get('music_file')] if editing else (),
+    )
+
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'count': len(items),
+        'tokens_charged': cost,
+        'invalid': invalid,
+    })
+
+
+@app.route('/batch/<batch_id>')
+@login_required
+def batch_status(batch_id):
+    tasks = job_queue.get_job_tasks(batch_id)
+    if not tasks or tasks[0]['user_id'] != str(current_user.id):
+        return jsonify({'error': 'Not found'}), 404
+
+    items = [{
+        'task_id': t['task_id'],
+        'url': t['url'],
+        'status': t['status'],
+        'progress': t['progress'],
+        'message': t['message'],
+        'error': t['error'],
+        'yt_url': t['yt_url'],
+        'title': (t['metadata'] or {}).get('title'),
+    } for t in tasks]
+    done = sum(1 for i in items if i['status'] == 'done')
+    failed = sum(1 for i in items if i['status'] == 'failed')
+    finished = done + failed == len(items)
+    return jsonify({
+        'status': ('done' if done else 'failed') if finished else 'running',
+        'progress': round(sum(100 if i['status'] in ('done', 'failed') else i['progress']
+                              for i in items) / len(items)),
+        'total': len(items),
+        'done': done,
+        'failed': failed,
+        'items': items,
+    })
+
+
 @app.route('/task/<task_id>')
 @login_required
 def task_status(task_id):
-    t = tasks.get(task_id)
+    t = job_queue.get_task(task_id)
     if not t:
         return jsonify({'error': 'Not found'}), 404
     return jsonify({
-        'status': t.status,
-        'progress': t.progress,
-        'message': t.message,
-        'error': t.error,
-        'yt_url': t.yt_url,
-        'metadata': t.metadata,
+        'status': t['status'],
+        'progress': t['progress'],
+        'message': t['message'],
+        'error': t['error'],
+        'yt_url': t['yt_url'],
+        'metadata': t['metadata'],
     })
 
 
@@ -700,6 +795,12 @@ def health():
         'status': 'ok',
         'groq': bool(GROQ_API_KEY),
         'rapidapi': bool(RAPIDAPI_KEY),
+        'groq_rate_limits': groq_rate_metrics(),
+        'download_endpoints': get_endpoint_health(),
+        'disk': disk_janitor.usage(),
+        'media_jobs': job_queue.queue_depth(),
+        'media_worker': job_queue.MEDIA_WORKER,
+        'session_backend': session_store.SESSION_BACKEND,
     })
 
 
@@ -0,0 +1,196 @@
+"""
+Static asset pipeline for AutoTube AI.
+`python -m assets build` minifies CSS/JS, losslessly recompresses images,
+writes content-hashed copies to static/dist with .gz/.br siblings and a
+manifest.  init_app() rewrites url_for('static', filename=...) to the hashed
+file when the manifest has it and serves those files with immutable,
+year-long caching and the best precompressed encoding the client accepts.
+"""
+
+import os
+import re
+import io
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import mimetypes
+
+from flask import request, send_from_directory, abort
+
+logger = logging.getLogger(__name__)
+
+try:
+    import rjsmin
+    RJSMIN_AVAILABLE = True
+except ImportError:
+    RJSMIN_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Hashed names never change content, so caches may keep them for a year
+IMMUTABLE_MAX_AGE = 31536000
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+# Skip precompressing files this small (headers would outweigh the saving)
+MIN_COMPRESS_BYTES = 512
+
+_CSS_STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+
+def minify_css(text):
+    """
+    Conservative CSS minifier: drops comments, collapses whitespace and
+    removes it around {};,> — quoted strings are left untouched.
+    """
+    text = _CSS_COMMENT_RE.sub('', text)
+    parts = _CSS_STRING_RE.split(text)
+    for i in range(0, len(parts), 2):  # odd indexes are the quoted strings
+        chunk = _CSS_SPACE_RE.sub(' ', parts[i])
+        parts[i] = _CSS_PUNCT_RE.sub(r'\1', chunk).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(text):
+    if not RJSMIN_AVAILABLE:
+        return text
+    return rjsmin.jsmin(text)
+
+
+def optimize_image(data, ext):
+    """Lossless recompression of PNGs with Pillow (original kept if not smaller)."""
+    if ext != '.png':
+        return data
+    try:
+        from PIL import Image
+        out = io.BytesIO()
+        Image.open(io.BytesIO(data)).save(out, format='PNG', optimize=True)
+        return out.getvalue() if out.tell() < len(data) else data
+    except Exception as e:
+        logger.warning(f"PNG optimisation failed: {e}")
+        return data
+
+
+def _process(rel_path, data):
+    ext = os.path.splitext(rel_path)[1].lower()
+    if ext == '.css':
+        return minify_css(data.decode('utf-8')).encode('utf-8')
+    if ext == '.js':
+        return minify_js(data.decode('utf-8')).encode('utf-8')
+    return optimize_image(data, ext)
+
+
+def _hashed_name(rel_path, data):
+    base, ext = os.path.splitext(rel_path)
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f'{base}.{digest}{ext}'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Rebuild dist_dir from static_dir. Returns the manifest {logical: hashed}."""
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    manifest, before, after = {}, 0, 0
+
+    for dirpath, dirnames, files in os.walk(static_dir):
+        dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) != dist_dir]
+        for name in sorted(files):
+            src = os.path.join(dirpath, name)
+            rel = os.path.relpath(src, static_dir).replace(os.sep, '/')
+            with open(src, 'rb') as f:
+                original = f.read()
+            data = _process(rel, original)
+            hashed = _hashed_name(rel, data)
+            out = os.path.join(dist_dir, hashed)
+            _write(out, data)
+
+            if os.path.splitext(rel)[1].lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+                _write(out + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if BROTLI_AVAILABLE:
+                    _write(out + '.br', brotli.compress(data, quality=11))
+
+            manifest[rel] = hashed
+            before += len(original)
+            after += len(data)
+            logger.info(f"  {rel} → dist/{hashed} ({len(original)} → {len(data)} bytes)")
+
+    _write(os.path.join(dist_dir, 'manifest.json'), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    logger.info(f"✅ Built {len(manifest)} asset(s): {before} → {after} bytes"
+                f"{'' if RJSMIN_AVAILABLE else ' (rjsmin not installed, JS not minified)'}"
+                f"{'' if BROTLI_AVAILABLE else ' (brotli not installed, gzip only)'}")
+    return manifest
+
+
+# ─── Serving ──────────────────────────────────────────────────────────────────
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def serve(filename):
+    """Serve a hashed asset, precompressed when the client accepts it."""
+    path = os.path.join(DIST_DIR, filename)
+    if not os.path.isfile(path):
+        abort(404)
+    accepted = request.headers.get('Accept-Encoding', '')
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if candidate in accepted and os.path.isfile(path + suffix):
+            encoding, filename = candidate, filename + suffix
+            break
+
+    resp = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+def init_app(app):
+    """Fingerprint url_for('static', ...) and serve static/dist with long-lived caching."""
+    manifest = load_manifest()
+    if not manifest:
+        logger.info("No asset manifest — serving unhashed static files (run: python -m assets build)")
+
+    app.add_url_rule(f'{app.static_url_path}/dist/<path:filename>', 'asset', serve)
+
+    @app.url_defaults
+    def _hashed_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = 'dist/' + manifest[values['filename']]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if sys.argv[1:] != ['build']:
+        raise SystemExit('Usage: python -m assets build')
+    build()
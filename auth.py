@@ -5,14 +5,16 @@ Handles registration, login, logout, profile management.
 
 import re
 import os
-import requests
 import secrets
 import string
 from functools import wraps
 from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template, flash
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-import bcrypt
-from models import create_user, get_user_by_email, get_user_by_id, get_user_by_username, update_user
+import passwords
+from passwords import HashingBusy
+from http_pool import get_session
+from models import (create_user, create_user_with_free_username, get_user_by_email, get_user_by_id,
+                    get_user_by_username, update_user, UsernameTaken)
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -59,11 +61,11 @@ def init_login_manager(app):
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
 def _hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return passwords.hash_password(password)
 
 
 def _check_password(password, hashed):
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return passwords.check_password(password, hashed)
 
 
 def _validate_email(email):
@@ -88,6 +90,19 @@ def _validate_registration(email, username, password, confirm_password):
 
 # ─── Routes ──────────────────────────────────────────────────────────────────
 
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    """Password hashing is saturated: ask the client to retry instead of queueing."""
+    message = 'Too many sign-in attempts right now, please try again in a moment'
+    if request.is_json or request.path.startswith('/api/'):
+        resp = jsonify({'success': False, 'error': message})
+    else:
+        flash(message, 'error')
+        template = 'register.html' if request.endpoint == 'auth.register' else 'login.html'
+        resp = render_template(template)
+    return resp, 503, {'Retry-After': '5'}
+
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
@@ -113,12 +128,26 @@ def login():
     if not user_dict:
         user_dict = get_user_by_username(login_id)
 
-    if not user_dict or not _check_password(password, user_dict['password_hash']):
+    try:
+        valid = bool(user_dict) and _check_password(password, user_dict['password_hash'])
+    except HashingBusy:
+        passwords.record_login('busy')
+        raise
+    passwords.record_login('success' if valid else 'failure')
+
+    if not valid:
         if request.is_json:
             return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
         flash('Invalid credentials', 'error')
         return render_template('login.html'), 401
 
+    # Bring hashes made under an older work factor up to policy
+    if passwords.needs_rehash(user_dict['password_hash']):
+        try:
+            update_user(user_dict['id'], password_hash=_hash_password(password))
+        except HashingBusy:
+            pass  # rehash on a later login
+
     user = User(user_dict)
     login_user(user, remember=bool(remember))
 
@@ -158,9 +187,15 @@ def register():
             flash(e, 'error')
         return render_template('register.html'), 400
 
-    # Create user
+    # Create user (the username reservation settles concurrent sign-ups)
     hashed = _hash_password(password)
-    user_id = create_user(email, username, hashed)
+    try:
+        user_id = create_user(email, username, hashed)
+    except UsernameTaken:
+        if request.is_json:
+            return jsonify({'success': False, 'errors': ['Username is already taken']}), 400
+        flash('Username is already taken', 'error')
+        return render_template('register.html'), 400
     user_dict = get_user_by_id(user_id)
     user = User(user_dict)
     login_user(user)
@@ -247,9 +282,10 @@ def login_google_callback():
     credentials = flow.credentials
     
     try:
-        userinfo_response = requests.get(
+        userinfo_response = get_session('google').get(
             'https://www.googleapis.com/oauth2/v2/userinfo',
-            headers={'Authorization': f'Bearer {credentials.token}'}
+            headers={'Authorization': f'Bearer {credentials.token}'},
+            timeout=10
         )
         userinfo_response.raise_for_status()
         userinfo = userinfo_response.json()
@@ -285,14 +321,9 @@ def login_google_callback():
         if not base_username:
             base_username = 'user'
             
-        username = base_username
-        counter = 1
-        while get_user_by_username(username):
-            username = f"{base_username}_{counter}"
-            counter += 1
-            
-        user_id = create_user(email, username, hashed)
-        update_user(user_id, avatar_url=picture)
+        # One suffix lookup + a transactional reservation, not a query per taken name
+        user_id, username = create_user_with_free_username(email, base_username, hashed,
+                                                           avatar_url=picture)
         
         user_dict = get_user_by_id(user_id)
         user = User(user_dict)
@@ -0,0 +1,79 @@
+"""
+Benchmark: per-call connections vs pooled keep-alive sessions.
+
+Issues the same sequence of requests an Instagram job makes (one RapidAPI
+lookup plus the CDN probe and range requests) against a target, once with
+module-level requests.get (new TCP/TLS connection each call) and once with
+http_pool's shared session, and reports the latency saved per job.
+
+Usage:
+    python benchmarks/bench_http_pool.py                       # local HTTP server
+    python benchmarks/bench_http_pool.py --url https://www.google.com/generate_204
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+import http_pool  # noqa: E402
+
+CALLS_PER_JOB = 6  # lookup + probe + 4 ranges
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+def _job(get, url):
+    started = time.perf_counter()
+    for _ in range(CALLS_PER_JOB):
+        get(url, timeout=10).close()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='target URL (defaults to a local server)')
+    parser.add_argument('--jobs', type=int, default=20)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/'
+
+    session = http_pool.get_session('default')
+    _job(session.get, url)  # warm the pool
+
+    fresh = [_job(requests.get, url) for _ in range(args.jobs)]
+    pooled = [_job(session.get, url) for _ in range(args.jobs)]
+
+    f50, p50 = statistics.median(fresh), statistics.median(pooled)
+    print(f'target: {url}  ({CALLS_PER_JOB} calls per job, {args.jobs} jobs)')
+    print(f'fresh connections : p50 {f50:8.1f} ms/job')
+    print(f'pooled keep-alive : p50 {p50:8.1f} ms/job')
+    print(f'saved per job     : {f50 - p50:8.1f} ms')
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
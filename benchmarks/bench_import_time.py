@@ -0,0 +1,79 @@
+"""
+Benchmark: startup import cost of the web app.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter
+(several times, keeping the fastest run), parses the per-module timings and
+reports the total plus the most expensive top-level packages.  With --budget
+it exits non-zero when startup exceeds the given milliseconds, so it can
+guard against heavy imports creeping back into the web tier.
+
+Usage:
+    python benchmarks/bench_import_time.py                     # import wsgi
+    python benchmarks/bench_import_time.py --module ai_genrator --top 15
+    python benchmarks/bench_import_time.py --budget 1500
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that should only load when a job actually needs them
+HEAVY = ('cv2', 'groq', 'googleapiclient', 'yt_dlp', 'firebase_admin',
+         'google.cloud.firestore', 'grpc', 'numpy', 'PIL', 'ffmpeg')
+
+
+def measure(module):
+    """One run: {module_name: (self_us, cumulative_us)} in import order."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+        raise SystemExit(f'import {module} failed:\n' + '\n'.join(tail[-15:]))
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='wsgi', help='module to import (default: wsgi)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=0, help='fail above this many ms')
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda t: t.get(args.module, (0, 0))[1])
+    total_ms = best[args.module][1] / 1000
+
+    # Cumulative time per top-level package (nested imports roll up into it)
+    packages = {}
+    for name, (self_us, _) in best.items():
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+
+    print(f'import {args.module}: {total_ms:.0f} ms (best of {args.runs}), {len(best)} modules')
+    print(f'\nTop {args.top} packages by import time:')
+    for root, us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f'  {root:<28} {us / 1000:8.1f} ms')
+
+    loaded = [h for h in HEAVY if h in best]
+    print('\nHeavy packages loaded at startup: ' + (', '.join(loaded) if loaded else 'none ✅'))
+
+    if args.budget and total_ms > args.budget:
+        raise SystemExit(f'❌ Startup import {total_ms:.0f} ms exceeds budget {args.budget:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Load test: login throughput with bcrypt in the request thread vs the hashing pool.
+
+Creates users in a temp SQLite store, then drives POST /login from several
+client threads while a probe thread times a cheap page (/robots.txt), once
+with HASH_WORKERS=0 (bcrypt inline, the old behaviour) and once through the
+passwords process pool.  Reports logins/sec, login and probe latency, and
+refused (503) logins.  Also checks that a hash made at a lower cost is
+upgraded on login.  No network, Firebase or API keys needed.
+
+Usage:
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --seconds 5 --threads 16 --workers 2 --rounds 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix='autotube_bench_')
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(_tmpdir, 'jobs.db'))
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('STORAGE_SQLITE_PATH', os.path.join(_tmpdir, 'bench.db'))
+os.environ['MEDIA_WORKER'] = 'external'
+os.environ['JANITOR_INTERVAL'] = '0'
+
+PASSWORD = 'correct horse battery'
+
+
+def _pct(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def load(app, users, seconds, threads):
+    """Log in round-robin from `threads` clients while probing /robots.txt."""
+    stop = time.perf_counter() + seconds
+    logins, probes, statuses, lock = [], [], {}, threading.Lock()
+
+    def client(i):
+        c = app.test_client(use_cookies=False)
+        n = i
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            resp = c.post('/login', json={'login_id': users[n % len(users)], 'password': PASSWORD})
+            with lock:
+                logins.append(time.perf_counter() - t0)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+            n += threads
+
+    def probe():
+        c = app.test_client(use_cookies=False)
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            c.get('/robots.txt')
+            probes.append(time.perf_counter() - t0)
+            time.sleep(0.01)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=probe))
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    ok = statuses.get(200, 0)
+    return {'rate': ok / seconds, 'login_p50': _pct(logins, 0.5), 'login_p99': _pct(logins, 0.99),
+            'probe_p50': _pct(probes, 0.5), 'probe_p99': _pct(probes, 0.99), 'statuses': statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=8, help='concurrent login clients')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='HASH_WORKERS for the pool run')
+    parser.add_argument('--rounds', type=int, default=12, help='BCRYPT_ROUNDS')
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_ROUNDS'] = str(args.rounds)
+    os.environ['HASH_WORKERS'] = str(args.workers)
+
+    import app as webapp
+    import models
+    import passwords
+
+    hashed = passwords.hash_password(PASSWORD)
+    users = [f'bench{i}' for i in range(args.users)]
+    for name in users:
+        models.create_user(f'{name}@example.com', name, hashed)
+
+    results = {}
+    passwords.HASH_WORKERS = 0
+    results['inline (old)'] = load(webapp.app, users, args.seconds, args.threads)
+    passwords.HASH_WORKERS = args.workers
+    results[f'pool x{args.workers}'] = load(webapp.app, users, args.seconds, args.threads)
+
+    print(f'bcrypt cost {args.rounds}, {args.threads} login clients, {os.cpu_count()} CPU(s)\n')
+    print(f'{"":<14} {"logins/s":>9} {"login p50":>10} {"login p99":>10} {"probe p50":>10} {"probe p99":>10}  statuses')
+    for name, r in results.items():
+        print(f'{name:<14} {r["rate"]:9.1f} {r["login_p50"]:8.0f}ms {r["login_p99"]:8.0f}ms '
+              f'{r["probe_p50"]:8.1f}ms {r["probe_p99"]:8.1f}ms  {r["statuses"]}')
+
+    # Rehash on login: a cheaper legacy hash is upgraded to BCRYPT_ROUNDS
+    legacy = passwords.hash_password(PASSWORD, rounds=max(4, args.rounds - 2))
+    uid = models.create_user('legacy@example.com', 'legacy', legacy)
+    webapp.app.test_client(use_cookies=False).post('/login', json={'login_id': 'legacy', 'password': PASSWORD})
+    after = models.get_user_by_id(uid)['password_hash']
+    print(f'\nrehash on login: cost {passwords.hash_cost(legacy)} -> {passwords.hash_cost(after)}')
+    print(f'login stats: {passwords.login_stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Load test: public pages with and without the rendered-page cache.
+
+Drives the Flask app in-process (test client, several threads) against the
+public routes as an anonymous visitor, first the old way (render every hit,
+permanent filesystem session saved per request) and then through
+page_cache (cached body, no session, ETag revalidation), and reports
+requests/sec for each.  No network, Firebase or API keys needed.
+
+Usage:
+    python benchmarks/bench_public_pages.py
+    python benchmarks/bench_public_pages.py --seconds 5 --threads 8
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix='autotube_bench_')
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(_tmpdir, 'jobs.db'))
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('STORAGE_SQLITE_PATH', os.path.join(_tmpdir, 'bench.db'))
+os.environ['MEDIA_WORKER'] = 'external'
+os.environ['JANITOR_INTERVAL'] = '0'
+
+import app as webapp  # noqa: E402
+import page_cache  # noqa: E402
+
+PAGES = ['/', '/pricing', '/about', '/terms', '/privacy', '/refund', '/contact',
+         '/sitemap.xml', '/robots.txt']
+
+
+def load(seconds, threads, headers_for=None):
+    """Hit PAGES round-robin from `threads` clients for `seconds`. Returns (req/s, statuses)."""
+    stop = time.perf_counter() + seconds
+    counts, statuses, lock = [0] * threads, {}, threading.Lock()
+
+    def client(i):
+        c = webapp.app.test_client(use_cookies=False)
+        n = 0
+        while time.perf_counter() < stop:
+            path = PAGES[n % len(PAGES)]
+            resp = c.get(path, headers=headers_for(path) if headers_for else None)
+            with lock:
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+            n += 1
+        counts[i] = n
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts) / seconds, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    # Before: every hit renders and saves a permanent session
+    real = webapp.is_public_request
+    webapp.is_public_request = page_cache.is_public_request = lambda: False
+    before, s1 = load(args.seconds, args.threads)
+    webapp.is_public_request = page_cache.is_public_request = real
+
+    page_cache.clear()
+    after, s2 = load(args.seconds, args.threads)
+
+    # Revalidation, as a CDN or browser with the ETag would do
+    client = webapp.app.test_client(use_cookies=False)
+    etags = {p: client.get(p).headers.get('ETag') for p in PAGES}
+    revalidate, s3 = load(args.seconds, args.threads, lambda p: {'If-None-Match': etags[p]})
+
+    print(f'{"render every hit (old)":<28} {before:9.0f} req/s   {s1}')
+    print(f'{"page cache":<28} {after:9.0f} req/s   {s2}   x{after / before:.1f}')
+    print(f'{"page cache, If-None-Match":<28} {revalidate:9.0f} req/s   {s3}   x{revalidate / before:.1f}')
+
+    resp = client.get('/')
+    print(f'\nCache-Control: {resp.headers.get("Cache-Control")}   Vary: {resp.headers.get("Vary")}   '
+          f'Set-Cookie: {resp.headers.get("Set-Cookie") or "none"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: single-stream vs parallel ranged CDN download.
+
+Serves a generated file from a local HTTP server that throttles every
+connection (like a per-connection-capped CDN edge), then downloads it with
+ranged_download in single-stream and N-range modes. A third run drops the
+connection mid-range to exercise resume.
+
+Usage:
+    python benchmarks/bench_ranged_download.py --size-mb 24 --rate-kb 2048 --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ranged_download  # noqa: E402
+
+
+def make_handler(payload: bytes, rate: int, fail_once: dict):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            total = len(payload)
+            start, end = 0, total - 1
+            rng = self.headers.get('Range')
+            if rng and rng.startswith('bytes='):
+                first, _, last = rng[6:].partition('-')
+                start = int(first)
+                end = int(last) if last else total - 1
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{total}')
+            else:
+                self.send_response(200)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+
+            chunk = 64 * 1024
+            pos = start
+            drop_at = None
+            if fail_once.get('armed') and end - start > chunk * 4:
+                fail_once['armed'] = False
+                drop_at = start + (end - start) // 2
+            while pos <= end:
+                piece = payload[pos:min(pos + chunk, end + 1)]
+                if drop_at is not None and pos >= drop_at:
+                    self.close_connection = True
+                    return  # simulate a dropped connection mid-range
+                try:
+                    self.wfile.write(piece)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                pos += len(piece)
+                time.sleep(len(piece) / rate)
+
+    return Handler
+
+
+def run(label, url, workers, out_dir, payload):
+    out = os.path.join(out_dir, f'{label}.bin')
+    started = time.perf_counter()
+    size = ranged_download.download(url, out, workers=workers)
+    elapsed = time.perf_counter() - started
+    with open(out, 'rb') as f:
+        assert f.read() == payload, f'{label}: downloaded bytes differ from the source'
+    print(f'{label:<14} {workers:>2} range(s)  {size / 1048576:6.1f} MB  {elapsed:6.2f}s  '
+          f'{size / 1048576 / elapsed:6.2f} MB/s')
+    os.remove(out)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=24)
+    parser.add_argument('--rate-kb', type=int, default=2048, help='per-connection throttle (KB/s)')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    fail_once = {'armed': False}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(payload, args.rate_kb * 1024, fail_once))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/reel.mp4'
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        single = run('single-stream', url, 1, out_dir, payload)
+        ranged = run('ranged', url, args.workers, out_dir, payload)
+        fail_once['armed'] = True
+        run('ranged+resume', url, args.workers, out_dir, payload)
+
+    server.shutdown()
+    print(f'speed-up: {single / ranged:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: session load/save latency, filesystem vs SQLite session store.
+
+Pre-populates each backend with --sessions stored sessions, then times
+open_session (load) and save_session (save) on a minimal Flask app for
+random existing session ids, the way a logged-in request does.  Reports
+p50/p99 per operation.  Everything runs in a temp directory; no network,
+Firebase or API keys needed.
+
+Usage:
+    python benchmarks/bench_sessions.py
+    python benchmarks/bench_sessions.py --sessions 20000 --ops 5000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix='autotube_bench_')
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(_tmpdir, 'jobs.db'))
+
+from flask import Flask, Response  # noqa: E402
+from flask_session.filesystem import FileSystemSessionInterface  # noqa: E402
+
+import session_store  # noqa: E402
+from job_store import get_conn  # noqa: E402
+
+warnings.simplefilter('ignore', DeprecationWarning)
+
+# Roughly what a logged-in user carries (Flask-Login + OAuth state)
+PAYLOAD = {'_user_id': 'u' * 20, '_fresh': True, '_id': 'x' * 64,
+           'oauth_state': 'n' * 43, 'oauth_timestamp': 1.0,
+           'oauth_data': {'redirect_uri': 'https://example.com/auth/callback', 'scopes': ['a', 'b']}}
+
+
+def _app():
+    app = Flask(__name__)
+    app.secret_key = 'bench'
+    app.config['PERMANENT_SESSION_LIFETIME'] = 2592000
+    return app
+
+
+def _pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1e6
+
+
+def run(name, app, interface, sessions, ops):
+    # Seed: save `sessions` sessions through the interface itself
+    sids = []
+    for i in range(sessions):
+        with app.test_request_context('/') as ctx:
+            s = interface.open_session(app, ctx.request)
+            s.update(PAYLOAD, n=i)
+            interface.save_session(app, s, Response())
+            sids.append(s.sid)
+
+    load, save = [], []
+    cookie = app.config['SESSION_COOKIE_NAME']
+    for _ in range(ops):
+        sid = random.choice(sids)
+        with app.test_request_context('/', headers={'Cookie': f'{cookie}={sid}'}) as ctx:
+            t0 = time.perf_counter()
+            s = interface.open_session(app, ctx.request)
+            t1 = time.perf_counter()
+            assert s.get('_user_id') == PAYLOAD['_user_id'], f'{name}: session {sid} not found'
+            s['oauth_timestamp'] = t1
+            interface.save_session(app, s, Response())
+            t2 = time.perf_counter()
+        load.append(t1 - t0)
+        save.append(t2 - t1)
+    return {'load_p50': _pct(load, 0.5), 'load_p99': _pct(load, 0.99),
+            'save_p50': _pct(save, 0.5), 'save_p99': _pct(save, 0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=5000, help='stored sessions before timing')
+    parser.add_argument('--ops', type=int, default=2000, help='timed load+save round trips')
+    args = parser.parse_args()
+
+    fs_dir = os.path.join(_tmpdir, 'flask_session')
+    fs_app = _app()
+    fs = FileSystemSessionInterface(fs_app, cache_dir=fs_dir, threshold=10 ** 9)
+    sq_app = _app()
+    sq = session_store.SQLiteSessionInterface(sq_app)
+
+    results = {
+        'filesystem': run('filesystem', fs_app, fs, args.sessions, args.ops),
+        'sqlite': run('sqlite', sq_app, sq, args.sessions, args.ops),
+    }
+
+    print(f'{args.sessions} stored sessions, {args.ops} load+save round trips (µs)\n')
+    print(f'{"backend":<12} {"load p50":>9} {"load p99":>9} {"save p50":>9} {"save p99":>9}')
+    for name, r in results.items():
+        print(f'{name:<12} {r["load_p50"]:9.0f} {r["load_p99"]:9.0f} {r["save_p50"]:9.0f} '
+              f'{r["save_p99"]:9.0f}')
+
+    # Expired rows are swept in one indexed DELETE
+    get_conn().execute('UPDATE web_sessions SET expires_at = 0')
+    t0 = time.perf_counter()
+    removed = session_store.sweep()
+    print(f'\nsqlite sweep of {removed} expired sessions: {(time.perf_counter() - t0) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
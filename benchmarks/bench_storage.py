@@ -0,0 +1,89 @@
+"""
+Benchmark: storage repository on the embedded SQLite backend.
+
+Seeds a throwaway database with users, purchases and a week of usage log
+and times the queries a dashboard view makes.  Needs no Firebase
+credentials or emulator.  Behaviour is covered by tests/test_repositories.py.
+
+Usage:
+    python benchmarks/bench_storage.py
+    python benchmarks/bench_storage.py --users 200 --events 500 --iterations 2000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['STORAGE_BACKEND'] = 'sqlite'
+_tmpdir = tempfile.mkdtemp(prefix='autotube_bench_')
+os.environ['STORAGE_SQLITE_PATH'] = os.path.join(_tmpdir, 'bench.db')
+
+import models  # noqa: E402
+from repositories import get_repository  # noqa: E402
+
+
+def seed(users, events):
+    repo = get_repository()
+    repo.init()
+    ids = []
+    for i in range(users):
+        uid = models.create_user(f'user{i}@example.com', f'user{i}', 'hash')
+        models.add_tokens(uid, 1000)
+        models.create_transaction(uid, 49900, 500, 'pro', f'pay_{i}')
+        ids.append(uid)
+
+    # Backdate part of the log so the weekly aggregation has something to group
+    now = datetime.utcnow()
+    for uid in ids:
+        with repo._tx() as tx:
+            tx.executemany(
+                'INSERT INTO usage_log (user_id, action, tokens_used, task_id, details, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(uid, random.choice(['upload', 'ai_metadata', 'video_edit']), random.randint(1, 10),
+                  '', '', (now - timedelta(hours=random.randint(0, 10 * 24))).isoformat())
+                 for _ in range(events)])
+    repo._conn().execute('ANALYZE')
+    return ids
+
+
+def timed(label, fn, ids, iterations):
+    samples = []
+    for _ in range(iterations):
+        uid = random.choice(ids)
+        start = time.perf_counter()
+        fn(uid)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(f'{label:<22} median {statistics.median(samples):7.3f} ms   '
+          f'p95 {samples[int(len(samples) * 0.95)]:7.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--events', type=int, default=300, help='usage log rows per user')
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ids = seed(args.users, args.events)
+    print(f'Seeded {args.users} users x {args.events} events in {time.perf_counter() - started:.1f}s '
+          f'({os.environ["STORAGE_SQLITE_PATH"]})')
+
+    timed('get_user_by_id', models.get_user_by_id, ids, args.iterations)
+    timed('get_user_by_email', lambda uid: models.get_user_by_email('user1@example.com'), ids, args.iterations)
+    timed('get_user_stats', models.get_user_stats, ids, args.iterations)
+    timed('get_recent_uploads', models.get_recent_uploads, ids, args.iterations)
+    timed('deduct_tokens', lambda uid: models.deduct_tokens(uid, 1, 'upload'), ids, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
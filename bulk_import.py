@@ -0,0 +1,85 @@
+"""
+Bulk Instagram import for AutoTube AI.
+Normalises and de-duplicates a list of reel URLs by shortcode and runs the
+items through a staged pipeline (download → edit/analyse → upload), one
+thread per stage, so consecutive items overlap instead of running serially.
+"""
+
+import re
+import queue
+import logging
+import threading
+
+from media_cache import shortcode_from_url
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_SPLIT_RE = re.compile(r'[\s,]+')
+
+
+def parse_reel_urls(raw):
+    """
+    Accept a list of URLs or a newline/comma separated string and return
+    (items, invalid) where items is [(shortcode, url), ...] with duplicate
+    shortcodes removed (first occurrence wins, input order kept).
+    """
+    if isinstance(raw, str):
+        raw = _SPLIT_RE.split(raw)
+    items, invalid, seen = [], [], set()
+    for url in raw or []:
+        url = (url or '').strip() if isinstance(url, str) else ''
+        if not url:
+            continue
+        shortcode = shortcode_from_url(url)
+        if not shortcode:
+            invalid.append(url)
+            continue
+        if shortcode in seen:
+            continue
+        seen.add(shortcode)
+        items.append((shortcode, url))
+    return items, invalid
+
+
+def run_pipeline(items, stages, on_error=None, depth=1):
+    """
+    Push items through `stages`, each stage running in its own thread.
+
+    A stage is called as stage(item, value) with the previous stage's return
+    value (None for the first stage).  Stages are joined by queues holding at
+    most `depth` items, so while item N is in stage 2, item N+1 is in stage 1
+    and item N-1 in stage 3, and no stage races ahead (bounding the videos on
+    disk).  A failing item is handed to on_error(item, exc) and dropped; the
+    rest of the batch carries on.  Blocks until every item has left the pipe.
+    """
+    links = [queue.Queue(maxsize=depth) for _ in stages[1:]]
+
+    def worker(index, stage):
+        inbox = links[index - 1] if index else None
+        outbox = links[index] if index < len(links) else None
+        source = ((item, None) for item in items) if inbox is None else iter(inbox.get, _DONE)
+        for item, value in source:
+            try:
+                result = stage(item, value)
+            except Exception as e:
+                logger.warning(f"Bulk stage {stage.__name__} failed: {e}")
+                if on_error:
+                    try:
+                        on_error(item, e)
+                    except Exception as cleanup_error:
+                        logger.error(f"Bulk error handler failed: {cleanup_error}")
+                continue
+            if outbox is not None:
+                outbox.put((item, result))
+        if outbox is not None:
+            outbox.put(_DONE)
+
+    threads = [
+        threading.Thread(target=worker, args=(i, stage), name=f'bulk-{stage.__name__}', daemon=True)
+        for i, stage in enumerate(stages)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
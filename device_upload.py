@@ -0,0 +1,340 @@
+"""
+Streaming device uploads for AutoTube AI.
+Writes the request body straight into a per-job workspace while hashing it,
+checks the container signature from the first bytes and enforces the size
+cap as data arrives, so a video is never spooled to a temp file and copied.
+Large files can instead arrive as checksummed chunks in a resumable session
+(init / put chunk at offset / finalize).  Uploads are registered per user so
+later requests can only use their own.
+"""
+
+import os
+import uuid
+import shutil
+import hashlib
+import logging
+
+from job_store import register_schema, get_conn, transaction, now
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORKSPACE_DIR = os.getenv('UPLOAD_WORKSPACE_DIR', os.path.join(BASE_DIR, 'downloads', 'jobs'))
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(600 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+HEADER_BYTES = 16
+# Resumable uploads: size of each chunk and how long an idle session is kept
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', str(24 * 3600)))
+
+VIDEO_EXTS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v'}
+
+# ISO-BMFF / QuickTime top-level atoms that may open a file
+_MP4_ATOMS = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'}
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS uploaded_files (
+    path TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    upload_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    fingerprint TEXT,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    container TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_user ON upload_sessions (user_id, fingerprint);
+CREATE TABLE IF NOT EXISTS upload_chunks (
+    upload_id TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (upload_id, offset)
+);
+''')
+
+
+class UploadRejected(ValueError):
+    """The upload was refused; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff_container(head):
+    """Identify the video container from the first bytes (None if not a video)."""
+    if len(head) >= 8 and head[4:8] in _MP4_ATOMS:
+        return 'mp4'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'matroska'
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return 'avi'
+    return None
+
+
+# ─── Workspaces ───────────────────────────────────────────────────────────────
+
+def new_workspace():
+    """Create a unique directory for one job's files."""
+    path = os.path.join(os.path.abspath(WORKSPACE_DIR), uuid.uuid4().hex)
+    os.makedirs(path)
+    return path
+
+
+def remove_workspace(path):
+    """Delete a job workspace (ignores anything outside WORKSPACE_DIR)."""
+    if not path:
+        return
+    root = os.path.abspath(WORKSPACE_DIR)
+    path = os.path.abspath(path)
+    if os.path.dirname(path) != root:
+        return
+    shutil.rmtree(path, ignore_errors=True)
+    get_conn().execute('DELETE FROM uploaded_files WHERE path LIKE ?', (path + os.sep + '%',))
+
+
+# ─── Receiving ────────────────────────────────────────────────────────────────
+
+def receive(stream, filename, content_length=None, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Stream an uploaded video into a fresh workspace.
+
+    Returns {'path', 'sha256', 'size', 'container'}. Raises UploadRejected
+    (and leaves nothing on disk) for a bad extension, oversize body or a
+    payload that is not a recognised video container.
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in VIDEO_EXTS:
+        raise UploadRejected('Unsupported video format')
+    if content_length and content_length > max_bytes:
+        raise UploadRejected(f'File too large (max {max_bytes // 1048576} MB)', 413)
+
+    workspace = new_workspace()
+    path = os.path.join(workspace, f'source{ext}')
+    digest = hashlib.sha256()
+    size = 0
+    container = None
+    head = b''
+    try:
+        with open(path, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if container is None:
+                    # Identify the container as soon as the header has arrived
+                    head += chunk[:HEADER_BYTES - len(head)]
+                    if len(head) >= HEADER_BYTES:
+                        container = sniff_container(head)
+                        if not container:
+                            raise UploadRejected('File is not a supported video')
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f'File too large (max {max_bytes // 1048576} MB)', 413)
+                digest.update(chunk)
+                f.write(chunk)
+
+        if container is None:
+            container = sniff_container(head)
+            if not container:
+                raise UploadRejected('File is not a supported video')
+    except BaseException:
+        shutil.rmtree(workspace, ignore_errors=True)
+        raise
+
+    logger.info(f"📥 Received {size / 1048576:.1f} MB {container} upload → {path}")
+    return {'path': path, 'sha256': digest.hexdigest(), 'size': size, 'container': container}
+
+
+# ─── Ownership ────────────────────────────────────────────────────────────────
+
+def register_upload(user_id, upload):
+    get_conn().execute(
+        '''INSERT OR REPLACE INTO uploaded_files (path, user_id, sha256, size, created_at)
+           VALUES (?, ?, ?, ?, ?)''',
+        (upload['path'], str(user_id), upload['sha256'], upload['size'], now()),
+    )
+
+
+def lookup_upload(user_id, path):
+    """Return the registered upload at `path` if it belongs to user_id and still exists."""
+    row = get_conn().execute(
+        'SELECT path, sha256, size FROM uploaded_files WHERE path = ? AND user_id = ?',
+        (os.path.abspath(path or ''), str(user_id)),
+    ).fetchone()
+    if not row or not os.path.exists(row['path']):
+        return None
+    return dict(row)
+
+
+# ─── Chunked, Resumable Uploads ───────────────────────────────────────────────
+
+def _session_view(conn, row):
+    offsets = [r['offset'] for r in conn.execute(
+        'SELECT offset FROM upload_chunks WHERE upload_id = ? ORDER BY offset', (row['upload_id'],))]
+    return {
+        'upload_id': row['upload_id'],
+        'size': row['size'],
+        'chunk_size': row['chunk_size'],
+        'received': offsets,
+        'bytes_received': sum(min(row['chunk_size'], row['size'] - o) for o in offsets),
+    }
+
+
+def _get_session(conn, user_id, upload_id):
+    row = conn.execute(
+        'SELECT * FROM upload_sessions WHERE upload_id = ? AND user_id = ?',
+        (upload_id, str(user_id)),
+    ).fetchone()
+    if not row or not os.path.exists(row['path']):
+        raise UploadRejected('Upload session not found', 404)
+    return row
+
+
+def _drop_session(conn, upload_id):
+    conn.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+    conn.execute('DELETE FROM upload_sessions WHERE upload_id = ?', (upload_id,))
+
+
+def expire_sessions(ttl=UPLOAD_SESSION_TTL):
+    """Remove chunked uploads idle for longer than ttl seconds. Returns how many."""
+    conn = get_conn()
+    stale = conn.execute(
+        'SELECT upload_id, path FROM upload_sessions WHERE updated_at < ?', (now() - ttl,)
+    ).fetchall()
+    for row in stale:
+        shutil.rmtree(os.path.dirname(row['path']), ignore_errors=True)
+        _drop_session(conn, row['upload_id'])
+    if stale:
+        logger.info(f"🧹 Expired {len(stale)} abandoned upload session(s)")
+    return len(stale)
+
+
+def start_session(user_id, filename, size, fingerprint=None, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Open (or resume) a chunked upload. A session with the same client
+    fingerprint (e.g. name + size + mtime) is resumed instead of restarted.
+    Returns {'upload_id', 'size', 'chunk_size', 'received', 'bytes_received'}.
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in VIDEO_EXTS:
+        raise UploadRejected('Unsupported video format')
+    if not isinstance(size, int) or size <= 0:
+        raise UploadRejected('File size is required')
+    if size > max_bytes:
+        raise UploadRejected(f'File too large (max {max_bytes // 1048576} MB)', 413)
+
+    expire_sessions()
+    conn = get_conn()
+    if fingerprint:
+        row = conn.execute(
+            'SELECT * FROM upload_sessions WHERE user_id = ? AND fingerprint = ? AND size = ?',
+            (str(user_id), fingerprint, size),
+        ).fetchone()
+        if row and os.path.exists(row['path']):
+            conn.execute('UPDATE upload_sessions SET updated_at = ? WHERE upload_id = ?',
+                         (now(), row['upload_id']))
+            logger.info(f"Resuming upload session {row['upload_id'][:8]}")
+            return _session_view(conn, row)
+
+    workspace = new_workspace()
+    path = os.path.join(workspace, f'source{ext}')
+    with open(path, 'wb') as f:
+        f.truncate(size)  # preallocate so chunks can land in any order
+    upload_id = uuid.uuid4().hex
+    conn.execute(
+        '''INSERT INTO upload_sessions
+           (upload_id, user_id, fingerprint, path, size, chunk_size, container, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, NULL, ?)''',
+        (upload_id, str(user_id), fingerprint, path, size, UPLOAD_CHUNK_SIZE, now()),
+    )
+    row = conn.execute('SELECT * FROM upload_sessions WHERE upload_id = ?', (upload_id,)).fetchone()
+    return _session_view(conn, row)
+
+
+def session_status(user_id, upload_id):
+    conn = get_conn()
+    return _session_view(conn, _get_session(conn, user_id, upload_id))
+
+
+def put_chunk(user_id, upload_id, offset, stream, checksum=None):
+    """
+    Write one chunk at `offset`. The body must be exactly the chunk's length
+    and, when a checksum (hex SHA-256) is given, match it. Re-sending a chunk
+    is harmless. Returns the session status.
+    """
+    conn = get_conn()
+    row = _get_session(conn, user_id, upload_id)
+    chunk_size, size = row['chunk_size'], row['size']
+    if offset < 0 or offset >= size or offset % chunk_size:
+        raise UploadRejected('Invalid chunk offset')
+    expected = min(chunk_size, size - offset)
+
+    data = stream.read(expected + 1)
+    if len(data) != expected:
+        raise UploadRejected(f'Chunk at {offset} must be {expected} bytes, got {len(data)}')
+    digest = hashlib.sha256(data).hexdigest()
+    if checksum and checksum.lower() != digest:
+        raise UploadRejected(f'Checksum mismatch for chunk at {offset}', 422)
+
+    container = None
+    if offset == 0:
+        container = sniff_container(data[:HEADER_BYTES])
+        if not container:
+            shutil.rmtree(os.path.dirname(row['path']), ignore_errors=True)
+            _drop_session(conn, upload_id)
+            raise UploadRejected('File is not a supported video')
+
+    fd = os.open(row['path'], os.O_WRONLY)
+    try:
+        os.pwrite(fd, data, offset)
+    finally:
+        os.close(fd)
+
+    with transaction() as tx:
+        tx.execute(
+            'INSERT OR REPLACE INTO upload_chunks (upload_id, offset, sha256) VALUES (?, ?, ?)',
+            (upload_id, offset, digest),
+        )
+        tx.execute(
+            'UPDATE upload_sessions SET updated_at = ?, container = COALESCE(?, container) WHERE upload_id = ?',
+            (now(), container, upload_id),
+        )
+    return _session_view(conn, row)
+
+
+def finish_session(user_id, upload_id):
+    """
+    Check every chunk arrived, hash the assembled file and register it as a
+    normal upload. Returns the same dict as receive().
+    """
+    conn = get_conn()
+    row = _get_session(conn, user_id, upload_id)
+    received = set(_session_view(conn, row)['received'])
+    missing = [o for o in range(0, row['size'], row['chunk_size']) if o not in received]
+    if missing:
+        raise UploadRejected(f'{len(missing)} chunk(s) missing', 409)
+
+    digest = hashlib.sha256()
+    with open(row['path'], 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    upload = {
+        'path': row['path'],
+        'sha256': digest.hexdigest(),
+        'size': row['size'],
+        'container': row['container'],
+    }
+    with transaction() as tx:
+        _drop_session(tx, upload_id)
+    register_upload(user_id, upload)
+    logger.info(f"📥 Assembled {row['size'] / 1048576:.1f} MB chunked upload → {row['path']}")
+    return upload
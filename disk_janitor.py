@@ -0,0 +1,266 @@
+"""
+Disk janitor and admission control for the downloads directory.
+Jobs hold the files they are working on; everything else under downloads/
+(stray reels, music, unused upload workspaces, leftovers of crashed workers)
+is removed once it is old enough, and the oldest idle files go first when the
+directory exceeds its byte quota.  New work is only admitted while the disk
+keeps a safety margin of free space.
+"""
+
+import os
+import time
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+
+import device_upload
+import job_queue
+import media_cache
+from job_store import register_schema, get_conn, transaction, now, pid_alive
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DOWNLOAD_DIR = os.path.join(BASE_DIR, 'downloads')
+# Never swept here: the media cache runs its own LRU
+SKIP_DIRS = {'.media_cache'}
+
+ORPHAN_AGE = int(os.getenv('JANITOR_ORPHAN_AGE', str(2 * 3600)))
+MIN_AGE = int(os.getenv('JANITOR_MIN_AGE', '600'))
+INTERVAL = int(os.getenv('JANITOR_INTERVAL', '300'))
+DOWNLOAD_QUOTA_BYTES = int(os.getenv('DOWNLOAD_QUOTA_BYTES', str(3 * 1024 ** 3)))
+MIN_FREE_BYTES = int(os.getenv('DISK_MIN_FREE_BYTES', str(1024 ** 3)))
+# Disk needed by one Instagram job when the real size is not known yet
+JOB_BYTES_ESTIMATE = int(os.getenv('JOB_BYTES_ESTIMATE', str(150 * 1024 * 1024)))
+# Seconds /health reuses the downloads/ size from the last sweep or walk
+USAGE_TTL = int(os.getenv('JANITOR_USAGE_TTL', '60'))
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS disk_holds (
+    path TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_disk_holds_path ON disk_holds (path);
+CREATE TABLE IF NOT EXISTS janitor_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_run REAL NOT NULL
+);
+''')
+
+
+# ─── Holds ────────────────────────────────────────────────────────────────────
+
+def acquire(*paths):
+    """Protect paths from the janitor until release() (or until this process dies)."""
+    pid = os.getpid()
+    get_conn().executemany('INSERT INTO disk_holds (path, pid, created_at) VALUES (?, ?, ?)',
+                           [(os.path.abspath(p), pid, now()) for p in paths if p])
+
+
+def release(*paths):
+    pid = os.getpid()
+    get_conn().executemany('DELETE FROM disk_holds WHERE path = ? AND pid = ?',
+                           [(os.path.abspath(p), pid) for p in paths if p])
+
+
+@contextmanager
+def hold(*paths):
+    """Protect paths from the janitor while a job uses them."""
+    acquire(*paths)
+    try:
+        yield
+    finally:
+        release(*paths)
+
+
+def _held_paths():
+    """
+    Paths held by live processes or by queued jobs; holds left by dead
+    workers are dropped.
+    """
+    conn = get_conn()
+    held, dead = set(), set()
+    for row in conn.execute('SELECT path, pid FROM disk_holds').fetchall():
+        if pid_alive(row['pid']):
+            held.add(row['path'])
+        else:
+            dead.add(row['pid'])
+    for pid in dead:
+        conn.execute('DELETE FROM disk_holds WHERE pid = ?', (pid,))
+    return held | job_queue.pending_paths()
+
+
+# ─── Sweeping ─────────────────────────────────────────────────────────────────
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime
+
+
+def _workspace_entry(path):
+    """A workspace is swept as one unit: total size, newest mtime inside it."""
+    size, mtime = 0, (_stat(path) or (0, 0))[1]
+    for dirpath, _, files in os.walk(path):
+        for f in files:
+            st = _stat(os.path.join(dirpath, f))
+            if st:
+                size += st[0]
+                mtime = max(mtime, st[1])
+    return path, size, mtime
+
+
+def _entries():
+    """Yield (path, size, mtime) for every sweepable file and upload workspace."""
+    workspace_root = os.path.abspath(device_upload.WORKSPACE_DIR)
+    if os.path.isdir(workspace_root):
+        for name in os.listdir(workspace_root):
+            yield _workspace_entry(os.path.join(workspace_root, name))
+
+    for dirpath, dirnames, files in os.walk(DOWNLOAD_DIR):
+        dirnames[:] = [d for d in dirnames
+                       if d not in SKIP_DIRS and os.path.join(dirpath, d) != workspace_root]
+        for f in files:
+            path = os.path.join(dirpath, f)
+            st = _stat(path)
+            if st:
+                yield path, st[0], st[1]
+
+
+def _is_held(path, held):
+    return path in held or any(h.startswith(path + os.sep) for h in held)
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        device_upload.remove_workspace(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def sweep(quota=None):
+    """
+    Remove orphans (unheld and older than ORPHAN_AGE), then the oldest idle
+    entries until downloads/ fits in its quota. Returns bytes freed.
+    """
+    limit = DOWNLOAD_QUOTA_BYTES if quota is None else quota
+    device_upload.expire_sessions()
+
+    held = _held_paths()
+    everything = list(_entries())
+    entries = sorted((mtime, path, size) for path, size, mtime in everything
+                     if not _is_held(path, held))
+
+    current = now()
+    total = sum(size for _, _, size in entries)
+    freed = removed = 0
+    for mtime, path, size in entries:
+        age = current - mtime
+        over_quota = total - freed > limit
+        if age < MIN_AGE or (age < ORPHAN_AGE and not over_quota):
+            continue
+        try:
+            _remove(path)
+        except OSError as e:
+            logger.warning(f"Janitor could not remove {path}: {e}")
+            continue
+        freed += size
+        removed += 1
+
+    _remember_size(sum(size for _, size, _ in everything) - freed)
+    if removed:
+        logger.info(f"🧹 Janitor removed {removed} item(s), {freed / 1048576:.1f} MB")
+    return freed
+
+
+def _claim_run(interval):
+    """Let only one worker per interval do the periodic sweep."""
+    with transaction() as conn:
+        row = conn.execute('SELECT last_run FROM janitor_lease WHERE id = 1').fetchone()
+        if row and now() - row['last_run'] < interval:
+            return False
+        conn.execute('INSERT OR REPLACE INTO janitor_lease (id, last_run) VALUES (1, ?)', (now(),))
+        return True
+
+
+_started = None
+
+
+def start(interval=INTERVAL):
+    """Start the periodic sweep in this process (idempotent, restarted after fork)."""
+    global _started
+    if _started == os.getpid() or interval <= 0:
+        return
+    _started = os.getpid()
+
+    def loop():
+        while True:
+            try:
+                if _claim_run(interval):
+                    sweep()
+            except Exception as e:
+                logger.error(f"Janitor sweep failed: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=loop, name='disk-janitor', daemon=True).start()
+
+
+# ─── Admission Control ────────────────────────────────────────────────────────
+
+def free_bytes():
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    return shutil.disk_usage(DOWNLOAD_DIR).free
+
+
+def admit(expected_bytes):
+    """
+    True if `expected_bytes` more can be written while keeping MIN_FREE_BYTES
+    free. Sweeps (and trims the media cache) once before giving up.
+    """
+    if free_bytes() - expected_bytes >= MIN_FREE_BYTES:
+        return True
+    try:
+        sweep()
+        if free_bytes() - expected_bytes < MIN_FREE_BYTES:
+            shortfall = MIN_FREE_BYTES + expected_bytes - free_bytes()
+            media_cache.evict(max(0, media_cache.cache_size() - shortfall))
+    except Exception as e:
+        logger.error(f"Janitor sweep during admission failed: {e}")
+    ok = free_bytes() - expected_bytes >= MIN_FREE_BYTES
+    if not ok:
+        logger.warning(f"⛔ Rejecting work: {expected_bytes / 1048576:.0f} MB needed, "
+                       f"{free_bytes() / 1048576:.0f} MB free (reserve {MIN_FREE_BYTES / 1048576:.0f} MB)")
+    return ok
+
+
+_last_size = None  # (monotonic time, downloads/ bytes)
+
+
+def _remember_size(size):
+    global _last_size
+    _last_size = (time.monotonic(), size)
+
+
+def downloads_bytes():
+    """Size of downloads/, walked at most once per USAGE_TTL in this process."""
+    cached = _last_size
+    if cached and time.monotonic() - cached[0] < USAGE_TTL:
+        return cached[1]
+    size = sum(size for _, size, _ in _entries())
+    _remember_size(size)
+    return size
+
+
+def usage():
+    """Disk numbers for /health."""
+    return {
+        'downloads_bytes': downloads_bytes(),
+        'quota_bytes': DOWNLOAD_QUOTA_BYTES,
+        'free_bytes': free_bytes(),
+        'min_free_bytes': MIN_FREE_BYTES,
+    }
@@ -2,16 +2,31 @@ import requests
 import os
 import time
 import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urlparse, urlunparse
 from dotenv import load_dotenv
 import logging
 
+import endpoint_health
+import http_pool
+import media_cache
+import ranged_download
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
 
+# How endpoints are raced when resolving the CDN URL:
+#   hedge      – start the primary, then launch the next fallback every
+#                DOWNLOAD_HEDGE_DELAY seconds (or as soon as one fails)
+#   race       – fire every endpoint at once
+#   sequential – one after another (legacy behaviour)
+HEDGE_MODE = os.getenv("DOWNLOAD_HEDGE_MODE", "hedge").strip().lower()
+HEDGE_DELAY = float(os.getenv("DOWNLOAD_HEDGE_DELAY", "4"))
+
 # ---------------------------------------------------------------------------
 # Multiple API endpoints tried in order.  Each entry is:
 #   (host, url_template, response_extractor)
@@ -86,26 +101,39 @@ def _clean_instagram_url(url: str) -> str:
     return clean
 
 
-def _try_endpoint(ep: dict, url: str, retries: int = 2) -> str | None:
+def _sleep(seconds: float, cancel: threading.Event | None):
+    """Back-off sleep that returns early (True) once the resolve is cancelled."""
+    if cancel is None:
+        time.sleep(seconds)
+        return False
+    return cancel.wait(seconds)
+
+
+def _try_endpoint(ep: dict, url: str, retries: int = 2,
+                  cancel: threading.Event | None = None) -> str | None:
     """
     Call one API endpoint.  Returns the CDN video URL on success, None on failure.
-    Retries on 429 / 5xx with exponential back-off.
+    Retries on 429 / 5xx with exponential back-off.  Gives up early when
+    `cancel` is set (another endpoint already won the race).
     """
     headers = {
         "x-rapidapi-host": ep["host"],
         "x-rapidapi-key": RAPIDAPI_KEY,
     }
+    http = http_pool.get_session("rapidapi")
     for attempt in range(retries + 1):
+        if cancel is not None and cancel.is_set():
+            return None
         try:
             if ep["method"] == "GET":
-                resp = requests.get(
+                resp = http.get(
                     ep["url"],
                     headers=headers,
                     params={ep["param_key"]: url},
                     timeout=30,
                 )
             else:
-                resp = requests.post(
+                resp = http.post(
                     ep["url"],
                     headers=headers,
                     json={ep["param_key"]: url},
@@ -113,9 +141,10 @@ def _try_endpoint(ep: dict, url: str, retries: int = 2) -> str | None:
                 )
 
             if resp.status_code in (429, 500, 502, 503, 504):
-                wait = 2 ** attempt
-                logger.warning(f"[{ep['name']}] HTTP {resp.status_code} – retry in {wait}s (attempt {attempt+1})")
-                time.sleep(wait)
+                delay = 2 ** attempt
+                logger.warning(f"[{ep['name']}] HTTP {resp.status_code} – retry in {delay}s (attempt {attempt+1})")
+                if _sleep(delay, cancel):
+                    return None
                 continue
 
             resp.raise_for_status()
@@ -137,18 +166,98 @@ def _try_endpoint(ep: dict, url: str, retries: int = 2) -> str | None:
         except requests.exceptions.RequestException as exc:
             logger.warning(f"[{ep['name']}] Request exception (attempt {attempt+1}): {exc}")
             if attempt < retries:
-                time.sleep(2 ** attempt)
+                if _sleep(2 ** attempt, cancel):
+                    return None
 
     return None
 
 
-def download_reel_with_audio(reel_url: str, output_folder: str = "downloads") -> str:
+def _timed_try(ep: dict, url: str, cancel: threading.Event | None = None) -> str | None:
+    """_try_endpoint plus per-endpoint health / latency bookkeeping."""
+    started = time.monotonic()
+    video_url = _try_endpoint(ep, url, cancel=cancel)
+    elapsed_ms = (time.monotonic() - started) * 1000
+    if video_url is None and cancel is not None and cancel.is_set():
+        logger.info(f"[{ep['name']}] cancelled after {elapsed_ms:.0f} ms")
+        return None
+    try:
+        endpoint_health.record(ep["name"], bool(video_url), elapsed_ms)
+    except Exception as exc:
+        logger.warning(f"[{ep['name']}] could not record endpoint health: {exc}")
+    logger.info(f"[{ep['name']}] {'ok' if video_url else 'failed'} in {elapsed_ms:.0f} ms")
+    return video_url
+
+
+def _resolve_cdn_url(url: str, endpoints: list, mode: str = HEDGE_MODE,
+                     delay: float = HEDGE_DELAY) -> str | None:
+    """
+    Resolve the CDN video URL from the first endpoint that answers.
+
+    In hedge mode the primary starts alone and each fallback is launched
+    after `delay` seconds without a winner, or immediately when a running
+    endpoint fails.  Race mode launches everything at once.  The first
+    valid URL wins and the remaining attempts are cancelled.
+    """
+    if not endpoints:
+        return None
+
+    if mode == "sequential":
+        for ep in endpoints:
+            logger.info(f"Trying endpoint: {ep['name']}")
+            video_url = _timed_try(ep, url)
+            if video_url:
+                return video_url
+        return None
+
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(endpoints), thread_name_prefix="hedge")
+    pending = set()
+    next_idx = 0
+
+    def launch():
+        nonlocal next_idx
+        ep = endpoints[next_idx]
+        next_idx += 1
+        logger.info(f"Trying endpoint: {ep['name']}")
+        pending.add(pool.submit(_timed_try, ep, url, cancel))
+
+    try:
+        launch()
+        while mode == "race" and next_idx < len(endpoints):
+            launch()
+
+        while pending:
+            timeout = delay if next_idx < len(endpoints) else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                video_url = fut.result()
+                if video_url:
+                    return video_url
+            # Nothing won: hedge with the next endpoint (timer fired or one failed)
+            if next_idx < len(endpoints):
+                launch()
+        return None
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_endpoint_health() -> dict:
+    """Rolling health stats for every configured endpoint."""
+    return endpoint_health.snapshot([ep["name"] for ep in ENDPOINTS])
+
+
+def download_reel_with_audio(reel_url: str, output_folder: str = "downloads",
+                             progress=None) -> str:
     """
     Download an Instagram reel/post using RapidAPI with automatic fallback.
 
     Args:
         reel_url: Instagram reel URL (tracking params are stripped automatically)
         output_folder: Folder to save the downloaded video
+        progress: Optional callback(bytes_done, bytes_total) for the CDN fetch
+            (dropped ranges resume within this call; a failed call leaves
+            nothing behind to resume from, see ranged_download)
 
     Returns:
         Absolute path to the downloaded .mp4 file
@@ -160,14 +269,65 @@ def download_reel_with_audio(reel_url: str, output_folder: str = "downloads") ->
         raise Exception("RAPIDAPI_KEY not set in .env")
 
     clean_url = _clean_instagram_url(reel_url)
+    shortcode = media_cache.shortcode_from_url(clean_url)
     logger.info(f"Downloading: {clean_url}")
 
-    video_cdn_url = None
-    for ep in ENDPOINTS:
-        logger.info(f"Trying endpoint: {ep['name']}")
-        video_cdn_url = _try_endpoint(ep, clean_url)
-        if video_cdn_url:
-            break
+    os.makedirs(output_folder, exist_ok=True)
+    # Fresh name per call: concurrent jobs for one reel must not share a partial file
+    uid = str(uuid.uuid4())[:8]
+    output_file = os.path.join(output_folder, f"reel_{uid}.mp4")
+
+    job_started = time.monotonic()
+
+    # ── Already downloaded? Hard-link the cached copy ─────────────────────
+    if shortcode and _cache_call(media_cache.link_cached_file, shortcode, output_file):
+        logger.info(f"♻️ Cache hit for {shortcode} → {output_file}")
+        return output_file
+
+    try:
+        cached_url = _cache_call(media_cache.get_cdn_url, shortcode) if shortcode else None
+        if cached_url:
+            logger.info(f"♻️ Using cached CDN URL for {shortcode}")
+            try:
+                _fetch_to_file(cached_url, output_file, progress)
+            except (requests.exceptions.RequestException, ranged_download.DownloadError) as exc:
+                # Signed CDN link expired early — resolve a fresh one
+                logger.warning(f"Cached CDN URL failed ({exc}); resolving again")
+                _cache_call(media_cache.forget_cdn_url, shortcode)
+                cached_url = None
+
+        if not cached_url:
+            video_cdn_url = _resolve_video_url(clean_url)
+            if shortcode:
+                _cache_call(media_cache.put_cdn_url, shortcode, video_cdn_url)
+            _fetch_to_file(video_cdn_url, output_file, progress)
+    except Exception:
+        ranged_download.discard_partial(output_file)
+        raise
+
+    if shortcode:
+        _cache_call(media_cache.store_file, shortcode, output_file)
+    logger.info(f"Instagram download finished in {(time.monotonic() - job_started) * 1000:.0f} ms")
+    return output_file
+
+
+def _cache_call(fn, *args):
+    """Run a media-cache operation; cache trouble must never fail a download."""
+    try:
+        return fn(*args)
+    except Exception as exc:
+        logger.warning(f"Media cache {fn.__name__} failed: {exc}")
+        return None
+
+
+def _resolve_video_url(clean_url: str) -> str:
+    """Ask the RapidAPI endpoints (healthiest first) for the CDN video URL."""
+    try:
+        endpoints = endpoint_health.order_endpoints(ENDPOINTS)
+    except Exception as exc:
+        logger.warning(f"Endpoint health unavailable, using static order: {exc}")
+        endpoints = ENDPOINTS
+    video_cdn_url = _resolve_cdn_url(clean_url, endpoints)
 
     if not video_cdn_url:
         raise Exception(
@@ -175,24 +335,17 @@ def download_reel_with_audio(reel_url: str, output_folder: str = "downloads") ->
             "Check your RAPIDAPI_KEY and ensure at least one Instagram downloader "
             "subscription is active on RapidAPI."
         )
+    return video_cdn_url
 
-    # ── Stream the video to disk ───────────────────────────────────────────
-    os.makedirs(output_folder, exist_ok=True)
-    uid = str(uuid.uuid4())[:8]
-    output_file = os.path.join(output_folder, f"reel_{uid}.mp4")
 
+def _fetch_to_file(video_cdn_url: str, output_file: str, progress=None):
+    """Download the video from the CDN to disk (parallel ranges when supported)."""
     logger.info(f"Saving video to: {output_file}")
-    resp = requests.get(video_cdn_url, stream=True, timeout=120)
-    resp.raise_for_status()
-
-    with open(output_file, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=1024 * 1024):
-            if chunk:
-                f.write(chunk)
-
-    size_mb = os.path.getsize(output_file) / 1024 / 1024
-    logger.info(f"Downloaded {size_mb:.1f} MB → {output_file}")
-    return output_file
+    started = time.monotonic()
+    size = ranged_download.download(video_cdn_url, output_file, progress=progress,
+                                    session=http_pool.get_session("cdn"))
+    elapsed = time.monotonic() - started
+    logger.info(f"Downloaded {size / 1024 / 1024:.1f} MB in {elapsed:.1f}s → {output_file}")
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
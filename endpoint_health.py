@@ -0,0 +1,168 @@
+"""
+Health tracking for the RapidAPI downloader endpoints.
+Keeps a rolling window of call outcomes and latencies per endpoint in the
+local job store (shared by all workers) and runs a circuit breaker with
+half-open probing so known-bad providers are skipped.
+"""
+
+import os
+import logging
+
+from job_store import register_schema, get_conn, transaction, now
+
+logger = logging.getLogger(__name__)
+
+HEALTH_WINDOW = int(os.getenv('ENDPOINT_HEALTH_WINDOW', '50'))
+BREAKER_FAILURES = int(os.getenv('ENDPOINT_BREAKER_FAILURES', '3'))
+BREAKER_COOLDOWN = float(os.getenv('ENDPOINT_BREAKER_COOLDOWN', '120'))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS endpoint_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    latency_ms REAL NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_endpoint_calls_name ON endpoint_calls (name, id);
+CREATE TABLE IF NOT EXISTS endpoint_breaker (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'closed',
+    failures INTEGER NOT NULL DEFAULT 0,
+    opened_at REAL NOT NULL DEFAULT 0,
+    probe_at REAL NOT NULL DEFAULT 0
+);
+''')
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[idx], 1)
+
+
+# ─── Recording ────────────────────────────────────────────────────────────────
+
+def record(name, ok, latency_ms):
+    """Record one call outcome and update the circuit breaker."""
+    ts = now()
+    with transaction() as conn:
+        conn.execute(
+            'INSERT INTO endpoint_calls (name, ok, latency_ms, ts) VALUES (?, ?, ?, ?)',
+            (name, int(bool(ok)), float(latency_ms), ts),
+        )
+        conn.execute(
+            '''DELETE FROM endpoint_calls WHERE name = ? AND id <= (
+                   SELECT id FROM endpoint_calls WHERE name = ?
+                   ORDER BY id DESC LIMIT 1 OFFSET ?)''',
+            (name, name, HEALTH_WINDOW),
+        )
+
+        row = conn.execute(
+            'SELECT state, failures FROM endpoint_breaker WHERE name = ?', (name,)
+        ).fetchone()
+        state = row['state'] if row else CLOSED
+        failures = row['failures'] if row else 0
+
+        if ok:
+            state, failures, opened_at = CLOSED, 0, 0
+        else:
+            failures += 1
+            if state == HALF_OPEN or failures >= BREAKER_FAILURES:
+                if state != OPEN:
+                    logger.warning(f"[{name}] circuit opened after {failures} failure(s)")
+                state, opened_at = OPEN, ts
+            else:
+                opened_at = 0
+
+        conn.execute(
+            '''INSERT INTO endpoint_breaker (name, state, failures, opened_at, probe_at)
+               VALUES (?, ?, ?, ?, 0)
+               ON CONFLICT(name) DO UPDATE SET
+                   state = excluded.state, failures = excluded.failures,
+                   opened_at = excluded.opened_at''',
+            (name, state, failures, opened_at),
+        )
+
+
+def allow(name):
+    """
+    Whether the endpoint may be called now.  An open circuit lets exactly one
+    caller through as a half-open probe once the cooldown has elapsed.
+    """
+    conn = get_conn()
+    row = conn.execute(
+        'SELECT state, opened_at, probe_at FROM endpoint_breaker WHERE name = ?', (name,)
+    ).fetchone()
+    if not row or row['state'] == CLOSED:
+        return True
+
+    ts = now()
+    if row['state'] == OPEN and ts - row['opened_at'] < BREAKER_COOLDOWN:
+        return False
+    if row['state'] == HALF_OPEN and ts - row['probe_at'] < BREAKER_COOLDOWN:
+        return False  # a probe is already in flight
+
+    # Claim the probe slot atomically — only one worker wins
+    cur = conn.execute(
+        '''UPDATE endpoint_breaker SET state = ?, probe_at = ?
+           WHERE name = ? AND state = ? AND probe_at = ?''',
+        (HALF_OPEN, ts, name, row['state'], row['probe_at']),
+    )
+    if cur.rowcount == 1:
+        logger.info(f"[{name}] circuit half-open — probing")
+        return True
+    return False
+
+
+# ─── Reporting ────────────────────────────────────────────────────────────────
+
+def stats(name):
+    """Rolling success rate, p50/p95 latency and breaker state for one endpoint."""
+    conn = get_conn()
+    rows = conn.execute(
+        'SELECT ok, latency_ms FROM endpoint_calls WHERE name = ? ORDER BY id DESC LIMIT ?',
+        (name, HEALTH_WINDOW),
+    ).fetchall()
+    breaker = conn.execute(
+        'SELECT state, failures FROM endpoint_breaker WHERE name = ?', (name,)
+    ).fetchone()
+    latencies = [r['latency_ms'] for r in rows]
+    return {
+        'calls': len(rows),
+        'success_rate': round(sum(r['ok'] for r in rows) / len(rows), 3) if rows else None,
+        'p50_ms': _percentile(latencies, 50),
+        'p95_ms': _percentile(latencies, 95),
+        'state': breaker['state'] if breaker else CLOSED,
+        'consecutive_failures': breaker['failures'] if breaker else 0,
+    }
+
+
+def snapshot(names):
+    return {name: stats(name) for name in names}
+
+
+def order_endpoints(endpoints):
+    """
+    Order endpoints healthiest first and drop those with an open circuit.
+    Endpoints without history keep their configured position.  If every
+    circuit is open the full list is returned as a last resort.
+    """
+    scored = []
+    for idx, ep in enumerate(endpoints):
+        if not allow(ep['name']):
+            logger.info(f"[{ep['name']}] skipped — circuit open")
+            continue
+        s = stats(ep['name'])
+        rate = s['success_rate'] if s['success_rate'] is not None else 1.0
+        latency = s['p50_ms'] if s['p50_ms'] is not None else 0.0
+        scored.append(((-round(rate, 1), latency, idx), ep))
+
+    if not scored:
+        logger.warning("All endpoint circuits are open — trying every endpoint")
+        return list(endpoints)
+    return [ep for _, ep in sorted(scored, key=lambda item: item[0])]
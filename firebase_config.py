@@ -1,13 +1,15 @@
 """
 Firebase Admin SDK initialization for AutoTube AI.
-Initializes Firestore client using the service account key.
+Initializes the Firestore client using the service account key, lazily and
+once per process: nothing is imported or connected until the first query, so
+the SDK stays out of startup time and no gRPC channel is inherited across a
+gunicorn --preload fork.
 """
 
 import os
 import json
 import logging
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,8 @@ _KEY_PATHS = [
 
 def _find_key():
     """Find the service account key file or parse it from env var."""
+    from firebase_admin import credentials
+
     for path in _KEY_PATHS:
         if os.path.exists(path):
             logger.info(f"Using Firebase key from: {path}")
@@ -49,6 +53,9 @@ def _find_key():
 
 def init_firebase():
     """Initialize the Firebase app (idempotent — safe to call multiple times)."""
+    import firebase_admin
+    from firebase_admin import firestore
+
     if not firebase_admin._apps:
         cred = _find_key()
         firebase_admin.initialize_app(cred)
@@ -56,5 +63,34 @@ def init_firebase():
     return firestore.client()
 
 
-# Module-level Firestore client (lazy singleton)
-db = init_firebase()
+_db = None
+_db_pid = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """The Firestore client for this process, created on first use.
+
+    A client created before a fork (e.g. in the gunicorn master) is dropped
+    in the child and rebuilt, since gRPC channels do not survive fork().
+    """
+    global _db, _db_pid
+    pid = os.getpid()
+    if _db is not None and _db_pid == pid:
+        return _db
+    with _db_lock:
+        if _db is None or _db_pid != pid:
+            if _db is not None:
+                import firebase_admin
+                # The inherited app caches the parent's client; start over
+                firebase_admin.delete_app(firebase_admin.get_app())
+            _db = init_firebase()
+            _db_pid = pid
+    return _db
+
+
+def __getattr__(name):
+    # Backwards compatible `from firebase_config import db`
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
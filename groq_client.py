@@ -0,0 +1,253 @@
+"""
+Rate-limit–aware wrapper around the Groq client.
+Enforces per-model requests-per-minute and tokens-per-minute budgets with
+token buckets shared by every caller in the process, queues callers until
+budget is available and backs off on 429 responses honouring retry-after.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (requests/minute, tokens/minute) per model — Groq free-tier defaults.
+# Override with GROQ_RATE_LIMITS="model=rpm:tpm,other-model=rpm:tpm".
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    "meta-llama/llama-4-scout-17b-16e-instruct": (30, 30000),
+    "llama-3.3-70b-versatile": (30, 12000),
+}
+DEFAULT_RPM = int(os.getenv("GROQ_DEFAULT_RPM", "30"))
+DEFAULT_TPM = int(os.getenv("GROQ_DEFAULT_TPM", "6000"))
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+
+# Rough prompt-size estimates used to charge the TPM bucket up front
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 1500
+
+
+def _parse_limits(raw: str) -> Dict[str, Tuple[int, int]]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        try:
+            model, budget = item.rsplit("=", 1)
+            rpm, tpm = budget.split(":")
+            limits[model.strip()] = (int(rpm), int(tpm))
+        except ValueError:
+            logger.warning(f"Ignoring malformed GROQ_RATE_LIMITS entry: {item}")
+    return limits
+
+
+LIMITS = {**DEFAULT_LIMITS, **_parse_limits(os.getenv("GROQ_RATE_LIMITS", ""))}
+
+
+# ─── Token Bucket ─────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """
+    Continuous-refill token bucket.
+
+    reserve() debits immediately (the balance may go negative) and returns how
+    long the caller must wait, so concurrent callers queue in arrival order.
+    """
+
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        amount = min(float(amount), self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def adjust(self, amount: float):
+        """Credit (positive) or debit (negative) tokens after the fact."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def block_for(self, seconds: float):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ModelLimiter:
+    """RPM + TPM budgets and wait-time metrics for one model."""
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            "rpm": rpm,
+            "tpm": tpm,
+            "requests": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "total_wait_s": 0.0,
+            "max_wait_s": 0.0,
+        }
+
+    def acquire(self, est_tokens: int) -> float:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(est_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        with self.metrics_lock:
+            self.metrics["requests"] += 1
+            if wait > 0:
+                self.metrics["queued"] += 1
+                self.metrics["total_wait_s"] += wait
+                self.metrics["max_wait_s"] = max(self.metrics["max_wait_s"], wait)
+        return wait
+
+    def settle(self, est_tokens: int, used_tokens: Optional[int]):
+        if used_tokens is not None:
+            self.tokens.adjust(est_tokens - used_tokens)
+
+    def backoff(self, seconds: float):
+        self.requests.block_for(seconds)
+        with self.metrics_lock:
+            self.metrics["rate_limited"] += 1
+
+    def snapshot(self) -> dict:
+        with self.metrics_lock:
+            data = dict(self.metrics)
+        data["total_wait_s"] = round(data["total_wait_s"], 3)
+        data["max_wait_s"] = round(data["max_wait_s"], 3)
+        data["avg_wait_s"] = round(data["total_wait_s"] / max(data["requests"], 1), 3)
+        return data
+
+
+_limiters: Dict[str, ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_model_limiter(model: str) -> ModelLimiter:
+    """Process-wide limiter for a model (shared by every client instance)."""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            rpm, tpm = LIMITS.get(model, (DEFAULT_RPM, DEFAULT_TPM))
+            limiter = _limiters[model] = ModelLimiter(model, rpm, tpm)
+        return limiter
+
+
+def get_metrics() -> Dict[str, dict]:
+    """Wait-time and throttling metrics per model."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.model: limiter.snapshot() for limiter in limiters}
+
+
+# ─── Client Wrapper ───────────────────────────────────────────────────────────
+
+def estimate_tokens(messages, max_tokens: int = 0) -> int:
+    """Estimate prompt + completion tokens for a chat request."""
+    chars = 0
+    images = 0
+    for message in messages or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    images += 1
+    return chars // CHARS_PER_TOKEN + images * IMAGE_TOKENS + (max_tokens or 0)
+
+
+def _retry_after(exc) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner.create_chat_completion(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner):
+        self.completions = _Completions(owner)
+
+
+class RateLimitedGroq:
+    """
+    Drop-in replacement for a Groq client's chat.completions.create that
+    waits for per-model budget and retries 429s, timeouts, connection errors
+    and 5xx responses. Other attributes (e.g. audio) pass straight through
+    to the wrapped client.
+    """
+
+    def __init__(self, client, max_retries: int = MAX_RETRIES):
+        self._client = client
+        self.max_retries = max_retries
+        self.chat = _Chat(self)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def create_chat_completion(self, **kwargs):
+        from groq import RateLimitError, APIConnectionError, InternalServerError
+
+        model = kwargs.get("model")
+        limiter = get_model_limiter(model)
+        est = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens", 0))
+
+        for attempt in range(self.max_retries + 1):
+            waited = limiter.acquire(est)
+            if waited > 0:
+                logger.info(f"[groq:{model}] queued {waited:.2f}s for rate-limit budget")
+            try:
+                resp = self._client.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                delay = _retry_after(e) or min(2 ** attempt, 30)
+                limiter.settle(est, 0)
+                limiter.backoff(delay)
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"[groq:{model}] HTTP 429 – retry in {delay:.1f}s (attempt {attempt + 1})")
+                continue
+            except (APIConnectionError, InternalServerError) as e:
+                # Transient (connection drop, timeout, 5xx): the SDK's own
+                # retries are off, so back off here without pausing the model
+                limiter.settle(est, 0)
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(2 ** attempt, 30)
+                logger.warning(f"[groq:{model}] {type(e).__name__} – retry in {delay}s (attempt {attempt + 1})")
+                time.sleep(delay)
+                continue
+            except Exception:
+                # Timeouts, 5xx, connection errors: hand the reserved estimate back
+                limiter.settle(est, 0)
+                raise
+
+            usage = getattr(resp, "usage", None)
+            limiter.settle(est, getattr(usage, "total_tokens", None))
+            return resp
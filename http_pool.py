@@ -0,0 +1,62 @@
+"""
+Shared HTTP connection pools for outbound calls.
+One requests.Session per upstream profile with keep-alive, a bounded
+connection pool per host and urllib3 retries sized for that upstream, so
+repeated calls reuse TCP+TLS connections instead of reconnecting each time.
+"""
+
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '10'))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '8'))
+
+# Retry policy per upstream. RapidAPI status handling (429/5xx back-off,
+# endpoint hedging) stays in downloader, so only connection errors retry here.
+PROFILES = {
+    'rapidapi': dict(total=2, connect=2, read=0, status=0, backoff_factor=0.3),
+    'cdn': dict(total=2, connect=2, read=0, status=0, backoff_factor=0.3),
+    'google': dict(total=3, connect=3, read=1, backoff_factor=0.5,
+                   status_forcelist=(500, 502, 503, 504),
+                   allowed_methods=frozenset({'GET', 'POST'})),
+    'default': dict(total=2, connect=2, read=0, status=0, backoff_factor=0.3),
+}
+
+_sessions = {}
+_sessions_pid = None
+_lock = threading.Lock()
+
+
+def _build_session(profile):
+    retry = Retry(raise_on_status=False, **PROFILES.get(profile, PROFILES['default']))
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,  # cap concurrent connections per host
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(profile='default'):
+    """Process-wide pooled session for an upstream profile (rebuilt after fork)."""
+    global _sessions_pid
+    pid = os.getpid()
+    with _lock:
+        if _sessions_pid != pid:
+            _sessions.clear()
+            _sessions_pid = pid
+        session = _sessions.get(profile)
+        if session is None:
+            session = _sessions[profile] = _build_session(profile)
+        return session
@@ -1,11 +1,26 @@
 """
 Database initialization script.
 Run this to create or reset the database.
+
+    python init_db.py                      # create / reset (SQLite)
+    python init_db.py --reserve-usernames  # one-off: reserve existing usernames
 """
-from models import init_db, DB_PATH
+from models import init_db, reserve_existing_usernames, DB_PATH
+from repositories import STORAGE_BACKEND
 import os
+import sys
 
 if __name__ == '__main__':
+    if '--reserve-usernames' in sys.argv[1:]:
+        reserved = reserve_existing_usernames()
+        print(f"✅ Reserved {reserved} existing username(s) on the {STORAGE_BACKEND} backend.")
+        raise SystemExit(0)
+
+    if STORAGE_BACKEND != 'sqlite':
+        init_db()
+        print(f"✅ Using the {STORAGE_BACKEND} backend, nothing to create locally.")
+        raise SystemExit(0)
+
     if os.path.exists(DB_PATH):
         print(f"⚠️  Database already exists at: {DB_PATH}")
         choice = input("   Reset? (y/N): ").strip().lower()
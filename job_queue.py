@@ -0,0 +1,175 @@
+"""
+Media job queue for AutoTube AI.
+The web tier enqueues upload jobs and reads task progress; media workers
+(`python -m worker`, or threads inside the web process when MEDIA_WORKER is
+inline) claim jobs and report progress here.  Everything lives in the local
+job store, so web and worker processes on one host share it.
+"""
+
+import os
+import json
+import logging
+
+from job_store import register_schema, get_conn, transaction, now, pid_alive
+
+logger = logging.getLogger(__name__)
+
+# inline: the web process also runs jobs; external: only `python -m worker` does
+MEDIA_WORKER = os.getenv('MEDIA_WORKER', 'inline').strip().lower()
+# Finished jobs and their task progress are kept this long for status polls
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', '86400'))
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS media_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    paths TEXT NOT NULL DEFAULT '[]',
+    state TEXT NOT NULL,
+    pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_media_jobs_state ON media_jobs (state, created_at);
+CREATE TABLE IF NOT EXISTS media_tasks (
+    task_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    url TEXT,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    error TEXT,
+    yt_url TEXT,
+    metadata TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_media_tasks_job ON media_tasks (job_id, position);
+''')
+
+_TASK_FIELDS = ('status', 'progress', 'message', 'error', 'yt_url', 'metadata')
+
+
+# ─── Enqueue ──────────────────────────────────────────────────────────────────
+
+def enqueue(job_id, kind, payload, user_id, tasks, paths=()):
+    """
+    Queue a job. `tasks` is [(task_id, url), ...] — the progress rows the job
+    reports into (a bulk batch has one per reel).  `paths` are input files
+    the janitor must keep until the job has finished.
+    """
+    ts = now()
+    with transaction() as conn:
+        conn.execute(
+            'INSERT INTO media_jobs (id, kind, payload, paths, state, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, kind, json.dumps(payload), json.dumps([p for p in paths if p]), 'queued', ts))
+        conn.executemany(
+            'INSERT INTO media_tasks (task_id, job_id, user_id, position, url, status, message, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(task_id, job_id, str(user_id), i, url, 'queued', 'Queued', ts)
+             for i, (task_id, url) in enumerate(tasks)])
+    logger.info(f"📥 Queued {kind} job {job_id[:8]} ({len(tasks)} task(s))")
+
+
+def pending_paths():
+    """Input files of queued and running jobs (kept by the disk janitor)."""
+    paths = set()
+    for row in get_conn().execute(
+            "SELECT paths FROM media_jobs WHERE state IN ('queued', 'running')").fetchall():
+        paths.update(os.path.abspath(p) for p in json.loads(row['paths']))
+    return paths
+
+
+# ─── Worker Side ──────────────────────────────────────────────────────────────
+
+def claim():
+    """Take the oldest queued job for this process. Returns (id, kind, payload) or None."""
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT id, kind, payload FROM media_jobs WHERE state = 'queued' "
+            "ORDER BY created_at LIMIT 1").fetchone()
+        if not row:
+            return None
+        conn.execute("UPDATE media_jobs SET state = 'running', pid = ?, started_at = ? WHERE id = ?",
+                     (os.getpid(), now(), row['id']))
+    return row['id'], row['kind'], json.loads(row['payload'])
+
+
+def finish(job_id, failed=False):
+    get_conn().execute('UPDATE media_jobs SET state = ?, finished_at = ? WHERE id = ?',
+                       ('failed' if failed else 'done', now(), job_id))
+
+
+def recover():
+    """
+    Fail jobs whose worker process died mid-run (not retried: a job may have
+    reached YouTube already) and drop finished jobs older than JOB_RETENTION.
+    """
+    conn = get_conn()
+    dead = [row['id'] for row in conn.execute(
+        "SELECT id, pid FROM media_jobs WHERE state = 'running'").fetchall()
+        if not pid_alive(row['pid'])]
+    for job_id in dead:
+        logger.warning(f"Job {job_id[:8]} lost its worker, marking it failed")
+        with transaction() as tx:
+            tx.execute("UPDATE media_jobs SET state = 'failed', finished_at = ? WHERE id = ?", (now(), job_id))
+            tx.execute("UPDATE media_tasks SET status = 'failed', message = ?, error = ?, updated_at = ? "
+                       "WHERE job_id = ? AND status NOT IN ('done', 'failed')",
+                       ('Worker stopped', 'Worker stopped', now(), job_id))
+
+    cutoff = now() - JOB_RETENTION
+    with transaction() as tx:
+        tx.execute("DELETE FROM media_tasks WHERE job_id IN "
+                   "(SELECT id FROM media_jobs WHERE finished_at < ?)", (cutoff,))
+        tx.execute('DELETE FROM media_jobs WHERE finished_at < ?', (cutoff,))
+    return len(dead)
+
+
+def queue_depth():
+    """Job counts by state, for /health."""
+    rows = get_conn().execute('SELECT state, COUNT(*) AS n FROM media_jobs GROUP BY state').fetchall()
+    return {row['state']: row['n'] for row in rows}
+
+
+# ─── Task Progress ────────────────────────────────────────────────────────────
+
+def set_task(task_id, status, message, progress=None, **kw):
+    fields = {'status': status, 'message': message}
+    if progress is not None:
+        fields['progress'] = progress
+    fields.update((k, v) for k, v in kw.items() if k in _TASK_FIELDS)
+    _update_task(task_id, fields)
+    logger.info(f"[{task_id[:8]}] {status} {progress or ''}% - {message}")
+
+
+def update_task_metadata(task_id, metadata):
+    """Publish partial AI metadata while it streams (no log line per update)."""
+    _update_task(task_id, {'metadata': metadata})
+
+
+def _update_task(task_id, fields):
+    if 'metadata' in fields:
+        fields['metadata'] = json.dumps(fields['metadata']) if fields['metadata'] is not None else None
+    assignments = ', '.join(f'{k} = ?' for k in fields)
+    get_conn().execute(f'UPDATE media_tasks SET {assignments}, updated_at = ? WHERE task_id = ?',
+                       (*fields.values(), now(), task_id))
+
+
+def _task_dict(row):
+    task = dict(row)
+    task['metadata'] = json.loads(task['metadata']) if task['metadata'] else None
+    return task
+
+
+def get_task(task_id):
+    row = get_conn().execute('SELECT * FROM media_tasks WHERE task_id = ?', (task_id,)).fetchone()
+    return _task_dict(row) if row else None
+
+
+def get_job_tasks(job_id):
+    """Tasks of a job in submission order."""
+    rows = get_conn().execute(
+        'SELECT * FROM media_tasks WHERE job_id = ? ORDER BY position', (job_id,)).fetchall()
+    return [_task_dict(row) for row in rows]
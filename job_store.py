@@ -0,0 +1,84 @@
+"""
+Local job store for AutoTube AI.
+A small SQLite database (WAL mode) holding state that every worker process
+on this host must share: endpoint health, caches and job bookkeeping.
+Modules register their own tables with register_schema().
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+JOB_STORE_PATH = os.getenv(
+    'JOB_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'autotube_jobs.db'),
+)
+
+_SCHEMA = []
+_schema_lock = threading.Lock()
+_local = threading.local()
+
+
+def register_schema(sql):
+    """Register CREATE ... IF NOT EXISTS statements, applied on next use."""
+    with _schema_lock:
+        _SCHEMA.append(sql)
+
+
+def get_conn():
+    """Per-thread, per-process connection (SQLite handles must not cross a fork)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        os.makedirs(os.path.dirname(os.path.abspath(JOB_STORE_PATH)), exist_ok=True)
+        conn = sqlite3.connect(JOB_STORE_PATH, timeout=10, isolation_level=None,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=10000')
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.applied = 0
+
+    if _local.applied < len(_SCHEMA):
+        with _schema_lock:
+            pending = _SCHEMA[_local.applied:]
+            for sql in pending:
+                conn.executescript(sql)
+            _local.applied += len(pending)
+    return conn
+
+
+@contextmanager
+def transaction():
+    """BEGIN IMMEDIATE ... COMMIT — serialises writers across processes."""
+    conn = get_conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    else:
+        conn.execute('COMMIT')
+
+
+def now():
+    return time.time()
+
+
+def pid_alive(pid):
+    """True if a process with this pid exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,172 @@
+"""
+Reel cache keyed by canonical Instagram shortcode.
+Maps a shortcode to its resolved CDN URL (short TTL) and to a
+content-addressed copy of the downloaded video kept in a size-capped LRU
+directory.  Jobs get hard links into their own workspace, so a repeated
+reel costs neither a RapidAPI lookup nor a CDN download.
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import logging
+
+from job_store import register_schema, get_conn, transaction, now
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must live on the same filesystem as the downloads folder for hard links
+MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR', os.path.join(BASE_DIR, 'downloads', '.media_cache'))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv('MEDIA_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+# Instagram CDN links are signed and expire; keep resolved URLs briefly
+CDN_URL_TTL = int(os.getenv('CDN_URL_TTL', '900'))
+
+_SHORTCODE_RE = re.compile(r'instagram\.com/(?:[^/?#]+/)?(?:reels?|p|tv)/([A-Za-z0-9_-]+)')
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS resolved_urls (
+    shortcode TEXT PRIMARY KEY,
+    cdn_url TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS media_files (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_media_files_access ON media_files (last_access);
+CREATE TABLE IF NOT EXISTS media_shortcodes (
+    shortcode TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+''')
+
+
+def shortcode_from_url(url):
+    """Extract the reel/post shortcode from an Instagram URL (None if absent)."""
+    match = _SHORTCODE_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def _sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Cross-device or unsupported filesystem — fall back to a copy
+        shutil.copyfile(src, dst)
+
+
+# ─── Resolved CDN URLs ────────────────────────────────────────────────────────
+
+def get_cdn_url(shortcode):
+    row = get_conn().execute(
+        'SELECT cdn_url FROM resolved_urls WHERE shortcode = ? AND expires_at > ?',
+        (shortcode, now()),
+    ).fetchone()
+    return row['cdn_url'] if row else None
+
+
+def put_cdn_url(shortcode, cdn_url, ttl=CDN_URL_TTL):
+    get_conn().execute(
+        '''INSERT INTO resolved_urls (shortcode, cdn_url, expires_at) VALUES (?, ?, ?)
+           ON CONFLICT(shortcode) DO UPDATE SET
+               cdn_url = excluded.cdn_url, expires_at = excluded.expires_at''',
+        (shortcode, cdn_url, now() + ttl),
+    )
+
+
+def forget_cdn_url(shortcode):
+    get_conn().execute('DELETE FROM resolved_urls WHERE shortcode = ?', (shortcode,))
+
+
+# ─── Downloaded Files ─────────────────────────────────────────────────────────
+
+def link_cached_file(shortcode, dest_path):
+    """Hard-link the cached video for `shortcode` to dest_path. Returns True on a hit."""
+    conn = get_conn()
+    row = conn.execute(
+        '''SELECT f.sha256, f.path FROM media_shortcodes s
+           JOIN media_files f ON f.sha256 = s.sha256
+           WHERE s.shortcode = ?''',
+        (shortcode,),
+    ).fetchone()
+    if not row:
+        return False
+    if not os.path.exists(row['path']):
+        _drop(conn, row['sha256'])
+        return False
+
+    _link_or_copy(row['path'], dest_path)
+    conn.execute('UPDATE media_files SET last_access = ? WHERE sha256 = ?', (now(), row['sha256']))
+    return True
+
+
+def store_file(shortcode, src_path):
+    """Add a downloaded video to the cache (content-addressed). Returns its SHA-256."""
+    sha = _sha256(src_path)
+    target_dir = os.path.join(MEDIA_CACHE_DIR, sha[:2])
+    target = os.path.join(target_dir, f'{sha}{os.path.splitext(src_path)[1] or ".mp4"}')
+    os.makedirs(target_dir, exist_ok=True)
+    if not os.path.exists(target):
+        _link_or_copy(src_path, target)
+
+    with transaction() as conn:
+        conn.execute(
+            '''INSERT INTO media_files (sha256, path, size, last_access) VALUES (?, ?, ?, ?)
+               ON CONFLICT(sha256) DO UPDATE SET last_access = excluded.last_access''',
+            (sha, target, os.path.getsize(target), now()),
+        )
+        if shortcode:
+            conn.execute(
+                '''INSERT INTO media_shortcodes (shortcode, sha256) VALUES (?, ?)
+                   ON CONFLICT(shortcode) DO UPDATE SET sha256 = excluded.sha256''',
+                (shortcode, sha),
+            )
+    evict()
+    return sha
+
+
+def _drop(conn, sha):
+    row = conn.execute('SELECT path FROM media_files WHERE sha256 = ?', (sha,)).fetchone()
+    conn.execute('DELETE FROM media_files WHERE sha256 = ?', (sha,))
+    conn.execute('DELETE FROM media_shortcodes WHERE sha256 = ?', (sha,))
+    if row and os.path.exists(row['path']):
+        try:
+            os.remove(row['path'])
+        except OSError as e:
+            logger.warning(f"Could not remove cached media {row['path']}: {e}")
+
+
+def cache_size():
+    row = get_conn().execute('SELECT COALESCE(SUM(size), 0) AS total FROM media_files').fetchone()
+    return row['total']
+
+
+def evict(max_bytes=None):
+    """Drop least-recently-used files until the cache fits in max_bytes. Returns bytes freed."""
+    limit = MEDIA_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    freed = 0
+    with transaction() as conn:
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) AS total FROM media_files').fetchone()['total']
+        if total <= limit:
+            return 0
+        for row in conn.execute('SELECT sha256, size FROM media_files ORDER BY last_access').fetchall():
+            if total - freed <= limit:
+                break
+            _drop(conn, row['sha256'])
+            freed += row['size']
+    if freed:
+        logger.info(f"🧹 Media cache evicted {freed / 1024 / 1024:.1f} MB")
+    return freed
@@ -1,111 +1,64 @@
 """
 Database models and operations for AutoTube AI platform.
-Uses Firebase Cloud Firestore as the backend.
+Backed by the storage repository selected with STORAGE_BACKEND
+(Cloud Firestore by default, or the embedded SQLite engine).
 """
 
-import os
 import logging
 from datetime import datetime, timedelta
-from firebase_config import db
-from google.cloud.firestore_v1 import FieldFilter
 
-logger = logging.getLogger(__name__)
+from repositories import get_repository, SQLITE_PATH, UsernameTaken  # noqa: F401
 
-# ─── Collection References ───────────────────────────────────────────────────
+logger = logging.getLogger(__name__)
 
-USERS_COL = 'users'
-TRANSACTIONS_COL = 'transactions'
-USAGE_LOG_COL = 'usage_log'
+# Database file used by the SQLite backend (see init_db.py)
+DB_PATH = SQLITE_PATH
 
 
 def init_db():
-    """No-op for Firestore — collections are created automatically."""
-    logger.info("Firestore is schemaless — no initialization required.")
+    """Create tables/indexes for backends that need them (no-op for Firestore)."""
+    get_repository().init()
 
 
-# ─── Helper ──────────────────────────────────────────────────────────────────
+# ─── User Operations ────────────────────────────────────────────────────────
 
-def _user_doc_to_dict(doc):
-    """Convert a Firestore document snapshot to a user dict."""
-    if not doc.exists:
-        return None
-    data = doc.to_dict()
-    data['id'] = doc.id  # Firestore document ID as the user ID
-    return data
+def create_user(email, username, password_hash, **fields):
+    """Create a new user. Returns the user ID (string). Raises UsernameTaken."""
+    return get_repository().create_user(email, username, password_hash, **fields)
 
 
-def _default_user_fields():
-    """Default field values for a new user document."""
-    return {
-        'plan': 'free',
-        'tokens_balance': 40,
-        'total_tokens_used': 0,
-        'total_uploads': 0,
-        'success_uploads': 0,
-        'avatar_url': '',
-        'last_refill': datetime.utcnow().isoformat(),
-        'razorpay_customer_id': '',
-        'youtube_credentials': '',
-        'created_at': datetime.utcnow().isoformat(),
-    }
+def create_user_with_free_username(email, base_username, password_hash, **fields):
+    """Create a user as base_username or base_username_N. Returns (user_id, username)."""
+    return get_repository().create_user_with_free_username(email, base_username, password_hash, **fields)
 
 
-# ─── User Operations ────────────────────────────────────────────────────────
-
-def create_user(email, username, password_hash):
-    """Create a new user. Returns the Firestore document ID (string)."""
-    user_data = _default_user_fields()
-    user_data.update({
-        'email': email.lower().strip(),
-        'username': username.strip(),
-        'password_hash': password_hash,
-    })
-    doc_ref = db.collection(USERS_COL).add(user_data)
-    # .add() returns a tuple: (update_time, doc_ref)
-    user_id = doc_ref[1].id
-    logger.info(f"Created Firestore user: {user_id}")
-    return user_id
+def reserve_existing_usernames():
+    """One-off backfill of username reservations for existing users. Returns the count."""
+    return get_repository().reserve_existing_usernames()
 
 
 def get_user_by_email(email):
     """Fetch user by email."""
-    docs = (
-        db.collection(USERS_COL)
-        .where(filter=FieldFilter('email', '==', email.lower().strip()))
-        .limit(1)
-        .stream()
-    )
-    for doc in docs:
-        return _user_doc_to_dict(doc)
-    return None
+    return get_repository().get_user_by_email(email)
 
 
 def get_user_by_id(user_id):
-    """Fetch user by Firestore document ID."""
+    """Fetch user by ID."""
     if not user_id:
         return None
-    doc = db.collection(USERS_COL).document(str(user_id)).get()
-    return _user_doc_to_dict(doc)
+    return get_repository().get_user_by_id(user_id)
 
 
 def get_user_by_username(username):
     """Fetch user by username."""
-    docs = (
-        db.collection(USERS_COL)
-        .where(filter=FieldFilter('username', '==', username.strip()))
-        .limit(1)
-        .stream()
-    )
-    for doc in docs:
-        return _user_doc_to_dict(doc)
-    return None
+    return get_repository().get_user_by_username(username)
 
 
 def update_user(user_id, **fields):
     """Update arbitrary user fields."""
     if not fields:
         return
-    db.collection(USERS_COL).document(str(user_id)).update(fields)
+    get_repository().update_user(user_id, **fields)
 
 
 def get_youtube_credentials(user_id):
@@ -118,63 +71,48 @@ def get_youtube_credentials(user_id):
 
 def update_youtube_credentials(user_id, credentials_json):
     """Update YouTube credentials JSON string for a user."""
-    db.collection(USERS_COL).document(str(user_id)).update({
-        'youtube_credentials': credentials_json or ''
-    })
+    get_repository().update_user(user_id, youtube_credentials=credentials_json or '')
 
 
 # ─── Token Operations ────────────────────────────────────────────────────────
 
 def deduct_tokens(user_id, amount, action, task_id='', details=''):
     """Deduct tokens and log usage. Returns False if insufficient balance."""
-    user_ref = db.collection(USERS_COL).document(str(user_id))
-    user_doc = user_ref.get()
-    if not user_doc.exists:
-        return False
-
-    user_data = user_doc.to_dict()
-    if user_data.get('tokens_balance', 0) < amount:
-        return False
-
-    # Update user tokens
-    user_ref.update({
-        'tokens_balance': user_data['tokens_balance'] - amount,
-        'total_tokens_used': user_data.get('total_tokens_used', 0) + amount,
-    })
-
-    # Log usage
-    db.collection(USAGE_LOG_COL).add({
-        'user_id': str(user_id),
-        'action': action,
-        'tokens_used': amount,
-        'task_id': task_id,
-        'details': details,
-        'created_at': datetime.utcnow().isoformat(),
-    })
-    return True
+    return get_repository().deduct_tokens(user_id, amount, action, task_id, details)
+
+
+def deduct_tokens_batch(user_id, charges):
+    """
+    Deduct several charges in one transaction (all or nothing).
+    `charges` is a list of dicts with action, amount and optional task_id/details.
+    Returns False if the balance cannot cover the whole batch.
+    """
+    return get_repository().deduct_tokens_batch(user_id, charges)
 
 
 def add_tokens(user_id, amount):
     """Add tokens to user balance."""
-    user_ref = db.collection(USERS_COL).document(str(user_id))
-    user_doc = user_ref.get()
-    if user_doc.exists:
-        current = user_doc.to_dict().get('tokens_balance', 0)
-        user_ref.update({'tokens_balance': current + amount})
+    get_repository().add_tokens(user_id, amount)
 
 
 def increment_uploads(user_id, success=True):
     """Increment upload counters."""
-    user_ref = db.collection(USERS_COL).document(str(user_id))
-    user_doc = user_ref.get()
-    if not user_doc.exists:
-        return
+    get_repository().increment_uploads(user_id, success)
+
+
+def refill_tokens(grants, due_before, refilled_at):
+    """Bulk daily refill, grants = {plan: (amount, max_tokens)}. Returns users refilled."""
+    return get_repository().refill_tokens(grants, due_before, refilled_at)
+
 
-    data = user_doc.to_dict()
-    updates = {'total_uploads': data.get('total_uploads', 0) + 1}
-    if success:
-        updates['success_uploads'] = data.get('success_uploads', 0) + 1
-    user_ref.update(updates)
+def find_users_due(field, as_of, limit):
+    """Users whose billing timestamp `field` is due at `as_of` (oldest first)."""
+    return get_repository().find_users_due(field, as_of, limit)
+
+
+def bulk_update_users(updates):
+    """Apply [(user, fields, token_grant), ...] to users unchanged since read. Returns the count."""
+    return get_repository().bulk_update_users(updates)
 
 
 # ─── Transaction Operations ──────────────────────────────────────────────────
@@ -182,51 +120,20 @@ def increment_uploads(user_id, success=True):
 def create_transaction(user_id, amount_paise, tokens_purchased,
                        plan_purchased='', razorpay_payment_id=''):
     """Record a payment transaction."""
-    db.collection(TRANSACTIONS_COL).add({
-        'user_id': str(user_id),
-        'amount_paise': amount_paise,
-        'tokens_purchased': tokens_purchased,
-        'plan_purchased': plan_purchased,
-        'razorpay_payment_id': razorpay_payment_id,
-        'status': 'completed',
-        'created_at': datetime.utcnow().isoformat(),
-    })
+    get_repository().create_transaction(user_id, amount_paise, tokens_purchased,
+                                        plan_purchased, razorpay_payment_id)
 
 
 def get_transactions(user_id, limit=20):
     """Get recent transactions for a user."""
-    docs = (
-        db.collection(TRANSACTIONS_COL)
-        .where(filter=FieldFilter('user_id', '==', str(user_id)))
-        .stream()
-    )
-    results = []
-    for doc in docs:
-        d = doc.to_dict()
-        d['id'] = doc.id
-        results.append(d)
-    
-    results.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    return results[:limit]
+    return get_repository().get_transactions(user_id, limit)
 
 
 # ─── Usage / Stats ────────────────────────────────────────────────────────────
 
 def get_usage_log(user_id, limit=50):
     """Get recent usage log entries."""
-    docs = (
-        db.collection(USAGE_LOG_COL)
-        .where(filter=FieldFilter('user_id', '==', str(user_id)))
-        .stream()
-    )
-    results = []
-    for doc in docs:
-        d = doc.to_dict()
-        d['id'] = doc.id
-        results.append(d)
-        
-    results.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    return results[:limit]
+    return get_repository().get_usage_log(user_id, limit)
 
 
 def get_user_stats(user_id):
@@ -238,31 +145,22 @@ def get_user_stats(user_id):
     today = datetime.utcnow().strftime('%Y-%m-%d')
     week_ago = (datetime.utcnow() - timedelta(days=7)).strftime('%Y-%m-%d')
 
-    # Fetch all logs for this user to avoid composite index requirements
-    all_logs_stream = (
-        db.collection(USAGE_LOG_COL)
-        .where(filter=FieldFilter('user_id', '==', str(user_id)))
-        .stream()
-    )
-
     today_uploads = 0
     tokens_today = 0
     daily_map = {}
 
-    for doc in all_logs_stream:
-        d = doc.to_dict()
+    for d in get_repository().get_usage_log(user_id, limit=None, since=week_ago):
         created_at = d.get('created_at', '')
-        
+
         # Today stats
         if created_at >= today:
             if d.get('action') == 'upload':
                 today_uploads += 1
             tokens_today += d.get('tokens_used', 0)
-            
+
         # Week stats
-        if created_at >= week_ago:
-            day = created_at[:10]
-            daily_map[day] = daily_map.get(day, 0) + d.get('tokens_used', 0)
+        day = created_at[:10]
+        daily_map[day] = daily_map.get(day, 0) + d.get('tokens_used', 0)
 
     daily_usage = [{'day': k, 'tokens': v} for k, v in sorted(daily_map.items())]
 
@@ -284,17 +182,4 @@ def get_user_stats(user_id):
 
 def get_recent_uploads(user_id, limit=10):
     """Get recent upload entries from usage log."""
-    docs = (
-        db.collection(USAGE_LOG_COL)
-        .where(filter=FieldFilter('user_id', '==', str(user_id)))
-        .stream()
-    )
-    results = []
-    for doc in docs:
-        d = doc.to_dict()
-        if d.get('action') == 'upload':
-            d['id'] = doc.id
-            results.append(d)
-            
-    results.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    return results[:limit]
+    return get_repository().get_usage_log(user_id, limit, action='upload')
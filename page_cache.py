@@ -0,0 +1,119 @@
+"""
+Rendered-page cache for the public pages of AutoTube AI.
+Anonymous GET/HEAD requests to views decorated with @public_page are rendered
+once per PAGE_CACHE_TTL and then served from memory with ETag/Last-Modified
+validators and Cache-Control headers a CDN can use.  Requests that carry a
+session or remember-me cookie are rendered normally and marked private.
+Entries are keyed on the URL path alone (query string and Host are ignored,
+so they cannot be used to fill the cache), and at most PAGE_CACHE_MAX_ENTRIES
+are kept, least recently used first out.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from datetime import datetime, timezone
+
+from flask import current_app, request, make_response, Response
+
+# Seconds a rendered page is reused in-process (0 disables the cache)
+PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', '300'))
+# max-age sent to browsers and CDNs for anonymous public pages
+PUBLIC_MAX_AGE = int(os.getenv('PUBLIC_MAX_AGE', '300'))
+# Rendered pages kept per process
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', '64'))
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ('body', 'content_type', 'etag', 'last_modified', 'expires')
+
+    def __init__(self, body, content_type, ttl):
+        self.body = body
+        self.content_type = content_type
+        # Content hash, so every worker process hands out the same ETag
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.expires = time.monotonic() + ttl
+
+
+def is_anonymous():
+    """True if the request carries no session or remember-me cookie."""
+    cookies = request.cookies
+    return (current_app.config.get('SESSION_COOKIE_NAME', 'session') not in cookies
+            and current_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token') not in cookies)
+
+
+def is_public_request():
+    """An anonymous GET/HEAD of a @public_page view (no session needed)."""
+    view = current_app.view_functions.get(request.endpoint)
+    return (getattr(view, 'public_page', False)
+            and request.method in ('GET', 'HEAD')
+            and is_anonymous())
+
+
+def _store(key, entry):
+    with _lock:
+        now = time.monotonic()
+        for stale in [k for k, e in _cache.items() if e.expires <= now]:
+            del _cache[stale]
+        _cache[key] = entry
+        _cache.move_to_end(key)
+        while len(_cache) > PAGE_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _render(view, args, kwargs):
+    # Public pages render the same for any query string or Host header
+    key = request.path
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+    if entry is not None and entry.expires > time.monotonic():
+        return entry
+
+    resp = make_response(view(*args, **kwargs))
+    if resp.status_code != 200 or resp.direct_passthrough:
+        return resp
+    entry = _Entry(resp.get_data(), resp.content_type, PAGE_CACHE_TTL)
+    if PAGE_CACHE_TTL > 0:
+        _store(key, entry)
+    return entry
+
+
+def public_page(view):
+    """Cache the anonymous rendering of a public page and make it CDN-cacheable."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_public_request():
+            resp = make_response(view(*args, **kwargs))
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+            resp.vary.add('Cookie')
+            return resp
+
+        entry = _render(view, args, kwargs)
+        if isinstance(entry, Response):
+            return entry
+        resp = Response(entry.body, content_type=entry.content_type)
+        resp.set_etag(entry.etag)
+        resp.last_modified = entry.last_modified
+        resp.cache_control.public = True
+        resp.cache_control.max_age = PUBLIC_MAX_AGE
+        resp.vary.add('Cookie')
+        return resp.make_conditional(request)
+
+    wrapper.public_page = True
+    return wrapper
+
+
+def clear():
+    """Drop every cached page (e.g. after changing plans or templates)."""
+    with _lock:
+        _cache.clear()
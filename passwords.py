@@ -0,0 +1,141 @@
+"""
+Password hashing for AutoTube AI.
+bcrypt runs in a small process pool (HASH_WORKERS processes) instead of the
+request threads, so a burst of logins queues for hashing slots rather than
+starving every other request of CPU.  At most HASH_MAX_PENDING hashes wait
+for a slot; beyond that callers get HashingBusy straight away.  Hashes made
+with a cost other than BCRYPT_ROUNDS are flagged by needs_rehash() and
+re-hashed on the next successful login.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+# bcrypt work factor for new hashes (each +1 doubles the cost)
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+# Hashing processes per web process (0 = hash in the request thread)
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', '1'))
+# Hashes allowed to wait for a slot before new ones are refused
+HASH_MAX_PENDING = int(os.getenv('HASH_MAX_PENDING', '32'))
+# Seconds a caller waits for a hash, queueing included
+HASH_TIMEOUT = float(os.getenv('HASH_TIMEOUT', '10'))
+# Window for the login rate reported by login_stats()
+LOGIN_STATS_WINDOW = 60
+
+_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class HashingBusy(Exception):
+    """Too many hashes are already queued; the caller should retry later."""
+
+
+# ─── Worker Functions (run in the pool) ───────────────────────────────────────
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+# ─── Pool ─────────────────────────────────────────────────────────────────────
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(HASH_WORKERS, 1) + HASH_MAX_PENDING)
+
+
+def _get_pool():
+    """Per-process pool (a pool inherited across a --preload fork is unusable)."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid() or _pool._broken:
+        with _pool_lock:
+            # _broken: a hashing process died; the executor refuses all new work
+            if _pool is None or _pool_pid != os.getpid() or _pool._broken:
+                # spawn: forking a threaded web worker can deadlock the child
+                _pool = ProcessPoolExecutor(HASH_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+                _pool_pid = os.getpid()
+                logger.info(f"🔐 Password hashing pool started ({HASH_WORKERS} process(es))")
+    return _pool
+
+
+def _run(fn, *args):
+    if HASH_WORKERS <= 0:
+        return fn(*args)
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # The slot is held until the pool is done with the job, not until this
+    # caller stops waiting, so timed-out jobs still count against the bound
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FuturesTimeout:
+        future.cancel()  # drops it if still queued; a running hash finishes
+        raise HashingBusy()
+
+
+# ─── Public API ───────────────────────────────────────────────────────────────
+
+def hash_password(password, rounds=None):
+    hashed = _run(_hashpw, password.encode('utf-8'), rounds or BCRYPT_ROUNDS)
+    return hashed.decode('utf-8')
+
+
+def check_password(password, hashed):
+    if not hashed:
+        return False
+    return _run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_cost(hashed):
+    """The work factor stored in a bcrypt hash, or None if it is not one."""
+    match = _COST_RE.match(hashed or '')
+    return int(match[1]) if match else None
+
+
+def needs_rehash(hashed):
+    return hash_cost(hashed) != BCRYPT_ROUNDS
+
+
+# ─── Login Accounting ─────────────────────────────────────────────────────────
+
+_logins = deque()  # (monotonic time, outcome)
+_logins_lock = threading.Lock()
+
+
+def record_login(outcome):
+    """Count a login attempt: 'success', 'failure' or 'busy'."""
+    ts = time.monotonic()
+    with _logins_lock:
+        _logins.append((ts, outcome))
+        while _logins and _logins[0][0] < ts - LOGIN_STATS_WINDOW:
+            _logins.popleft()
+
+
+def login_stats():
+    """Login attempts by outcome over the last LOGIN_STATS_WINDOW seconds (this process)."""
+    cutoff = time.monotonic() - LOGIN_STATS_WINDOW
+    counts = {'success': 0, 'failure': 0, 'busy': 0}
+    with _logins_lock:
+        for ts, outcome in _logins:
+            if ts >= cutoff:
+                counts[outcome] = counts.get(outcome, 0) + 1
+    return {'window_seconds': LOGIN_STATS_WINDOW, **counts,
+            'bcrypt_rounds': BCRYPT_ROUNDS, 'hash_workers': HASH_WORKERS}
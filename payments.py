@@ -13,7 +13,7 @@ from models import (
     get_user_by_id, update_user, add_tokens,
     create_transaction, get_transactions
 )
-from token_system import PLANS, TOKEN_PACKS
+from token_system import PLANS, TOKEN_PACKS, plan_purchase_fields
 
 logger = logging.getLogger(__name__)
 
@@ -65,9 +65,7 @@ def create_checkout():
         if item_type == 'plan' and item_id in PLANS:
             plan = PLANS[item_id]
             tokens = plan['tokens_monthly']
-            # For yearly plans, store as 'pro' plan but add extra info
-            plan_key = 'pro' if item_id in ('pro', 'pro_yearly') else item_id
-            update_user(current_user.id, plan=plan_key)
+            update_user(current_user.id, **plan_purchase_fields(item_id, get_user_by_id(current_user.id)))
             add_tokens(current_user.id, tokens)
             create_transaction(
                 current_user.id, plan['price_paise'], tokens,
@@ -190,8 +188,7 @@ def razorpay_verify():
         if item_type == 'plan' and item_id in PLANS:
             plan = PLANS[item_id]
             tokens = plan['tokens_monthly']
-            plan_key = 'pro' if item_id in ('pro', 'pro_yearly') else item_id
-            update_user(current_user.id, plan=plan_key)
+            update_user(current_user.id, **plan_purchase_fields(item_id, get_user_by_id(current_user.id)))
             add_tokens(current_user.id, tokens)
             create_transaction(
                 current_user.id, plan['price_paise'], tokens,
@@ -236,4 +233,5 @@ def get_billing():
         'transactions': transactions,
         'plan': user['plan'] if user else 'free',
         'tokens_balance': user['tokens_balance'] if user else 0,
+        'plan_expires_at': user.get('plan_expires_at', '') if user else '',
     })
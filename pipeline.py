@@ -0,0 +1,291 @@
+"""
+Media pipeline for AutoTube AI.
+Download → edit → AI metadata → YouTube for one queued job.  Runs in the
+media worker (see worker.py), never in a request handler; progress goes to
+the job queue, where the web tier reads it.
+"""
+
+import os
+import logging
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from downloader import download_reel_with_audio
+from uploader import upload_to_youtube, update_video_metadata, can_update_metadata
+from models import increment_uploads
+from bulk_import import run_pipeline
+from job_queue import set_task, update_task_metadata
+import device_upload
+import disk_janitor
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DOWNLOAD_DIR = os.path.join(BASE_DIR, 'downloads')
+
+GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+
+
+# ─── Upload Pipeline ─────────────────────────────────────────────────────────
+
+def _edited_path(video_path: str) -> str:
+    base, _ = os.path.splitext(video_path)
+    return f'{base}_edited.mp4'
+
+
+def _remove_files(*paths):
+    for p in filter(None, paths):
+        try:
+            if os.path.exists(p):
+                os.remove(p)
+        except Exception:
+            pass
+
+
+def prepare_video(task_id: str, video_path: str, editing: Optional[dict],
+                  content_hash: Optional[str] = None):
+    """
+    Edit (if requested) and generate AI metadata. Returns (final_path, metadata).
+    content_hash is the SHA-256 of video_path when already known.
+    """
+    final_path = video_path
+    if editing and editing.get('enabled'):
+        set_task(task_id, 'editing', 'Editing video...', 20)
+        try:
+            from video_editor import VideoEditor  # deferred: pulls in ffmpeg, yt-dlp, Pillow
+            editor = VideoEditor()
+            edited_path = _edited_path(video_path)
+            editor.edit_video(
+                video_path=video_path,
+                output_path=edited_path,
+                music_url=editing.get('music_url') or editing.get('music_file'),
+                music_volume=editing.get('music_volume', 0.3),
+                text_overlays=editing.get('text_overlays'),
+            )
+            final_path = edited_path
+        except Exception as e:
+            logger.error(f'Editing failed ({e})')
+            raise RuntimeError(f'Video editing failed: {str(e)}') from e
+
+    set_task(task_id, 'analyzing', 'AI analyzing video and generating metadata...', 55)
+    meta = generate_metadata(task_id, final_path, content_hash if final_path == video_path else None)
+    return final_path, meta
+
+
+def generate_metadata(task_id: str, video_path: str, content_hash: Optional[str] = None) -> dict:
+    """AI title/description/tags for a video, streamed into the task (fallback on error)."""
+    try:
+        from ai_genrator import get_generator  # deferred: pulls in groq, OpenCV, NumPy
+        gen = get_generator(GROQ_API_KEY)
+        return gen.generate_complete_metadata(
+            video_path=video_path,
+            content_hash=content_hash,
+            on_update=lambda partial: update_task_metadata(task_id, partial),
+        )
+    except Exception as e:
+        logger.warning(f'AI failed ({e}), using fallback.')
+        return {
+            'title': 'Amazing Video Content',
+            'description': 'Check out this amazing content! #Video #Content',
+            'tags': ['video', 'content', 'entertainment'],
+            'keywords': ['video'],
+            'hashtags': ['#Video', '#Content'],
+        }
+
+
+def publish_video(task_id: str, final_path: str, meta: dict, user_id):
+    """Upload the prepared video to YouTube and mark the task done."""
+    set_task(task_id, 'uploading', 'Uploading to YouTube...', 80, metadata=meta)
+    video_id = upload_to_youtube(
+        video_path=final_path,
+        title=meta['title'],
+        description=meta['description'],
+        tags=meta.get('tags', []),
+        privacy_status='public',
+        user_id=user_id,
+    )
+    yt_url = f'https://www.youtube.com/watch?v={video_id}'
+    set_task(task_id, 'done', 'Upload complete!', 100, yt_url=yt_url, metadata=meta)
+
+    # Track success
+    if user_id:
+        increment_uploads(user_id, success=True)
+
+
+def publish_video_fast(task_id: str, video_path: str, user_id, content_hash: Optional[str] = None):
+    """
+    Zero-edit fast path: upload the file as private while the AI analyses the
+    same file, then set title/description/tags and make it public, so the job
+    takes about max(upload, analysis) instead of analysis + upload.
+    """
+    set_task(task_id, 'uploading', 'Uploading to YouTube while AI analyzes the video...', 20)
+
+    def on_chunk(fraction):
+        set_task(task_id, 'uploading', f'Uploading to YouTube... {int(fraction * 100)}%',
+                 20 + int(65 * fraction))
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai') as pool:
+        meta_future = pool.submit(generate_metadata, task_id, video_path, content_hash)
+        video_id = upload_to_youtube(
+            video_path=video_path,
+            title='Processing...',
+            description='',
+            tags=[],
+            privacy_status='private',
+            user_id=user_id,
+            progress=on_chunk,
+        )
+        meta = meta_future.result()
+
+    set_task(task_id, 'uploading', 'Applying AI metadata...', 90, metadata=meta)
+    try:
+        update_video_metadata(
+            video_id,
+            title=meta['title'],
+            description=meta['description'],
+            tags=meta.get('tags', []),
+            privacy_status='public',
+            user_id=user_id,
+        )
+    except Exception as e:
+        raise RuntimeError(f'Video {video_id} was uploaded as private but its metadata could not be set: {e}') from e
+    yt_url = f'https://www.youtube.com/watch?v={video_id}'
+    set_task(task_id, 'done', 'Upload complete!', 100, yt_url=yt_url, metadata=meta)
+
+    # Track success
+    if user_id:
+        increment_uploads(user_id, success=True)
+
+
+def run_upload(task_id: str, video_path: str, is_temp: bool,
+               editing: Optional[dict], user_id: int, content_hash: Optional[str] = None):
+    edited = editing and editing.get('enabled')
+    held = (video_path, _edited_path(video_path) if edited else None,
+            editing.get('music_file') if editing else None)
+    disk_janitor.acquire(*held)
+    try:
+        if not edited and can_update_metadata(user_id):
+            publish_video_fast(task_id, video_path, user_id, content_hash)
+            return
+        final_path, meta = prepare_video(task_id, video_path, editing, content_hash)
+        publish_video(task_id, final_path, meta, user_id)
+    except Exception as e:
+        logger.error(f'Task failed: {e}')
+        set_task(task_id, 'failed', str(e), error=str(e))
+        if user_id:
+            increment_uploads(user_id, success=False)
+    finally:
+        _remove_files(
+            _edited_path(video_path) if edited else None,
+            editing.get('music_file') if editing else None,
+            video_path if is_temp else None,
+        )
+        if is_temp:
+            device_upload.remove_workspace(os.path.dirname(video_path))
+        disk_janitor.release(*held)
+
+
+def run_bulk_upload(batch_id: str, items: list, editing: Optional[dict], user_id):
+    """
+    Pipelined bulk import: while item N is edited/analysed, item N+1 downloads
+    and item N-1 uploads. Each item keeps its own task for progress.
+    """
+    edited = editing and editing.get('enabled')
+
+    def download(item, _):
+        task_id = item['task_id']
+        set_task(task_id, 'downloading', 'Downloading from Instagram...', 10)
+
+        def on_bytes(done, total):
+            if total:
+                set_task(task_id, 'downloading',
+                         f'Downloading from Instagram... {done / 1048576:.1f}/{total / 1048576:.1f} MB',
+                         10 + int(9 * done / total))
+
+        vpath = download_reel_with_audio(item['url'], DOWNLOAD_DIR, progress=on_bytes)
+        if not vpath or not os.path.exists(vpath):
+            raise RuntimeError('Download failed')
+        item['video_path'] = vpath
+        disk_janitor.acquire(vpath, _edited_path(vpath) if edited else None)
+        set_task(task_id, 'queued', 'Downloaded, waiting for editor...', 19)
+        return vpath
+
+    def prepare(item, vpath):
+        prepared = prepare_video(item['task_id'], vpath, editing)
+        set_task(item['task_id'], 'queued', 'Ready, waiting for upload slot...', 75)
+        return prepared
+
+    def publish(item, prepared):
+        try:
+            publish_video(item['task_id'], *prepared, user_id)
+        finally:
+            cleanup(item)
+
+    def cleanup(item):
+        vpath = item.get('video_path')
+        paths = (vpath, _edited_path(vpath) if vpath and edited else None)
+        _remove_files(*paths)
+        disk_janitor.release(*paths)
+
+    def on_error(item, exc):
+        set_task(item['task_id'], 'failed', str(exc), error=str(exc))
+        if user_id:
+            increment_uploads(user_id, success=False)
+        cleanup(item)
+
+    music_file = editing.get('music_file') if editing else None
+    disk_janitor.acquire(music_file)
+    try:
+        run_pipeline(items, [download, prepare, publish], on_error=on_error)
+    finally:
+        # The music file is shared by every item, so it goes only at the end
+        _remove_files(music_file)
+        disk_janitor.release(music_file)
+        logger.info(f"Bulk batch {batch_id[:8]} finished ({len(items)} items)")
+
+
+def run_instagram(task_id: str, url: str, editing: Optional[dict], user_id):
+    """Download a reel, then run it through run_upload."""
+    vpath = None
+    try:
+        set_task(task_id, 'downloading', 'Downloading from Instagram...', 10)
+
+        def on_bytes(done, total):
+            if total:
+                set_task(task_id, 'downloading',
+                         f'Downloading from Instagram... {done / 1048576:.1f}/{total / 1048576:.1f} MB',
+                         10 + int(9 * done / total))
+
+        vpath = download_reel_with_audio(url, DOWNLOAD_DIR, progress=on_bytes)
+        if not vpath or not os.path.exists(vpath):
+            raise RuntimeError('Download failed')
+        run_upload(task_id, vpath, True, editing, user_id)
+    except Exception as e:
+        set_task(task_id, 'failed', str(e), error=str(e))
+        # Clean up downloaded file if run_upload never got to handle it
+        if vpath and os.path.exists(vpath):
+            try:
+                os.remove(vpath)
+                logger.info(f"Cleaned up leftover download: {vpath}")
+            except Exception:
+                pass
+
+
+# ─── Job Dispatch ─────────────────────────────────────────────────────────────
+
+def run_job(job_id: str, kind: str, payload: dict):
+    """Run one claimed job from the queue."""
+    editing = payload.get('editing')
+    user_id = payload['user_id']
+    if kind == 'instagram':
+        run_instagram(payload['task_id'], payload['url'], editing, user_id)
+    elif kind == 'device':
+        run_upload(payload['task_id'], payload['path'], True, editing, user_id, payload.get('sha256'))
+    elif kind == 'bulk':
+        run_bulk_upload(job_id, payload['items'], editing, user_id)
+    else:
+        raise ValueError(f"Unknown job kind: {kind!r}")
@@ -0,0 +1,231 @@
+"""
+Parallel ranged HTTP downloads with resume.
+Probes the server for byte-range support and size, fetches N ranges
+concurrently into a preallocated file, persists per-range progress next to
+the file so a retry resumes where it stopped, and verifies the final size.
+Servers without range support get a plain single-stream download, checked
+against Content-Length when the server sends one.
+Resume state is keyed on the output path.  downloader.py writes each call
+to a fresh file and discards it on failure, so reel downloads resume across
+the retries inside one call only, not across separate calls.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+RANGE_WORKERS = int(os.getenv('DOWNLOAD_RANGE_WORKERS', '4'))
+MIN_RANGE_SIZE = int(os.getenv('DOWNLOAD_MIN_RANGE_SIZE', str(2 * 1024 * 1024)))
+MAX_ATTEMPTS = int(os.getenv('DOWNLOAD_MAX_ATTEMPTS', '3'))
+CHUNK_SIZE = 256 * 1024
+PROGRESS_INTERVAL = 0.5
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class DownloadError(IOError):
+    """Raised when a download cannot be completed (state is kept for resume)."""
+
+
+class _Progress:
+    """Thread-safe byte counter that reports at most every PROGRESS_INTERVAL."""
+
+    def __init__(self, total: int, done: int, callback: Optional[ProgressCallback]):
+        self.total = total
+        self.done = done
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.last = 0.0
+
+    def add(self, n: int, force: bool = False):
+        with self.lock:
+            self.done += n
+            now = time.monotonic()
+            if not self.callback or (not force and now - self.last < PROGRESS_INTERVAL):
+                return
+            self.last = now
+            done, total = self.done, self.total
+        self.callback(done, total)
+
+
+def _probe(url: str, http, timeout: float):
+    """Return (total_size, supports_ranges) using a one-byte range request."""
+    resp = http.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=timeout)
+    try:
+        resp.raise_for_status()
+        content_range = resp.headers.get('Content-Range', '')
+        if resp.status_code == 206 and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            if total.isdigit():
+                return int(total), True
+        length = resp.headers.get('Content-Length')
+        return (int(length) if length and length.isdigit() else None), False
+    finally:
+        resp.close()
+
+
+def _single_stream(url: str, output_file: str, http, timeout: float,
+                   progress: Optional[ProgressCallback]) -> int:
+    resp = http.get(url, stream=True, timeout=timeout)
+    try:
+        resp.raise_for_status()
+        length = resp.headers.get('Content-Length')
+        expected = int(length) if length and length.isdigit() else 0
+        # Content-Length counts encoded bytes; iter_content yields decoded ones
+        if resp.headers.get('Content-Encoding', 'identity') != 'identity':
+            expected = 0
+        counter = _Progress(expected, 0, progress)
+        with open(output_file, 'wb') as f:
+            for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                if chunk:
+                    f.write(chunk)
+                    counter.add(len(chunk))
+    finally:
+        resp.close()
+    size = os.path.getsize(output_file)
+    if expected and size != expected:
+        raise DownloadError(f'Size mismatch: expected {expected} bytes, got {size}')
+    counter.add(0, force=True)
+    return size
+
+
+# ─── Ranged Download ──────────────────────────────────────────────────────────
+
+def _state_path(output_file: str) -> str:
+    return output_file + '.ranges.json'
+
+
+def _load_state(output_file: str, total: int):
+    try:
+        with open(_state_path(output_file), 'r') as f:
+            state = json.load(f)
+        if state.get('total') == total and os.path.getsize(output_file) == total:
+            return state['ranges']
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _save_state(output_file: str, total: int, ranges: list):
+    tmp = _state_path(output_file) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'total': total, 'ranges': ranges}, f)
+    os.replace(tmp, _state_path(output_file))
+
+
+def _plan_ranges(total: int, workers: int) -> list:
+    count = max(1, min(workers, total // MIN_RANGE_SIZE))
+    size = -(-total // count)
+    # [start, end_inclusive, bytes_done]
+    return [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+
+
+def _fetch_range(url: str, output_file: str, rng: list, http, timeout: float,
+                 counter: _Progress, state_lock: threading.Lock, persist: Callable[[], None]):
+    start, end, _ = rng
+    if start + rng[2] > end:
+        return
+    resp = http.get(url, headers={'Range': f'bytes={start + rng[2]}-{end}'},
+                    stream=True, timeout=timeout)
+    try:
+        resp.raise_for_status()
+        if resp.status_code != 206:
+            raise DownloadError(f'Server ignored range request (HTTP {resp.status_code})')
+        with open(output_file, 'r+b') as f:
+            f.seek(start + rng[2])
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                if not chunk:
+                    continue
+                chunk = chunk[:end + 1 - (start + rng[2])]
+                f.write(chunk)
+                with state_lock:
+                    rng[2] += len(chunk)
+                counter.add(len(chunk))
+                if start + rng[2] > end:
+                    break
+    finally:
+        resp.close()
+        persist()
+
+    if start + rng[2] <= end:
+        raise DownloadError(f'Range {start}-{end} ended early at {start + rng[2]}')
+
+
+def download(url: str, output_file: str, workers: int = RANGE_WORKERS,
+             progress: Optional[ProgressCallback] = None, session=None,
+             timeout: float = 60, attempts: int = MAX_ATTEMPTS) -> int:
+    """
+    Download url to output_file, in parallel ranges when the server allows.
+
+    Partially completed ranges are resumed on the next attempt (including a
+    later call for the same output_file). Returns the final size in bytes.
+    """
+    http = session or requests
+    total, ranged = _probe(url, http, timeout)
+
+    if not ranged or not total or total < MIN_RANGE_SIZE or workers <= 1:
+        return _single_stream(url, output_file, http, timeout, progress)
+
+    ranges = _load_state(output_file, total)
+    if ranges is None:
+        with open(output_file, 'wb') as f:
+            f.truncate(total)  # preallocate (sparse where supported)
+        ranges = _plan_ranges(total, workers)
+    else:
+        logger.info(f"Resuming download: {sum(r[2] for r in ranges) / 1024 / 1024:.1f} MB already on disk")
+
+    state_lock = threading.Lock()
+
+    def persist():
+        with state_lock:
+            _save_state(output_file, total, ranges)
+
+    persist()
+    counter = _Progress(total, sum(r[2] for r in ranges), progress)
+
+    for attempt in range(1, attempts + 1):
+        pending = [r for r in ranges if r[0] + r[2] <= r[1]]
+        if not pending:
+            break
+        errors = []
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix='range') as pool:
+            futures = [
+                pool.submit(_fetch_range, url, output_file, r, http, timeout,
+                            counter, state_lock, persist)
+                for r in pending
+            ]
+            for fut in futures:
+                try:
+                    fut.result()
+                except (requests.exceptions.RequestException, DownloadError) as exc:
+                    errors.append(exc)
+        if errors:
+            logger.warning(f"{len(errors)} range(s) failed (attempt {attempt}/{attempts}): {errors[0]}")
+            if attempt < attempts:
+                time.sleep(2 ** (attempt - 1))
+
+    if any(r[0] + r[2] <= r[1] for r in ranges):
+        raise DownloadError(f'Download incomplete after {attempts} attempts; progress saved for resume')
+
+    size = os.path.getsize(output_file)
+    if size != total:
+        raise DownloadError(f'Size mismatch: expected {total} bytes, got {size}')
+    os.remove(_state_path(output_file))
+    counter.add(0, force=True)
+    logger.info(f"Ranged download complete: {total / 1024 / 1024:.1f} MB in {len(ranges)} range(s)")
+    return size
+
+
+def discard_partial(output_file: str):
+    """Remove a partial download and its resume state."""
+    for path in (output_file, _state_path(output_file), _state_path(output_file) + '.tmp'):
+        if os.path.exists(path):
+            os.remove(path)
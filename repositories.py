@@ -0,0 +1,789 @@
+"""
+Storage backends for AutoTube AI.
+A Repository stores users, payment transactions and the token usage log.
+FirestoreRepository is the hosted backend; SQLiteRepository is an embedded,
+single-node backend (WAL mode, indexed by user and time) for local
+development, load tests and small deployments.  STORAGE_BACKEND picks one.
+"""
+
+import os
+import re
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# firestore | sqlite
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore').strip().lower()
+SQLITE_PATH = os.getenv('STORAGE_SQLITE_PATH', os.path.join(BASE_DIR, 'autotube.db'))
+
+USERS_COL = 'users'
+TRANSACTIONS_COL = 'transactions'
+USAGE_LOG_COL = 'usage_log'
+# username -> user_id reservations; the document ID / primary key is the username
+USERNAMES_COL = 'usernames'
+
+# Reservation attempts before giving up (more than one only under races)
+USERNAME_ATTEMPTS = 20
+
+# Firestore caps a batched write at 500 operations
+FIRESTORE_BATCH_SIZE = 500
+
+# Subscription period fields scanned by the billing job
+BILLING_FIELDS = ('plan', 'billing_plan', 'plan_expires_at', 'next_grant_at')
+
+
+class UsernameTaken(Exception):
+    """The requested username is already reserved."""
+
+
+def _utcnow():
+    return datetime.utcnow().isoformat()
+
+
+def _username_parts(username):
+    """'rahul_12' -> ('rahul', 12); 'rahul' -> ('rahul', 0)."""
+    match = re.match(r'^(.+)_(\d+)$', username)
+    return (match[1], int(match[2])) if match else (username, 0)
+
+
+def _new_user_fields(email, username, password_hash, fields):
+    user_data = default_user_fields()
+    user_data.update(fields)
+    user_data.update({
+        'email': email.lower().strip(),
+        'username': username,
+        'password_hash': password_hash,
+    })
+    return user_data
+
+
+def default_user_fields():
+    """Default field values for a new user."""
+    return {
+        'plan': 'free',
+        'tokens_balance': 40,
+        'total_tokens_used': 0,
+        'total_uploads': 0,
+        'success_uploads': 0,
+        'avatar_url': '',
+        'last_refill': _utcnow(),
+        'razorpay_customer_id': '',
+        'youtube_credentials': '',
+        'billing_plan': '',
+        'plan_expires_at': '',
+        'next_grant_at': '',
+        'created_at': _utcnow(),
+    }
+
+
+class Repository:
+    """Interface shared by every storage backend. User IDs are strings."""
+
+    name = "base"
+
+    def init(self):
+        """Create tables/indexes if the backend needs them."""
+
+    # Users
+    def create_user(self, email, username, password_hash, **fields):
+        """Reserve `username` and create the user in one transaction. Raises UsernameTaken."""
+        user_id = self._create_reserved(email, username.strip(), password_hash, fields)
+        if user_id is None:
+            raise UsernameTaken(username)
+        return user_id
+
+    def create_user_with_free_username(self, email, base_username, password_hash, **fields):
+        """
+        Create a user named `base_username`, or `base_username_N` with the next
+        free N: one indexed lookup of the highest reserved suffix, then a
+        transactional reservation (retried only when another sign-up races us).
+        Returns (user_id, username).
+        """
+        suffix = 0
+        for _ in range(USERNAME_ATTEMPTS):
+            last = self._last_username_suffix(base_username)
+            suffix = max(suffix, 0 if last is None else last + 1)
+            username = f"{base_username}_{suffix}" if suffix else base_username
+            user_id = self._create_reserved(email, username, password_hash, fields)
+            if user_id is not None:
+                return user_id, username
+            # Lost a race (or hit an unreserved legacy name): skip past whatever
+            # the winners took rather than probing one suffix at a time
+            suffix += 1
+        raise UsernameTaken(base_username)
+
+    def _create_reserved(self, email, username, password_hash, fields):
+        """Create the user if `username` is free. Returns the user ID, or None if taken."""
+        raise NotImplementedError
+
+    def _last_username_suffix(self, base_username):
+        """Highest N reserved as base_username[_N] (0 for the bare name), or None."""
+        raise NotImplementedError
+
+    def reserve_existing_usernames(self):
+        """Backfill reservations for users created before they existed. Returns the count."""
+        raise NotImplementedError
+
+    def get_user_by_id(self, user_id):
+        raise NotImplementedError
+
+    def get_user_by_email(self, email):
+        raise NotImplementedError
+
+    def get_user_by_username(self, username):
+        raise NotImplementedError
+
+    def update_user(self, user_id, **fields):
+        raise NotImplementedError
+
+    # Tokens
+    def deduct_tokens(self, user_id, amount, action, task_id='', details=''):
+        return self.deduct_tokens_batch(user_id, [
+            {'action': action, 'amount': amount, 'task_id': task_id, 'details': details},
+        ])
+
+    def deduct_tokens_batch(self, user_id, charges):
+        raise NotImplementedError
+
+    def add_tokens(self, user_id, amount):
+        raise NotImplementedError
+
+    def increment_uploads(self, user_id, success=True):
+        raise NotImplementedError
+
+    def refill_tokens(self, grants, due_before, refilled_at):
+        """
+        Daily refill for every user whose last_refill is before `due_before`.
+        `grants` is {plan: (amount, max_tokens)}: users on those plans get
+        `amount` up to `max_tokens` and last_refill stamped.  Safe to run
+        concurrently (a user is refilled by one pass only).
+        Returns the number of users refilled.
+        """
+        raise NotImplementedError
+
+    def find_users_due(self, field, as_of, limit):
+        """Users whose `field` timestamp is set and not after `as_of`, oldest first."""
+        raise NotImplementedError
+
+    def bulk_update_users(self, updates):
+        """
+        Apply [(user, fields, token_grant), ...] in as few writes as possible,
+        where `user` is a dict from find_users_due().  A user changed since it
+        was read (e.g. by a billing pass on another host) is skipped, so a
+        grant is never applied twice.  Returns the number of users updated.
+        """
+        raise NotImplementedError
+
+    # Transactions / usage
+    def create_transaction(self, user_id, amount_paise, tokens_purchased,
+                           plan_purchased='', razorpay_payment_id=''):
+        raise NotImplementedError
+
+    def get_transactions(self, user_id, limit=20):
+        raise NotImplementedError
+
+    def get_usage_log(self, user_id, limit=50, since=None, action=None):
+        """Usage entries newest first, optionally only since an ISO date / one action."""
+        raise NotImplementedError
+
+
+# ─── Firestore ────────────────────────────────────────────────────────────────
+
+class FirestoreRepository(Repository):
+    """Cloud Firestore backend (the original storage)."""
+
+    name = "firestore"
+
+    @property
+    def db(self):
+        # Resolved per call: the client is created lazily and per process
+        from firebase_config import get_db
+        return get_db()
+
+    def init(self):
+        logger.info("Firestore is schemaless — no initialization required.")
+
+    def _user_doc_to_dict(self, doc):
+        """Convert a Firestore document snapshot to a user dict."""
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        data['id'] = doc.id  # Firestore document ID as the user ID
+        return data
+
+    def _where(self, collection, field, value):
+        from google.cloud.firestore_v1 import FieldFilter
+        return self.db.collection(collection).where(filter=FieldFilter(field, '==', value))
+
+    def _create_reserved(self, email, username, password_hash, fields):
+        from google.cloud.firestore_v1 import transactional
+
+        db = self.db
+        user_ref = db.collection(USERS_COL).document()
+        name_ref = db.collection(USERNAMES_COL).document(username)
+        # Users from before reservations existed, until `python init_db.py --reserve-usernames` has run
+        legacy = self._where(USERS_COL, 'username', username).limit(1)
+        base, suffix = _username_parts(username)
+
+        @transactional
+        def _apply(transaction):
+            if name_ref.get(transaction=transaction).exists:
+                return False
+            if any(True for _ in transaction.get(legacy)):
+                return False
+            transaction.create(name_ref, {'user_id': user_ref.id, 'base': base, 'suffix': suffix})
+            transaction.set(user_ref, _new_user_fields(email, username, password_hash, fields))
+            return True
+
+        if not _apply(db.transaction()):
+            return None
+        logger.info(f"Created Firestore user: {user_ref.id}")
+        return user_ref.id
+
+    def _last_username_suffix(self, base_username):
+        # Composite index: usernames (base ASC, suffix DESC)
+        from google.cloud.firestore_v1 import Query
+        query = (self._where(USERNAMES_COL, 'base', base_username)
+                 .order_by('suffix', direction=Query.DESCENDING).limit(1))
+        for doc in query.stream():
+            return doc.get('suffix')
+        return None
+
+    def reserve_existing_usernames(self):
+        db = self.db
+        reserved = {doc.id for doc in db.collection(USERNAMES_COL).select([]).stream()}
+        batch, pending, count = db.batch(), 0, 0
+        for doc in db.collection(USERS_COL).select(['username']).stream():
+            username = (doc.to_dict() or {}).get('username')
+            if not username or username in reserved:
+                continue
+            base, suffix = _username_parts(username)
+            batch.set(db.collection(USERNAMES_COL).document(username),
+                      {'user_id': doc.id, 'base': base, 'suffix': suffix})
+            reserved.add(username)
+            pending += 1
+            count += 1
+            if pending == FIRESTORE_BATCH_SIZE:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            batch.commit()
+        return count
+
+    def get_user_by_id(self, user_id):
+        doc = self.db.collection(USERS_COL).document(str(user_id)).get()
+        return self._user_doc_to_dict(doc)
+
+    def get_user_by_email(self, email):
+        for doc in self._where(USERS_COL, 'email', email.lower().strip()).limit(1).stream():
+            return self._user_doc_to_dict(doc)
+        return None
+
+    def get_user_by_username(self, username):
+        for doc in self._where(USERS_COL, 'username', username.strip()).limit(1).stream():
+            return self._user_doc_to_dict(doc)
+        return None
+
+    def update_user(self, user_id, **fields):
+        self.db.collection(USERS_COL).document(str(user_id)).update(fields)
+
+    def deduct_tokens_batch(self, user_id, charges):
+        from google.cloud.firestore_v1 import transactional
+
+        db = self.db
+        user_ref = db.collection(USERS_COL).document(str(user_id))
+        total = sum(c['amount'] for c in charges)
+
+        @transactional
+        def _apply(transaction):
+            user_doc = user_ref.get(transaction=transaction)
+            if not user_doc.exists:
+                return False
+            user_data = user_doc.to_dict()
+            if user_data.get('tokens_balance', 0) < total:
+                return False
+
+            transaction.update(user_ref, {
+                'tokens_balance': user_data['tokens_balance'] - total,
+                'total_tokens_used': user_data.get('total_tokens_used', 0) + total,
+            })
+            created_at = _utcnow()
+            for c in charges:
+                transaction.set(db.collection(USAGE_LOG_COL).document(), {
+                    'user_id': str(user_id),
+                    'action': c['action'],
+                    'tokens_used': c['amount'],
+                    'task_id': c.get('task_id', ''),
+                    'details': c.get('details', ''),
+                    'created_at': created_at,
+                })
+            return True
+
+        return _apply(db.transaction())
+
+    def add_tokens(self, user_id, amount):
+        user_ref = self.db.collection(USERS_COL).document(str(user_id))
+        user_doc = user_ref.get()
+        if user_doc.exists:
+            current = user_doc.to_dict().get('tokens_balance', 0)
+            user_ref.update({'tokens_balance': current + amount})
+
+    def increment_uploads(self, user_id, success=True):
+        user_ref = self.db.collection(USERS_COL).document(str(user_id))
+        user_doc = user_ref.get()
+        if not user_doc.exists:
+            return
+        data = user_doc.to_dict()
+        updates = {'total_uploads': data.get('total_uploads', 0) + 1}
+        if success:
+            updates['success_uploads'] = data.get('success_uploads', 0) + 1
+        user_ref.update(updates)
+
+    def _commit_guarded(self, writes):
+        """
+        Apply [(doc_ref, fields, update_time), ...], each only if the document
+        is unchanged since it was read at `update_time`.  Writes go in batches;
+        a batch that hits a changed document (another pass or a concurrent
+        request got there first) is replayed write by write, skipping the
+        changed ones.  Returns the number of writes applied.
+        """
+        from google.api_core.exceptions import FailedPrecondition, NotFound
+
+        db, applied = self.db, 0
+        for start in range(0, len(writes), FIRESTORE_BATCH_SIZE):
+            chunk = writes[start:start + FIRESTORE_BATCH_SIZE]
+            batch = db.batch()
+            for ref, fields, update_time in chunk:
+                batch.update(ref, fields, option=db.write_option(last_update_time=update_time))
+            try:
+                batch.commit()
+                applied += len(chunk)
+                continue
+            except (FailedPrecondition, NotFound):
+                pass
+            for ref, fields, update_time in chunk:
+                try:
+                    ref.update(fields, option=db.write_option(last_update_time=update_time))
+                    applied += 1
+                except (FailedPrecondition, NotFound):
+                    logger.info(f"User {ref.id} changed during the pass, skipped")
+        return applied
+
+    def refill_tokens(self, grants, due_before, refilled_at):
+        from google.cloud.firestore_v1 import FieldFilter, Increment
+
+        # Single-field range (no composite index) over due users only; the
+        # plan is checked here.  Users on plans without a refill are stamped
+        # too, so they leave the due range for a day instead of being read
+        # on every pass.  Increment keeps concurrent deductions intact; the
+        # update_time precondition stops a second pass granting again.
+        docs = (self.db.collection(USERS_COL)
+                .where(filter=FieldFilter('last_refill', '<', due_before))
+                .select(['plan', 'tokens_balance']).stream())
+        writes, refilled = [], 0
+        for doc in docs:
+            data = doc.to_dict()
+            update = {'last_refill': refilled_at}
+            if data.get('plan') in grants:
+                amount, max_tokens = grants[data['plan']]
+                balance = data.get('tokens_balance', 0)
+                grant = min(balance + amount, max_tokens) - balance
+                if grant > 0:
+                    update['tokens_balance'] = Increment(grant)
+                refilled += 1
+            writes.append((doc.reference, update, doc.update_time))
+        self._commit_guarded(writes)
+        return refilled
+
+    def find_users_due(self, field, as_of, limit):
+        from google.cloud.firestore_v1 import FieldFilter
+
+        # Range filters on a single field need no composite index
+        query = (self.db.collection(USERS_COL)
+                 .where(filter=FieldFilter(field, '>', ''))
+                 .where(filter=FieldFilter(field, '<=', as_of))
+                 .order_by(field)
+                 .limit(limit)
+                 .select(list(BILLING_FIELDS)))
+        # update_time is the precondition for bulk_update_users()
+        return [{**doc.to_dict(), 'id': doc.id, '_update_time': doc.update_time}
+                for doc in query.stream()]
+
+    def bulk_update_users(self, updates):
+        from google.cloud.firestore_v1 import Increment
+
+        writes = []
+        for user, fields, grant in updates:
+            data = dict(fields)
+            if grant:
+                data['tokens_balance'] = Increment(grant)
+            writes.append((self.db.collection(USERS_COL).document(str(user['id'])), data,
+                           user['_update_time']))
+        return self._commit_guarded(writes)
+
+    def create_transaction(self, user_id, amount_paise, tokens_purchased,
+                           plan_purchased='', razorpay_payment_id=''):
+        self.db.collection(TRANSACTIONS_COL).add({
+            'user_id': str(user_id),
+            'amount_paise': amount_paise,
+            'tokens_purchased': tokens_purchased,
+            'plan_purchased': plan_purchased,
+            'razorpay_payment_id': razorpay_payment_id,
+            'status': 'completed',
+            'created_at': _utcnow(),
+        })
+
+    def _user_entries(self, collection, user_id):
+        # Filter/sort in Python to avoid composite index requirements
+        results = []
+        for doc in self._where(collection, 'user_id', str(user_id)).stream():
+            d = doc.to_dict()
+            d['id'] = doc.id
+            results.append(d)
+        results.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        return results
+
+    def get_transactions(self, user_id, limit=20):
+        return self._user_entries(TRANSACTIONS_COL, user_id)[:limit]
+
+    def get_usage_log(self, user_id, limit=50, since=None, action=None):
+        results = [
+            d for d in self._user_entries(USAGE_LOG_COL, user_id)
+            if (since is None or d.get('created_at', '') >= since)
+            and (action is None or d.get('action') == action)
+        ]
+        return results if limit is None else results[:limit]
+
+
+# ─── SQLite ───────────────────────────────────────────────────────────────────
+
+_SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    username TEXT NOT NULL,
+    password_hash TEXT,
+    plan TEXT NOT NULL DEFAULT 'free',
+    tokens_balance INTEGER NOT NULL DEFAULT 0,
+    total_tokens_used INTEGER NOT NULL DEFAULT 0,
+    total_uploads INTEGER NOT NULL DEFAULT 0,
+    success_uploads INTEGER NOT NULL DEFAULT 0,
+    avatar_url TEXT DEFAULT '',
+    last_refill TEXT DEFAULT '',
+    razorpay_customer_id TEXT DEFAULT '',
+    youtube_credentials TEXT DEFAULT '',
+    billing_plan TEXT NOT NULL DEFAULT '',
+    plan_expires_at TEXT NOT NULL DEFAULT '',
+    next_grant_at TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE INDEX IF NOT EXISTS idx_users_plan_refill ON users (plan, last_refill);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    amount_paise INTEGER NOT NULL,
+    tokens_purchased INTEGER NOT NULL,
+    plan_purchased TEXT DEFAULT '',
+    razorpay_payment_id TEXT DEFAULT '',
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_id, created_at);
+CREATE TABLE IF NOT EXISTS usage_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    tokens_used INTEGER NOT NULL,
+    task_id TEXT DEFAULT '',
+    details TEXT DEFAULT '',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_log_user ON usage_log (user_id, created_at);
+CREATE TABLE IF NOT EXISTS usernames (
+    username TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    base TEXT NOT NULL,
+    suffix INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usernames_base ON usernames (base, suffix);
+'''
+
+_USER_COLUMNS = (
+    'id', 'email', 'username', 'password_hash', 'plan', 'tokens_balance',
+    'total_tokens_used', 'total_uploads', 'success_uploads', 'avatar_url',
+    'last_refill', 'razorpay_customer_id', 'youtube_credentials', 'billing_plan',
+    'plan_expires_at', 'next_grant_at', 'created_at',
+)
+
+# Columns added after the first release: (name, definition) for ALTER TABLE
+_USER_MIGRATIONS = (
+    ('billing_plan', "TEXT NOT NULL DEFAULT ''"),
+    ('plan_expires_at', "TEXT NOT NULL DEFAULT ''"),
+    ('next_grant_at', "TEXT NOT NULL DEFAULT ''"),
+)
+
+_SQLITE_INDEXES = '''
+CREATE INDEX IF NOT EXISTS idx_users_plan_expires ON users (plan_expires_at);
+CREATE INDEX IF NOT EXISTS idx_users_next_grant ON users (next_grant_at);
+'''
+
+
+class SQLiteRepository(Repository):
+    """Embedded SQLite backend. Fields without a column live in the `extra` JSON."""
+
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=10000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(_SQLITE_SCHEMA)
+                    self._migrate(conn)
+                    self._ready = True
+        return conn
+
+    def _migrate(self, conn):
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(users)')}
+        for column, definition in _USER_MIGRATIONS:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE users ADD COLUMN {column} {definition}')
+        conn.executescript(_SQLITE_INDEXES)
+        self._reserve_existing(conn)
+
+    @contextmanager
+    def _tx(self):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def init(self):
+        self._conn()
+        logger.info(f"SQLite storage ready at {self.path}")
+
+    def _row_to_user(self, row):
+        if row is None:
+            return None
+        data = {k: row[k] for k in _USER_COLUMNS}
+        data.update(json.loads(row['extra'] or '{}'))
+        return data
+
+    def _create_reserved(self, email, username, password_hash, fields):
+        user_data = _new_user_fields(email, username, password_hash, fields)
+        user_data['id'] = uuid.uuid4().hex
+        extra = {k: v for k, v in user_data.items() if k not in _USER_COLUMNS}
+        columns = ', '.join(_USER_COLUMNS)
+        marks = ', '.join('?' for _ in _USER_COLUMNS)
+        with self._tx() as conn:
+            if conn.execute('SELECT 1 FROM usernames WHERE username = ?', (username,)).fetchone():
+                return None
+            conn.execute('INSERT INTO usernames (username, user_id, base, suffix) VALUES (?, ?, ?, ?)',
+                         (username, user_data['id'], *_username_parts(username)))
+            conn.execute(f'INSERT INTO users ({columns}, extra) VALUES ({marks}, ?)',
+                         [user_data[c] for c in _USER_COLUMNS] + [json.dumps(extra)])
+        logger.info(f"Created SQLite user: {user_data['id']}")
+        return user_data['id']
+
+    def _last_username_suffix(self, base_username):
+        return self._conn().execute('SELECT MAX(suffix) FROM usernames WHERE base = ?',
+                                    (base_username,)).fetchone()[0]
+
+    def _reserve_existing(self, conn):
+        rows = conn.execute('SELECT id, username FROM users WHERE username NOT IN '
+                            '(SELECT username FROM usernames)').fetchall()
+        conn.executemany('INSERT OR IGNORE INTO usernames (username, user_id, base, suffix) VALUES (?, ?, ?, ?)',
+                         [(row['username'], row['id'], *_username_parts(row['username'])) for row in rows])
+        return len(rows)
+
+    def reserve_existing_usernames(self):
+        return self._reserve_existing(self._conn())
+
+    def get_user_by_id(self, user_id):
+        row = self._conn().execute('SELECT * FROM users WHERE id = ?', (str(user_id),)).fetchone()
+        return self._row_to_user(row)
+
+    def get_user_by_email(self, email):
+        row = self._conn().execute('SELECT * FROM users WHERE email = ?',
+                                   (email.lower().strip(),)).fetchone()
+        return self._row_to_user(row)
+
+    def get_user_by_username(self, username):
+        row = self._conn().execute('SELECT * FROM users WHERE username = ? LIMIT 1',
+                                   (username.strip(),)).fetchone()
+        return self._row_to_user(row)
+
+    def update_user(self, user_id, **fields):
+        columns = {k: v for k, v in fields.items() if k in _USER_COLUMNS and k != 'id'}
+        extra = {k: v for k, v in fields.items() if k not in _USER_COLUMNS}
+        with self._tx() as conn:
+            if columns:
+                assignments = ', '.join(f'{k} = ?' for k in columns)
+                conn.execute(f'UPDATE users SET {assignments} WHERE id = ?',
+                             [*columns.values(), str(user_id)])
+            if extra:
+                row = conn.execute('SELECT extra FROM users WHERE id = ?', (str(user_id),)).fetchone()
+                if row:
+                    merged = json.loads(row['extra'] or '{}')
+                    merged.update(extra)
+                    conn.execute('UPDATE users SET extra = ? WHERE id = ?',
+                                 (json.dumps(merged), str(user_id)))
+
+    def deduct_tokens_batch(self, user_id, charges):
+        total = sum(c['amount'] for c in charges)
+        created_at = _utcnow()
+        with self._tx() as conn:
+            cur = conn.execute(
+                '''UPDATE users SET tokens_balance = tokens_balance - ?,
+                                    total_tokens_used = total_tokens_used + ?
+                   WHERE id = ? AND tokens_balance >= ?''',
+                (total, total, str(user_id), total),
+            )
+            if cur.rowcount != 1:
+                return False
+            conn.executemany(
+                '''INSERT INTO usage_log (user_id, action, tokens_used, task_id, details, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                [(str(user_id), c['action'], c['amount'], c.get('task_id', ''),
+                  c.get('details', ''), created_at) for c in charges],
+            )
+        return True
+
+    def add_tokens(self, user_id, amount):
+        self._conn().execute('UPDATE users SET tokens_balance = tokens_balance + ? WHERE id = ?',
+                             (amount, str(user_id)))
+
+    def increment_uploads(self, user_id, success=True):
+        self._conn().execute(
+            '''UPDATE users SET total_uploads = total_uploads + 1,
+                                success_uploads = success_uploads + ?
+               WHERE id = ?''',
+            (1 if success else 0, str(user_id)),
+        )
+
+    def refill_tokens(self, grants, due_before, refilled_at):
+        # One indexed UPDATE per plan; the last_refill condition is evaluated
+        # under the write lock, so a concurrent pass finds nothing left to do
+        count = 0
+        with self._tx() as conn:
+            for plan, (amount, max_tokens) in grants.items():
+                count += conn.execute(
+                    '''UPDATE users SET tokens_balance = MAX(tokens_balance, MIN(tokens_balance + ?, ?)),
+                                        last_refill = ?
+                       WHERE plan = ? AND (last_refill IS NULL OR last_refill < ?)''',
+                    (amount, max_tokens, refilled_at, plan, due_before),
+                ).rowcount
+        return count
+
+    def find_users_due(self, field, as_of, limit):
+        if field not in BILLING_FIELDS:
+            raise ValueError(f"Not a billing field: {field!r}")
+        columns = ', '.join(('id',) + BILLING_FIELDS)
+        rows = self._conn().execute(
+            f"SELECT {columns} FROM users WHERE {field} > '' AND {field} <= ? ORDER BY {field} LIMIT ?",
+            (as_of, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def bulk_update_users(self, updates):
+        # Compare-and-set on the billing fields as read: a concurrent pass
+        # that already moved them on leaves nothing for this one to match
+        guard = ' AND '.join(f'{k} IS ?' for k in BILLING_FIELDS)
+        applied = 0
+        with self._tx() as conn:
+            for user, fields, grant in updates:
+                columns = {k: v for k, v in fields.items() if k in _USER_COLUMNS and k != 'id'}
+                assignments = ', '.join([f'{k} = ?' for k in columns] + ['tokens_balance = tokens_balance + ?'])
+                applied += conn.execute(
+                    f'UPDATE users SET {assignments} WHERE id = ? AND {guard}',
+                    [*columns.values(), grant or 0, str(user['id']), *(user[k] for k in BILLING_FIELDS)],
+                ).rowcount
+        return applied
+
+    def create_transaction(self, user_id, amount_paise, tokens_purchased,
+                           plan_purchased='', razorpay_payment_id=''):
+        self._conn().execute(
+            '''INSERT INTO transactions (user_id, amount_paise, tokens_purchased, plan_purchased,
+                                         razorpay_payment_id, status, created_at)
+               VALUES (?, ?, ?, ?, ?, 'completed', ?)''',
+            (str(user_id), amount_paise, tokens_purchased, plan_purchased,
+             razorpay_payment_id, _utcnow()),
+        )
+
+    def get_transactions(self, user_id, limit=20):
+        rows = self._conn().execute(
+            'SELECT * FROM transactions WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?',
+            (str(user_id), limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get_usage_log(self, user_id, limit=50, since=None, action=None):
+        sql = 'SELECT * FROM usage_log WHERE user_id = ?'
+        params = [str(user_id)]
+        if since is not None:
+            sql += ' AND created_at >= ?'
+            params.append(since)
+        if action is not None:
+            sql += ' AND action = ?'
+            params.append(action)
+        sql += ' ORDER BY created_at DESC, id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [dict(r) for r in self._conn().execute(sql, params).fetchall()]
+
+
+# ─── Selection ────────────────────────────────────────────────────────────────
+
+_BACKENDS = {
+    'firestore': FirestoreRepository,
+    'sqlite': SQLiteRepository,
+}
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    """The process-wide repository for STORAGE_BACKEND."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                backend = _BACKENDS.get(STORAGE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r}")
+                _repository = backend()
+                logger.info(f"Storage backend: {_repository.name}")
+    return _repository
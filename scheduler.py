@@ -0,0 +1,106 @@
+"""
+Periodic background jobs for AutoTube AI.
+Modules register jobs with every(); start() runs them from a daemon thread
+in each process, and a lease row per job in the local job store lets only
+one process on the host run a given job per interval.  The lease does not
+reach other hosts (a second instance, a rolling deploy), so jobs must also
+be safe when two hosts run them at once.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+from job_store import register_schema, get_conn, transaction, now
+
+logger = logging.getLogger(__name__)
+
+# How often the scheduler thread looks for due jobs
+SCHEDULER_TICK = int(os.getenv('SCHEDULER_TICK', '30'))
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name TEXT PRIMARY KEY,
+    last_run REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scheduler_checkpoints (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+''')
+
+# ─── Registration ─────────────────────────────────────────────────────────────
+
+_JOBS = {}
+
+
+def every(name, interval, fn):
+    """Run fn() about every `interval` seconds (once per host). interval <= 0 disables it."""
+    if interval > 0:
+        _JOBS[name] = (interval, fn)
+
+
+def _claim(name, interval):
+    # Host-local: only serialises processes sharing this job store
+    with transaction() as conn:
+        row = conn.execute('SELECT last_run FROM scheduler_leases WHERE name = ?', (name,)).fetchone()
+        if row and now() - row['last_run'] < interval:
+            return False
+        conn.execute('INSERT OR REPLACE INTO scheduler_leases (name, last_run) VALUES (?, ?)', (name, now()))
+        return True
+
+
+# ─── Checkpoints ──────────────────────────────────────────────────────────────
+
+def load_checkpoint(name):
+    """Progress saved by an interrupted run of job `name`, or None."""
+    row = get_conn().execute('SELECT value FROM scheduler_checkpoints WHERE name = ?', (name,)).fetchone()
+    return json.loads(row['value']) if row else None
+
+
+def save_checkpoint(name, value):
+    get_conn().execute('INSERT OR REPLACE INTO scheduler_checkpoints (name, value, updated_at) VALUES (?, ?, ?)',
+                       (name, json.dumps(value), now()))
+
+
+def clear_checkpoint(name):
+    get_conn().execute('DELETE FROM scheduler_checkpoints WHERE name = ?', (name,))
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+def run_pending():
+    """Run every job whose interval has elapsed. Returns the names that ran."""
+    ran = []
+    for name, (interval, fn) in list(_JOBS.items()):
+        try:
+            if not _claim(name, interval):
+                continue
+            started = time.perf_counter()
+            fn()
+            logger.info(f"⏱️ Scheduled job {name} took {time.perf_counter() - started:.1f}s")
+            ran.append(name)
+        except Exception as e:
+            logger.error(f"Scheduled job {name} failed: {e}")
+    return ran
+
+
+_started = None
+
+
+def start(tick=SCHEDULER_TICK):
+    """Start the scheduler thread in this process (idempotent, restarted after fork)."""
+    global _started
+    if _started == os.getpid():
+        return
+    _started = os.getpid()
+
+    def loop():
+        while True:
+            run_pending()
+            time.sleep(tick)
+
+    threading.Thread(target=loop, name='scheduler', daemon=True).start()
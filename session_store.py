@@ -0,0 +1,229 @@
+"""
+Server-side session storage for AutoTube AI.
+SESSION_BACKEND picks where Flask sessions live:
+
+    sqlite      one row per session in the local job store (default)
+    redis       Flask-Session's Redis backend at SESSION_REDIS_URL
+                (Redis or any compatible server, e.g. Valkey / KeyDB)
+    filesystem  the old one-file-per-session store in the temp dir
+
+SQLite rows carry an indexed expiry: expired rows are never returned, and
+the session_sweep scheduled job deletes them and caps the table at
+SESSION_MAX_ENTRIES.  Use redis to share sessions between hosts.  The SQLite
+interface is built on Flask's public SessionInterface only, so Flask-Session
+upgrades cannot break it.
+"""
+
+import os
+import secrets
+import logging
+import tempfile
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from flask_session import Session
+from itsdangerous import BadSignature, Signer, want_bytes
+from werkzeug.datastructures import CallbackDict
+
+import scheduler
+from job_store import register_schema, get_conn, transaction, now
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite').strip().lower()
+SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0')
+# Seconds between sweeps of expired sessions (sqlite backend)
+SESSION_SWEEP_INTERVAL = int(os.getenv('SESSION_SWEEP_INTERVAL', '3600'))
+# Live sessions kept at most; the sweep drops the ones closest to expiring
+SESSION_MAX_ENTRIES = int(os.getenv('SESSION_MAX_ENTRIES', '200000'))
+
+register_schema('''
+CREATE TABLE IF NOT EXISTS web_sessions (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_web_sessions_expiry ON web_sessions (expires_at);
+''')
+
+
+class SQLiteSession(CallbackDict, SessionMixin):
+    """Session dict that tracks reads and writes (same contract as Flask's cookie session)."""
+
+    def __init__(self, initial=None, sid=None, new=False, permanent=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        # No stored row yet: nothing to delete and no cookie to clear
+        self.new = new
+        if permanent:
+            self.permanent = permanent
+        self.modified = False
+        self.accessed = False
+
+    def __bool__(self):
+        return bool(dict(self)) and self.keys() != {'_permanent'}
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Flask session interface backed by the web_sessions table."""
+
+    session_class = SQLiteSession
+    serializer = TaggedJSONSerializer()
+    sid_length = 32
+
+    def __init__(self, app, key_prefix='session:', use_signer=False, permanent=True):
+        self.app = app
+        self.key_prefix = key_prefix
+        self.use_signer = use_signer
+        self.permanent = permanent
+
+    def _new_session(self):
+        return self.session_class(sid=secrets.token_urlsafe(self.sid_length), new=True,
+                                  permanent=self.permanent)
+
+    def _signer(self, app):
+        if not app.secret_key:
+            raise KeyError('SECRET_KEY must be set when SESSION_USE_SIGNER=True')
+        # Same salt and derivation as Flask-Session, so existing cookies stay valid
+        return Signer(app.secret_key, salt='flask-session', key_derivation='hmac')
+
+    def _cookie_value(self, app, sid):
+        return self._signer(app).sign(want_bytes(sid)).decode('utf-8') if self.use_signer else sid
+
+    def _sid_from_cookie(self, app, value):
+        if not self.use_signer:
+            return value
+        try:
+            return self._signer(app).unsign(value).decode()
+        except BadSignature:
+            return None
+
+    def _retrieve_session_data(self, store_id):
+        row = get_conn().execute(
+            'SELECT data FROM web_sessions WHERE id = ? AND expires_at > ?', (store_id, now())).fetchone()
+        if not row:
+            return None
+        data = row['data']
+        try:
+            return self.serializer.loads(data.decode('utf-8') if isinstance(data, bytes) else data)
+        except (ValueError, UnicodeDecodeError):
+            return None  # unreadable (e.g. written by an older format): start afresh
+
+    def _delete_session(self, store_id):
+        get_conn().execute('DELETE FROM web_sessions WHERE id = ?', (store_id,))
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        get_conn().execute(
+            'INSERT INTO web_sessions (id, data, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at',
+            (store_id, self.serializer.dumps(dict(session)), now() + session_lifetime.total_seconds()))
+
+    def open_session(self, app, request):
+        value = request.cookies.get(self.get_cookie_name(app))
+        sid = self._sid_from_cookie(app, value) if value else None
+        if not sid:
+            return self._new_session()
+        data = self._retrieve_session_data(self.key_prefix + sid)
+        if data is None:
+            return self._new_session()
+        return self.session_class(data, sid=sid)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        store_id = self.key_prefix + session.sid
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            # Emptied (e.g. logout): drop the row and the cookie, if there was one
+            if session.modified and not session.new:
+                self._delete_session(store_id)
+                response.delete_cookie(name, domain=domain, path=path)
+                response.vary.add('Cookie')
+            return
+
+        if not (session.modified or app.config['SESSION_REFRESH_EACH_REQUEST']):
+            return
+        self._upsert_session(app.permanent_session_lifetime, session, store_id)
+
+        if not self.should_set_cookie(app, session):
+            return
+        response.set_cookie(
+            name,
+            self._cookie_value(app, session.sid),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add('Cookie')
+
+
+def sweep(max_entries=None):
+    """Delete expired sessions, then trim to SESSION_MAX_ENTRIES. Returns rows removed."""
+    max_entries = SESSION_MAX_ENTRIES if max_entries is None else max_entries
+    with transaction() as conn:
+        removed = conn.execute('DELETE FROM web_sessions WHERE expires_at <= ?', (now(),)).rowcount
+        excess = conn.execute('SELECT COUNT(*) FROM web_sessions').fetchone()[0] - max_entries
+        if excess > 0:
+            removed += conn.execute(
+                'DELETE FROM web_sessions WHERE id IN '
+                '(SELECT id FROM web_sessions ORDER BY expires_at LIMIT ?)', (excess,)).rowcount
+    if removed:
+        logger.info(f"🧹 Swept {removed} session(s)")
+    return removed
+
+
+def count():
+    """Live sessions in the SQLite store, for /health."""
+    return get_conn().execute(
+        'SELECT COUNT(*) FROM web_sessions WHERE expires_at > ?', (now(),)).fetchone()[0]
+
+
+def init_app(app):
+    """Install the configured session backend on the app."""
+    config = app.config
+    if SESSION_BACKEND == 'redis':
+        import redis
+        config.update(SESSION_TYPE='redis', SESSION_REDIS=redis.from_url(SESSION_REDIS_URL))
+        Session(app)
+    elif SESSION_BACKEND == 'filesystem':
+        session_dir = os.path.join(tempfile.gettempdir(), 'flask_session')
+        os.makedirs(session_dir, exist_ok=True)
+        config.update(SESSION_TYPE='filesystem', SESSION_FILE_DIR=session_dir)
+        Session(app)
+    elif SESSION_BACKEND == 'sqlite':
+        app.session_interface = SQLiteSessionInterface(
+            app,
+            key_prefix=config.get('SESSION_KEY_PREFIX', 'session:'),
+            use_signer=config.get('SESSION_USE_SIGNER', False),
+            permanent=config.get('SESSION_PERMANENT', True),
+        )
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND!r}")
+    logger.info(f"Session backend: {SESSION_BACKEND}")
+
+
+if SESSION_BACKEND == 'sqlite':
+    scheduler.every('session_sweep', SESSION_SWEEP_INTERVAL, sweep)
@@ -251,6 +251,8 @@
         const sourceOptions = document.querySelectorAll('.source-option');
         const igSection = document.getElementById('ig-section');
         const deviceSection = document.getElementById('device-section');
+        const bulkSection = document.getElementById('bulk-section');
+        const bulkUrls = document.getElementById('bulk-urls');
         const dropzone = document.getElementById('dropzone');
         const fileInput = document.getElementById('video-file');
         const startBtn = document.getElementById('start-upload-btn');
@@ -271,6 +273,7 @@
                 currentSource = opt.dataset.source;
                 if (igSection) igSection.classList.toggle('hidden', currentSource !== 'instagram');
                 if (deviceSection) deviceSection.classList.toggle('hidden', currentSource !== 'device');
+                if (bulkSection) bulkSection.classList.toggle('hidden', currentSource !== 'bulk');
                 updateCost();
             });
         });
@@ -288,10 +291,21 @@
             if (!costValue) return;
             let cost = 8; // upload(5) + ai(3)
             if (editingToggle && editingToggle.checked) cost += 4;
+            if (currentSource === 'bulk') {
+                const count = new Set(bulkUrlList()).size;
+                costValue.textContent = `${cost * count} tokens (${count} × ${cost})`;
+                return;
+            }
             costValue.textContent = cost + ' tokens';
         }
         updateCost();
 
+        function bulkUrlList() {
+            if (!bulkUrls) return [];
+            return bulkUrls.value.split(/[\s,]+/).map(u => u.trim()).filter(Boolean);
+        }
+        if (bulkUrls) bulkUrls.addEventListener('input', updateCost);
+
         // Dropzone
         if (dropzone && fileInput) {
             dropzone.addEventListener('click', () => fileInput.click());
@@ -310,14 +324,77 @@
             });
         }
 
+        const CHUNK_PARALLEL = 3;
+        const CHUNK_RETRIES = 4;
+
+        async function sha256Hex(blob) {
+            if (!window.crypto || !crypto.subtle) return '';  // insecure context: server still checks length
+            const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+            return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+        }
+
+        async function sendChunk(uploadId, file, offset, chunkSize) {
+            const blob = file.slice(offset, offset + chunkSize);
+            const checksum = await sha256Hex(blob);
+            for (let attempt = 1; ; attempt++) {
+                try {
+                    const resp = await fetch(`/upload-video/${uploadId}/chunk?offset=${offset}`, {
+                        method: 'PUT',
+                        body: blob,
+                        headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': checksum },
+                    });
+                    const data = await resp.json();
+                    if (data.success) return;
+                    const err = new Error(data.error || 'Chunk failed');
+                    // Client errors other than a corrupted chunk will not fix themselves
+                    err.fatal = resp.status < 500 && resp.status !== 422;
+                    throw err;
+                } catch (e) {
+                    if (e.fatal || attempt >= CHUNK_RETRIES) throw e;
+                }
+                await new Promise(r => setTimeout(r, 500 * 2 ** attempt));
+            }
+        }
+
+        async function uploadInChunks(file, onProgress) {
+            const init = await api('/upload-video/init', {
+                method: 'POST',
+                body: { filename: file.name, size: file.size, fingerprint: `${file.name}:${file.size}:${file.lastModified}` },
+            });
+            if (!init || !init.success) throw new Error(init?.error || 'Could not start upload');
+
+            const received = new Set(init.received);
+            const pending = [];
+            for (let offset = 0; offset < file.size; offset += init.chunk_size) {
+                if (!received.has(offset)) pending.push(offset);
+            }
+            let done = init.bytes_received;
+            onProgress(done, file.size);
+
+            async function worker() {
+                while (pending.length) {
+                    const offset = pending.shift();
+                    await sendChunk(init.upload_id, file, offset, init.chunk_size);
+                    done += Math.min(init.chunk_size, file.size - offset);
+                    onProgress(done, file.size);
+                }
+            }
+            await Promise.all(Array.from({ length: CHUNK_PARALLEL }, worker));
+
+            const resp = await fetch(`/upload-video/${init.upload_id}/finalize`, { method: 'POST' });
+            return await resp.json();
+        }
+
         async function handleFile(file) {
-            const formData = new FormData();
-            formData.append('video', file);
-            dropzone.innerHTML = '<div class="drop-icon"><div class="spinner"></div></div><h4>Uploading...</h4>';
+            dropzone.innerHTML = '<div class="drop-icon"><div class="spinner"></div></div><h4>Uploading...</h4><p class="upload-progress"></p>';
+            const progressText = dropzone.querySelector('.upload-progress');
 
             try {
-                const resp = await fetch('/upload-video', { method: 'POST', body: formData });
-                const data = await resp.json();
+                const data = await uploadInChunks(file, (done, total) => {
+                    if (progressText) {
+                        progressText.textContent = `${(done / 1048576).toFixed(1)} / ${(total / 1048576).toFixed(1)} MB · ${Math.floor(done * 100 / total)}%`;
+                    }
+                });
                 if (data.success) {
                     uploadedFilePath = data.filepath;
                     dropzone.innerHTML = `<div class="drop-icon">✅</div><h4>${file.name}</h4><p>File ready. Click Start to process.</p>`;
@@ -328,7 +405,7 @@
                 }
             } catch (e) {
                 dropzone.innerHTML = '<div class="drop-icon">📁</div><h4>Drop video here or click to browse</h4><p>MP4, MOV, AVI, MKV supported</p>';
-                toast.show('Upload failed', 'error');
+                toast.show(`Upload interrupted: ${e.message}. Drop the same file again to resume.`, 'error');
             }
         }
 
@@ -344,6 +421,12 @@
                         return;
                     }
                     payload.url = urlInput.value.trim();
+                } else if (currentSource === 'bulk') {
+                    payload.urls = bulkUrlList();
+                    if (!payload.urls.length) {
+                        toast.show('Please enter at least one Instagram URL', 'error');
+                        return;
+                    }
                 } else {
                     if (!uploadedFilePath) {
                         toast.show('Please upload a video first', 'error');
@@ -399,7 +482,8 @@
                 startBtn.disabled = true;
                 startBtn.innerHTML = '<span class="spinner"></span> Processing...';
 
-                const data = await api('/start-upload', { method: 'POST', body: payload });
+                const endpoint = currentSource === 'bulk' ? '/start-bulk-upload' : '/start-upload';
+                const data = await api(endpoint, { method: 'POST', body: payload });
 
                 if (!data || !data.success) {
                     startBtn.disabled = false;
@@ -409,14 +493,73 @@
                 }
 
                 if (progressArea) progressArea.classList.remove('hidden');
-                pollTask(data.task_id);
+                if (data.batch_id) {
+                    if (data.invalid && data.invalid.length) {
+                        toast.show(`Skipped ${data.invalid.length} invalid URL(s)`, 'info');
+                    }
+                    updateTokenWidget();
+                    pollBatch(data.batch_id);
+                } else {
+                    pollTask(data.task_id);
+                }
             });
         }
 
+        function pollBatch(batchId) {
+            const progressFill = document.querySelector('.progress-bar-fill');
+            const progressMsg = document.querySelector('.progress-message');
+            const progressPct = document.querySelector('.progress-percent');
+            const bulkList = document.querySelector('.bulk-list');
+            if (bulkList) bulkList.classList.remove('hidden');
+
+            const interval = setInterval(async () => {
+                const data = await api(`/batch/${batchId}`);
+                if (!data || !data.items) return;
+
+                if (progressFill) progressFill.style.width = data.progress + '%';
+                if (progressPct) progressPct.textContent = data.progress + '%';
+                if (progressMsg) {
+                    progressMsg.textContent = `${data.done} of ${data.total} uploaded` +
+                        (data.failed ? `, ${data.failed} failed` : '');
+                }
+                if (bulkList) {
+                    bulkList.innerHTML = '';
+                    data.items.forEach(item => {
+                        const row = document.createElement('div');
+                        row.className = `bulk-item ${item.status}`;
+                        const label = document.createElement(item.yt_url ? 'a' : 'span');
+                        label.className = 'bulk-url';
+                        label.textContent = item.title || item.url;
+                        if (item.yt_url) {
+                            label.href = item.yt_url;
+                            label.target = '_blank';
+                        }
+                        const state = document.createElement('span');
+                        state.className = 'bulk-state';
+                        state.textContent = item.status === 'failed'
+                            ? (item.error || 'Failed')
+                            : `${item.message} · ${item.progress}%`;
+                        row.append(label, state);
+                        bulkList.appendChild(row);
+                    });
+                }
+
+                if (data.status !== 'running') {
+                    clearInterval(interval);
+                    toast.show(data.done ? `Bulk upload finished: ${data.done}/${data.total} uploaded 🎉`
+                                         : 'Bulk upload failed', data.done ? 'success' : 'error');
+                    startBtn.disabled = false;
+                    startBtn.innerHTML = '🚀 Start Processing';
+                    updateTokenWidget();
+                }
+            }, 2000);
+        }
+
         function pollTask(taskId) {
             const progressFill = document.querySelector('.progress-bar-fill');
             const progressMsg = document.querySelector('.progress-message');
             const progressPct = document.querySelector('.progress-percent');
+            const progressPreview = document.querySelector('.progress-preview');
 
             const interval = setInterval(async () => {
                 const data = await api(`/task/${taskId}`);
@@ -425,6 +568,11 @@
                 if (progressFill) progressFill.style.width = data.progress + '%';
                 if (progressMsg) progressMsg.textContent = data.message;
                 if (progressPct) progressPct.textContent = data.progress + '%';
+                if (progressPreview && data.metadata && data.metadata.title) {
+                    progressPreview.classList.remove('hidden');
+                    progressPreview.querySelector('.preview-title').textContent = data.metadata.title;
+                    progressPreview.querySelector('.preview-description').textContent = data.metadata.description || '';
+                }
 
                 if (data.status === 'done') {
                     clearInterval(interval);
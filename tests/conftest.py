@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep every store the app touches in a throwaway directory, and no background
+# media consumers or janitor sweeps, before any module reads its settings
+_tmpdir = tempfile.mkdtemp(prefix='autotube_test_')
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(_tmpdir, 'jobs.db'))
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('STORAGE_SQLITE_PATH', os.path.join(_tmpdir, 'autotube.db'))
+os.environ.setdefault('UPLOAD_WORKSPACE_DIR', os.path.join(_tmpdir, 'jobs'))
+os.environ.setdefault('MEDIA_WORKER', 'external')
+os.environ.setdefault('JANITOR_INTERVAL', '0')
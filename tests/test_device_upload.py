@@ -0,0 +1,162 @@
+"""
+Chunked, resumable device uploads through the Flask routes: offset and size
+checks, out-of-order and repeated chunks, per-chunk checksums, finalize with
+missing ranges, resume by fingerprint and per-user ownership.
+
+    python -m pytest tests
+"""
+
+import hashlib
+import os
+import uuid
+
+import pytest
+
+import app as webapp
+import device_upload
+import disk_janitor
+from models import create_user
+
+CHUNK = 1024
+# 3.5 chunks: the last one is short
+VIDEO = b'\x00\x00\x00\x18ftypmp42' + os.urandom(CHUNK * 3 + CHUNK // 2 - 12)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(device_upload, 'UPLOAD_CHUNK_SIZE', CHUNK)
+    monkeypatch.setattr(disk_janitor, 'admit', lambda expected: True)
+    return webapp.app.test_client()
+
+
+def _login(client, name):
+    uid = create_user(f'{name}@example.com', name, 'hash')
+    with client.session_transaction() as sess:
+        sess['_user_id'] = uid
+        sess['_fresh'] = True
+    return uid
+
+
+@pytest.fixture
+def user(client):
+    return _login(client, f'u{uuid.uuid4().hex[:12]}')
+
+
+def _init(client, size=len(VIDEO), filename='clip.mp4', **extra):
+    return client.post('/upload-video/init', json={'filename': filename, 'size': size, **extra})
+
+
+def _put(client, upload_id, offset, data=None, checksum=None):
+    data = VIDEO[offset:offset + CHUNK] if data is None else data
+    headers = {'X-Chunk-SHA256': checksum} if checksum else {}
+    return client.put(f'/upload-video/{upload_id}/chunk?offset={offset}', data=data, headers=headers)
+
+
+def _finalize(client, upload_id):
+    return client.post(f'/upload-video/{upload_id}/finalize')
+
+
+# ─── Sessions ─────────────────────────────────────────────────────────────────
+
+def test_init_rejects_bad_requests(client, user):
+    assert _init(client, filename='notes.txt').status_code == 400
+    assert _init(client, size=0).status_code == 400
+    assert _init(client, size=device_upload.MAX_UPLOAD_BYTES + 1).status_code == 413
+
+
+def test_requires_login(client):
+    resp = client.post('/upload-video/init', json={'filename': 'clip.mp4', 'size': 10},
+                       headers={'X-Requested-With': 'XMLHttpRequest'})
+    assert resp.status_code == 401
+
+
+def test_out_of_order_upload_assembles(client, user):
+    body = _init(client).get_json()
+    assert body['chunk_size'] == CHUNK and body['received'] == []
+    upload_id = body['upload_id']
+
+    for offset in (3 * CHUNK, CHUNK, 0, 2 * CHUNK, CHUNK):  # last one is a harmless resend
+        digest = hashlib.sha256(VIDEO[offset:offset + CHUNK]).hexdigest()
+        resp = _put(client, upload_id, offset, checksum=digest)
+        assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json()['bytes_received'] == len(VIDEO)
+
+    resp = _finalize(client, upload_id)
+    assert resp.status_code == 200
+    done = resp.get_json()
+    assert done['size'] == len(VIDEO)
+    assert done['sha256'] == hashlib.sha256(VIDEO).hexdigest()
+    with open(done['filepath'], 'rb') as f:
+        assert f.read() == VIDEO
+    assert device_upload.lookup_upload(user, done['filepath'])['sha256'] == done['sha256']
+    # The session is gone once finalized
+    assert client.get(f'/upload-video/{upload_id}').status_code == 404
+
+
+def test_resume_by_fingerprint(client, user):
+    first = _init(client, fingerprint='clip.mp4-1234').get_json()
+    _put(client, first['upload_id'], 0)
+    _put(client, first['upload_id'], 2 * CHUNK)
+
+    again = _init(client, fingerprint='clip.mp4-1234').get_json()
+    assert again['upload_id'] == first['upload_id']
+    assert again['received'] == [0, 2 * CHUNK]
+    status = client.get(f'/upload-video/{first["upload_id"]}').get_json()
+    assert status['bytes_received'] == 2 * CHUNK
+
+
+# ─── Chunks ───────────────────────────────────────────────────────────────────
+
+def test_invalid_offsets(client, user):
+    upload_id = _init(client).get_json()['upload_id']
+    for offset in (-1, 7, CHUNK + 1, 4 * CHUNK):
+        assert _put(client, upload_id, offset, data=b'x' * CHUNK).status_code == 400
+
+
+def test_wrong_chunk_length(client, user):
+    upload_id = _init(client).get_json()['upload_id']
+    assert _put(client, upload_id, CHUNK, data=VIDEO[CHUNK:2 * CHUNK - 1]).status_code == 400
+    assert _put(client, upload_id, CHUNK, data=VIDEO[CHUNK:2 * CHUNK + 1]).status_code == 400
+    # Last chunk is only the remainder of the file
+    assert _put(client, upload_id, 3 * CHUNK, data=VIDEO[3 * CHUNK:] + b'x').status_code == 400
+    assert client.get(f'/upload-video/{upload_id}').get_json()['received'] == []
+
+
+def test_checksum_mismatch(client, user):
+    upload_id = _init(client).get_json()['upload_id']
+    resp = _put(client, upload_id, CHUNK, checksum=hashlib.sha256(b'other').hexdigest())
+    assert resp.status_code == 422
+    assert client.get(f'/upload-video/{upload_id}').get_json()['received'] == []
+    assert _put(client, upload_id, CHUNK, checksum=hashlib.sha256(VIDEO[CHUNK:2 * CHUNK]).hexdigest()
+                ).status_code == 200
+
+
+def test_first_chunk_must_be_a_video(client, user):
+    upload_id = _init(client).get_json()['upload_id']
+    assert _put(client, upload_id, 0, data=b'not a video'.ljust(CHUNK, b'!')).status_code == 400
+    # The session is dropped with its workspace
+    assert client.get(f'/upload-video/{upload_id}').status_code == 404
+
+
+# ─── Finalize ─────────────────────────────────────────────────────────────────
+
+def test_finalize_with_missing_chunks(client, user):
+    upload_id = _init(client).get_json()['upload_id']
+    _put(client, upload_id, 0)
+    _put(client, upload_id, 3 * CHUNK)
+    resp = _finalize(client, upload_id)
+    assert resp.status_code == 409
+    assert '2 chunk(s) missing' in resp.get_json()['error']
+
+    # Still resumable: send the gaps and finalize again
+    _put(client, upload_id, CHUNK)
+    _put(client, upload_id, 2 * CHUNK)
+    assert _finalize(client, upload_id).status_code == 200
+
+
+def test_sessions_are_per_user(client, user):
+    upload_id = _init(client).get_json()['upload_id']
+    _login(client, f'x{uuid.uuid4().hex[:12]}')
+    assert client.get(f'/upload-video/{upload_id}').status_code == 404
+    assert _put(client, upload_id, 0).status_code == 404
+    assert _finalize(client, upload_id).status_code == 404
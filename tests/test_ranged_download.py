@@ -0,0 +1,156 @@
+"""
+Ranged download behaviour against a local HTTP server: failed ranges are
+retried and resumed, and short bodies are never reported as complete.
+
+    python -m pytest tests
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import ranged_download
+from ranged_download import DownloadError
+
+PAYLOAD = os.urandom(512 * 1024)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        total = len(PAYLOAD)
+        start, end = 0, total - 1
+        rng = self.headers.get('Range')
+        with server.lock:
+            server.requests.append(rng)
+            ranged = server.ranges and rng and rng != 'bytes=0-0'
+            fail = ranged and server.fail_status and server.fail_status.pop()
+            drop = ranged and not fail and server.drop_mid_range and server.drop_mid_range.pop()
+        if fail:
+            self.send_response(fail)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if server.ranges and rng:
+            first, _, last = rng[6:].partition('-')
+            start, end = int(first), int(last) if last else total - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{total}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        body = PAYLOAD[start:end + 1]
+        if drop or (server.short_body and not server.ranges):
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(ranged_download, 'MIN_RANGE_SIZE', 64 * 1024)
+    monkeypatch.setattr(ranged_download, 'CHUNK_SIZE', 16 * 1024)
+    monkeypatch.setattr(ranged_download.time, 'sleep', lambda _: None)
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    srv.lock = threading.Lock()
+    srv.requests = []
+    # Per-test knobs: range support, statuses to fail ranges with, ranges to cut short
+    srv.ranges, srv.fail_status, srv.drop_mid_range, srv.short_body = True, [], [], False
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.url = f'http://127.0.0.1:{srv.server_address[1]}/reel.mp4'
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# ─── Ranged ───────────────────────────────────────────────────────────────────
+
+def test_parallel_ranges(server, tmp_path):
+    out = str(tmp_path / 'out.mp4')
+    assert ranged_download.download(server.url, out, workers=4) == len(PAYLOAD)
+    assert _read(out) == PAYLOAD
+    assert not os.path.exists(out + '.ranges.json')
+    assert len(server.requests) == 5  # probe + 4 ranges
+
+
+def test_failed_range_is_retried(server, tmp_path):
+    server.fail_status = [503]
+    out = str(tmp_path / 'out.mp4')
+    assert ranged_download.download(server.url, out, workers=4) == len(PAYLOAD)
+    assert _read(out) == PAYLOAD
+    assert len(server.requests) == 6  # the failed range is fetched again
+
+
+def test_dropped_range_resumes_from_offset(server, tmp_path):
+    server.drop_mid_range = [True]
+    out = str(tmp_path / 'out.mp4')
+    assert ranged_download.download(server.url, out, workers=4) == len(PAYLOAD)
+    assert _read(out) == PAYLOAD
+    first_ranges = {r[6:].partition('-')[2]: int(r[6:].partition('-')[0]) for r in server.requests[1:5]}
+    retried = server.requests[5][6:].partition('-')
+    # The retry asks only for the bytes the dropped connection did not deliver
+    assert int(retried[0]) > first_ranges[retried[2]]
+
+
+def test_gives_up_and_keeps_state(server, tmp_path):
+    server.fail_status = [503] * 20
+    out = str(tmp_path / 'out.mp4')
+    with pytest.raises(DownloadError):
+        ranged_download.download(server.url, out, workers=4, attempts=2)
+    assert os.path.exists(out + '.ranges.json')
+    ranged_download.discard_partial(out)
+    assert not os.path.exists(out) and not os.path.exists(out + '.ranges.json')
+
+
+# ─── Single Stream ────────────────────────────────────────────────────────────
+
+def test_single_stream_without_ranges(server, tmp_path):
+    server.ranges = False
+    out = str(tmp_path / 'out.mp4')
+    assert ranged_download.download(server.url, out, workers=4) == len(PAYLOAD)
+    assert _read(out) == PAYLOAD
+
+
+def test_single_stream_short_body_is_rejected(server, tmp_path):
+    server.ranges, server.short_body = False, True
+    with pytest.raises((DownloadError, requests.exceptions.RequestException)):
+        ranged_download.download(server.url, str(tmp_path / 'out.mp4'), workers=4)
+
+
+def test_single_stream_checks_content_length(tmp_path):
+    # A client that does not enforce Content-Length itself
+    class Response:
+        status_code = 200
+        headers = {'Content-Length': str(len(PAYLOAD))}
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield PAYLOAD[:1000]
+
+        def close(self):
+            pass
+
+    class Session:
+        def get(self, url, **kwargs):
+            return Response()
+
+    with pytest.raises(DownloadError, match='Size mismatch'):
+        ranged_download._single_stream('http://cdn/reel.mp4', str(tmp_path / 'out.mp4'),
+                                       Session(), 5, None)
@@ -0,0 +1,134 @@
+"""
+Repository contract checks, run against the embedded SQLite backend.
+Every backend must behave this way; no Firebase credentials or emulator needed.
+
+    python -m pytest tests
+"""
+
+import threading
+
+import pytest
+
+from repositories import SQLiteRepository, UsernameTaken
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SQLiteRepository(str(tmp_path / 'test.db'))
+    repo.init()
+    return repo
+
+
+@pytest.fixture
+def uid(repo):
+    return repo.create_user(' User0@Example.com ', 'user0', 'hash')
+
+
+# ─── Users ────────────────────────────────────────────────────────────────────
+
+def test_lookups(repo, uid):
+    user = repo.get_user_by_id(uid)
+    assert user['email'] == 'user0@example.com'
+    assert user['plan'] == 'free' and user['tokens_balance'] == 40
+    assert repo.get_user_by_email('USER0@example.com')['id'] == uid
+    assert repo.get_user_by_username('user0')['id'] == uid
+    assert repo.get_user_by_id('missing') is None
+    assert repo.get_user_by_email('missing@example.com') is None
+
+
+def test_update_user_keeps_unknown_fields(repo, uid):
+    repo.update_user(uid, avatar_url='pic', youtube_channel='abc')
+    user = repo.get_user_by_id(uid)
+    assert user['avatar_url'] == 'pic'
+    assert user['youtube_channel'] == 'abc'
+
+
+def test_username_is_reserved(repo, uid):
+    with pytest.raises(UsernameTaken):
+        repo.create_user('other@example.com', 'user0', 'hash')
+
+
+def test_free_username_suffixes(repo):
+    names = [repo.create_user_with_free_username(f'r{i}@example.com', 'rahul', 'hash')[1]
+             for i in range(3)]
+    assert names == ['rahul', 'rahul_1', 'rahul_2']
+
+
+def test_free_username_under_concurrency(repo):
+    names = []
+    threads = [threading.Thread(target=lambda i=i: names.append(
+        repo.create_user_with_free_username(f'c{i}@example.com', 'priya', 'hash')[1]))
+        for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(names) == 20 and len(set(names)) == 20
+
+
+def test_existing_usernames_are_backfilled(repo):
+    # A user row from before reservations existed
+    repo._conn().execute("INSERT INTO users (id, email, username, created_at) "
+                         "VALUES ('legacy', 'l@example.com', 'sam', '')")
+    assert repo.reserve_existing_usernames() == 1
+    assert repo.create_user_with_free_username('s@example.com', 'sam', 'hash')[1] == 'sam_1'
+
+
+# ─── Tokens ───────────────────────────────────────────────────────────────────
+
+def test_deduct_tokens(repo, uid):
+    assert repo.deduct_tokens(uid, 5, 'upload', 'task', 'details')
+    assert repo.get_user_by_id(uid)['tokens_balance'] == 35
+    assert not repo.deduct_tokens(uid, 1000, 'upload')
+    assert repo.get_user_by_id(uid)['tokens_balance'] == 35
+    assert [e['action'] for e in repo.get_usage_log(uid)] == ['upload']
+
+
+def test_deduct_batch_is_all_or_nothing(repo, uid):
+    assert not repo.deduct_tokens_batch(uid, [
+        {'action': 'upload', 'amount': 1},
+        {'action': 'video_edit', 'amount': 40},
+    ])
+    assert repo.get_user_by_id(uid)['tokens_balance'] == 40
+    assert repo.get_usage_log(uid) == []
+
+
+def test_usage_log_filters(repo, uid):
+    repo.deduct_tokens(uid, 1, 'upload')
+    repo.deduct_tokens(uid, 2, 'video_edit')
+    assert [e['action'] for e in repo.get_usage_log(uid, action='video_edit')] == ['video_edit']
+    assert repo.get_usage_log(uid, since='9999') == []
+    assert len(repo.get_usage_log(uid, limit=1)) == 1
+
+
+def test_refill_caps_and_skips_recent(repo, uid):
+    repo.update_user(uid, plan='pro', tokens_balance=95, last_refill='2000-01-01')
+    free = repo.create_user('free@example.com', 'free', 'hash')
+    repo.update_user(free, last_refill='2000-01-01')
+
+    assert repo.refill_tokens({'pro': (10, 100)}, '2001-01-01', '2001-01-02') == 1
+    assert repo.get_user_by_id(uid)['tokens_balance'] == 100
+    assert repo.get_user_by_id(free)['tokens_balance'] == 40
+    # Already refilled: a second pass grants nothing
+    assert repo.refill_tokens({'pro': (10, 100)}, '2001-01-01', '2001-01-02') == 0
+
+
+def test_bulk_update_skips_users_changed_since_read(repo, uid):
+    repo.update_user(uid, plan='pro', billing_plan='pro_yearly',
+                     plan_expires_at='2002-01-01', next_grant_at='2001-01-01')
+    due = repo.find_users_due('next_grant_at', '2001-06-01', 10)
+    assert [u['id'] for u in due] == [uid]
+
+    assert repo.bulk_update_users([(u, {'next_grant_at': '2001-02-01'}, 250) for u in due]) == 1
+    # A second pass working from the same read must not grant again
+    assert repo.bulk_update_users([(u, {'next_grant_at': '2001-02-01'}, 250) for u in due]) == 0
+    assert repo.get_user_by_id(uid)['tokens_balance'] == 290
+
+
+# ─── Transactions ─────────────────────────────────────────────────────────────
+
+def test_transactions_newest_first(repo, uid):
+    repo.create_transaction(uid, 100, 10, 'starter', 'pay_1')
+    repo.create_transaction(uid, 200, 20, 'pro', 'pay_2')
+    assert [t['razorpay_payment_id'] for t in repo.get_transactions(uid)] == ['pay_2', 'pay_1']
+    assert len(repo.get_transactions(uid, limit=1)) == 1
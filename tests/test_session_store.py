@@ -0,0 +1,70 @@
+"""
+SQLite session interface through the Flask app: sessions round-trip, health
+probes get no cookie, and cleared or tampered sessions start afresh.
+
+    python -m pytest tests
+"""
+
+from flask import session
+
+import app as webapp
+import session_store
+
+
+def _set_cookie(resp):
+    return resp.headers.getlist('Set-Cookie')
+
+
+def test_health_sets_no_cookie():
+    client = webapp.app.test_client()
+    for _ in range(2):
+        resp = client.get('/health')
+        assert resp.status_code == 200
+        assert _set_cookie(resp) == []
+
+
+def test_round_trip_and_clear():
+    flask_app = webapp.app
+    interface = flask_app.session_interface
+    assert isinstance(interface, session_store.SQLiteSessionInterface)
+
+    with flask_app.test_request_context('/') as ctx:
+        s = interface.open_session(flask_app, ctx.request)
+        assert s.new and not s
+        s['_user_id'] = 'u1'
+        s['nested'] = {'tuple': (1, 2), 'bytes': b'\x00'}
+        resp = flask_app.response_class()
+        interface.save_session(flask_app, s, resp)
+        cookie = resp.headers['Set-Cookie'].split(';')[0]
+        value = cookie.split('=', 1)[1]
+        assert value != s.sid  # SESSION_USE_SIGNER: the cookie carries a signed sid
+
+    with flask_app.test_request_context('/', headers={'Cookie': cookie}) as ctx:
+        loaded = interface.open_session(flask_app, ctx.request)
+        assert not loaded.new and loaded.sid == s.sid
+        assert loaded['nested'] == {'tuple': (1, 2), 'bytes': b'\x00'}
+
+        # Clearing an existing session deletes the row and the cookie
+        loaded.clear()
+        resp = flask_app.response_class()
+        interface.save_session(flask_app, loaded, resp)
+        assert 'Expires=Thu, 01 Jan 1970' in resp.headers['Set-Cookie']
+        assert interface._retrieve_session_data(interface.key_prefix + s.sid) is None
+
+
+def test_tampered_cookie_starts_afresh():
+    flask_app = webapp.app
+    interface = flask_app.session_interface
+    cookie = f'{interface.get_cookie_name(flask_app)}=forged.signature'
+    with flask_app.test_request_context('/', headers={'Cookie': cookie}) as ctx:
+        s = interface.open_session(flask_app, ctx.request)
+        assert s.new and not s
+
+
+def test_permanent_flag_alone_is_not_stored():
+    client = webapp.app.test_client()
+    # A logged-out page view marks the session permanent but stores nothing
+    with client:
+        resp = client.get('/login')
+        assert session.permanent
+        assert _set_cookie(resp) == []
@@ -3,9 +3,28 @@ Token system for AutoTube AI platform.
 Defines plans, costs, and token management logic.
 """
 
-from models import deduct_tokens, add_tokens, get_user_by_id, update_user
+import os
+import logging
 from datetime import datetime, timedelta
 
+import scheduler
+from models import (
+    deduct_tokens, deduct_tokens_batch, get_user_by_id, refill_tokens,
+    find_users_due, bulk_update_users,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds between bulk daily-refill passes (a refill lands at most this late)
+REFILL_INTERVAL = int(os.getenv('REFILL_INTERVAL', '900'))
+# Seconds between monthly grant / plan expiry passes
+BILLING_INTERVAL = int(os.getenv('BILLING_INTERVAL', '3600'))
+# Users read and written per batch by the billing pass (Firestore max is 500)
+BILLING_PAGE_SIZE = int(os.getenv('BILLING_PAGE_SIZE', '500'))
+
+MONTH = timedelta(days=30)
+YEAR = timedelta(days=365)
+
 # ─── Plan Definitions ────────────────────────────────────────────────────────
 
 PLANS = {
@@ -16,6 +35,7 @@ PLANS = {
         'tokens_monthly': 40,
         'daily_refill': 0,
         'max_tokens': 40,
+        'bulk_limit': 0,
         'features': [
             '40 tokens free on signup',
             'No daily refill',
@@ -33,6 +53,7 @@ PLANS = {
         'tokens_monthly': 250,
         'daily_refill': 10,
         'max_tokens': 500,
+        'bulk_limit': 20,
         'features': [
             '250 tokens monthly',
             '10 tokens daily refill',
@@ -52,6 +73,7 @@ PLANS = {
         'tokens_monthly': 250,
         'daily_refill': 10,
         'max_tokens': 500,
+        'bulk_limit': 20,
         'yearly': True,
         'features': [
             '250 tokens every month',
@@ -109,40 +131,124 @@ def use_tokens(user_id, action, task_id='', details=''):
     return ok, cost
 
 
-def refill_daily_tokens(user_id):
-    """Refill daily tokens if enough time has passed (24h cooldown)."""
-    user = get_user_by_id(user_id)
-    if not user:
-        return False
+def use_tokens_batch(user_id, charges):
+    """
+    Deduct tokens for several actions at once, atomically.
+    `charges` is a list of (action, task_id, details). Returns (success, total_cost).
+    """
+    rows = [
+        {'action': action, 'amount': get_token_cost(action), 'task_id': task_id, 'details': details}
+        for action, task_id, details in charges
+    ]
+    total = sum(r['amount'] for r in rows)
+    return deduct_tokens_batch(user_id, rows), total
 
-    plan = PLANS.get(user['plan'], PLANS['free'])
 
+def run_daily_refill():
+    """
+    Grant the daily refill to every user whose 24h cooldown has passed, in
+    bulk per plan (runs from the scheduler, not per request).
+    Returns the number of users processed.
+    """
+    now = datetime.utcnow()
+    due_before = (now - timedelta(hours=24)).isoformat()
     # Free plan gets no daily refill — only one-time signup tokens
-    if plan['daily_refill'] <= 0:
-        return False
+    grants = {plan_id: (plan['daily_refill'], plan['max_tokens'])
+              for plan_id, plan in PLANS.items() if plan['daily_refill'] > 0}
+    total = refill_tokens(grants, due_before, now.isoformat())
+    if total:
+        logger.info(f"🪙 Daily refill processed for {total} user(s)")
+    return total
+
+
+scheduler.every('daily_refill', REFILL_INTERVAL, run_daily_refill)
 
-    last_refill = user.get('last_refill', '')
 
-    if last_refill:
+# ─── Billing Periods ─────────────────────────────────────────────────────────
+
+def plan_purchase_fields(plan_id, user=None, now=None):
+    """
+    User fields for a plan purchase. The paid period is appended to any time
+    still left on the current one; yearly plans also get a monthly grant
+    schedule (the first month's tokens are granted at purchase).
+    """
+    plan = PLANS[plan_id]
+    now = now or datetime.utcnow()
+    start = now
+    current_expiry = (user or {}).get('plan_expires_at')
+    if current_expiry:
         try:
-            last_dt = datetime.fromisoformat(last_refill)
-            if datetime.utcnow() - last_dt < timedelta(hours=24):
-                return False  # Too soon
+            start = max(now, datetime.fromisoformat(current_expiry))
         except ValueError:
             pass
+    expires = start + (YEAR if plan.get('yearly') else MONTH)
+    next_grant = now + MONTH if plan.get('yearly') else None
+    return {
+        # Yearly plans share the 'pro' plan key; billing_plan keeps what was bought
+        'plan': 'pro' if plan_id in ('pro', 'pro_yearly') else plan_id,
+        'billing_plan': plan_id,
+        'plan_expires_at': expires.isoformat(),
+        'next_grant_at': next_grant.isoformat() if next_grant and next_grant < expires else '',
+    }
+
+
+def _expire_plans(as_of):
+    """Returns (users read, users expired)."""
+    users = find_users_due('plan_expires_at', as_of, BILLING_PAGE_SIZE)
+    applied = bulk_update_users([
+        (u, {'plan': 'free', 'billing_plan': '', 'plan_expires_at': '', 'next_grant_at': ''}, 0)
+        for u in users
+    ])
+    return len(users), applied
+
+
+def _grant_monthly(as_of):
+    """Returns (users read, users granted)."""
+    users = find_users_due('next_grant_at', as_of, BILLING_PAGE_SIZE)
+    updates = []
+    for u in users:
+        plan = PLANS.get(u.get('billing_plan') or u.get('plan'), PLANS['free'])
+        following = datetime.fromisoformat(u['next_grant_at']) + MONTH
+        expires = u.get('plan_expires_at', '')
+        if not expires or following.isoformat() >= expires:
+            following = None
+        updates.append((u, {'next_grant_at': following.isoformat() if following else ''},
+                        plan['tokens_monthly']))
+    return len(users), bulk_update_users(updates)
+
+
+def process_billing_periods():
+    """
+    Expire lapsed plans, then grant monthly tokens to yearly subscribers whose
+    month rolled over, one page of users per batched write.  Each write moves
+    the users it touches out of the scan, and the pass cutoff plus counts are
+    checkpointed, so an interrupted pass resumes where it stopped.  Writes are
+    conditional on the user being unchanged since it was read, so passes on
+    two hosts never grant twice; a user skipped because some other write
+    touched it is still due and is picked up by a later page or pass.
+    """
+    checkpoint = scheduler.load_checkpoint('plan_billing') or {
+        'as_of': datetime.utcnow().isoformat(), 'expired': 0, 'granted': 0,
+    }
+    as_of = checkpoint['as_of']
+
+    for key, step in (('expired', _expire_plans), ('granted', _grant_monthly)):
+        while True:
+            seen, done = step(as_of)
+            # done == 0: the whole page was changed under us; leave it to the next pass
+            if not seen or not done:
+                break
+            checkpoint[key] += done
+            scheduler.save_checkpoint('plan_billing', checkpoint)
 
-    # Check max cap
-    new_balance = min(
-        user['tokens_balance'] + plan['daily_refill'],
-        plan['max_tokens']
-    )
-    refill_amount = new_balance - user['tokens_balance']
+    scheduler.clear_checkpoint('plan_billing')
+    if checkpoint['expired'] or checkpoint['granted']:
+        logger.info(f"📅 Billing pass: {checkpoint['expired']} plan(s) expired, "
+                    f"{checkpoint['granted']} monthly grant(s)")
+    return checkpoint['expired'], checkpoint['granted']
 
-    if refill_amount > 0:
-        add_tokens(user_id, refill_amount)
 
-    update_user(user_id, last_refill=datetime.utcnow().isoformat())
-    return refill_amount > 0
+scheduler.every('plan_billing', BILLING_INTERVAL, process_billing_periods)
 
 
 def get_plan_info(plan_name):
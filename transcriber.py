@@ -0,0 +1,213 @@
+"""
+Audio transcription stage for the AI metadata generator.
+Extracts a mono 16 kHz track with ffmpeg once, runs a pluggable transcriber
+and caches the transcript by the video's content hash so retries reuse it.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import subprocess
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# off | groq | whisper
+TRANSCRIBE_BACKEND = os.getenv("AI_TRANSCRIBE", "off").strip().lower()
+TRANSCRIPT_CACHE_DIR = os.getenv(
+    "TRANSCRIPT_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "autotube_transcripts"),
+)
+GROQ_TRANSCRIBE_MODEL = os.getenv("GROQ_TRANSCRIBE_MODEL", "whisper-large-v3-turbo")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+
+AUDIO_SAMPLE_RATE = 16000
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_audio(video_path: str, output_path: Optional[str] = None) -> Optional[str]:
+    """
+    Extract the audio track as mono 16 kHz FLAC.
+
+    Returns the output path, or None when the video has no audio stream.
+    Raises RuntimeError if ffmpeg itself fails.
+    """
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(suffix=".flac", prefix="audio_")
+        os.close(fd)
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE),
+        "-c:a", "flac",
+        output_path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, timeout=120)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        if "does not contain any stream" in stderr or "matches no streams" in stderr:
+            return None
+        raise RuntimeError(f"ffmpeg audio extraction failed: {stderr.strip()}")
+
+    return output_path
+
+
+# ─── Transcribers ─────────────────────────────────────────────────────────────
+
+class Transcriber:
+    """Whisper-compatible interface: audio file in, plain-text transcript out."""
+
+    name = "base"
+
+    def transcribe(self, audio_path: str) -> str:
+        raise NotImplementedError
+
+
+class NullTranscriber(Transcriber):
+    """Local stub used when transcription is disabled."""
+
+    name = "null"
+
+    def transcribe(self, audio_path: str) -> str:
+        return ""
+
+
+class WhisperTranscriber(Transcriber):
+    """Local openai-whisper model (optional dependency, loaded on first use)."""
+
+    name = "whisper"
+
+    def __init__(self, model_name: str = WHISPER_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    def transcribe(self, audio_path: str) -> str:
+        if self._model is None:
+            try:
+                import whisper
+            except ImportError:
+                raise ImportError("openai-whisper is required. Install with: pip install openai-whisper")
+            self._model = whisper.load_model(self.model_name)
+        result = self._model.transcribe(audio_path)
+        return (result.get("text") or "").strip()
+
+
+class GroqTranscriber(Transcriber):
+    """Groq's hosted Whisper transcription API."""
+
+    name = "groq"
+
+    def __init__(self, client, model: str = GROQ_TRANSCRIBE_MODEL):
+        self.client = client
+        self.model = model
+
+    def transcribe(self, audio_path: str) -> str:
+        with open(audio_path, "rb") as f:
+            resp = self.client.audio.transcriptions.create(
+                file=(os.path.basename(audio_path), f.read()),
+                model=self.model,
+                response_format="text",
+            )
+        text = resp if isinstance(resp, str) else getattr(resp, "text", "")
+        return (text or "").strip()
+
+
+def get_transcriber(backend: str = TRANSCRIBE_BACKEND, client=None) -> Transcriber:
+    """Build the transcriber selected by AI_TRANSCRIBE."""
+    if backend == "groq":
+        if client is None:
+            raise ValueError("Groq transcription requires a Groq client")
+        return GroqTranscriber(client)
+    if backend == "whisper":
+        return WhisperTranscriber()
+    return NullTranscriber()
+
+
+# ─── Cache ────────────────────────────────────────────────────────────────────
+
+class TranscriptCache:
+    """On-disk transcript cache keyed by content hash and transcriber name."""
+
+    def __init__(self, cache_dir: str = TRANSCRIPT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f).get("transcript")
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, transcript: str):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"transcript": transcript}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def transcribe_video(video_path: str, transcriber: Transcriber,
+                     cache: Optional[TranscriptCache] = None,
+                     content_hash: Optional[str] = None) -> str:
+    """
+    Transcribe a video's speech, reusing a cached transcript when available.
+
+    Returns an empty string when transcription is disabled, the video has no
+    audio, or the transcriber fails.
+    """
+    if isinstance(transcriber, NullTranscriber):
+        return ""
+
+    key = None
+    if cache is not None:
+        try:
+            key = f"{content_hash or file_sha256(video_path)}-{transcriber.name}"
+        except OSError as e:
+            logger.warning(f"Transcription failed: {e}")
+            return ""
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("🎙️ Using cached transcript")
+            return cached
+
+    audio_path = None
+    try:
+        audio_path = extract_audio(video_path)
+        if not audio_path:
+            logger.info("🎙️ Video has no audio track — skipping transcription")
+            transcript = ""
+        else:
+            transcript = transcriber.transcribe(audio_path)
+            logger.info(f"🎙️ Transcribed {len(transcript)} characters of speech")
+    except Exception as e:
+        logger.warning(f"Transcription failed: {e}")
+        return ""
+    finally:
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+    if cache is not None and key:
+        try:
+            cache.set(key, transcript)
+        except OSError as e:
+            logger.warning(f"Could not cache transcript: {e}")
+    return transcript
@@ -1,12 +1,8 @@
 import os
+import time
 import argparse
-import google_auth_oauthlib.flow
-import googleapiclient.discovery
-import googleapiclient.errors
-from googleapiclient.http import MediaFileUpload
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
 import logging
+from http_pool import get_session
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,9 +12,38 @@ logger = logging.getLogger(__name__)
 if os.getenv('ENVIRONMENT') != 'production':
     os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
+UPLOAD_SCOPE = "https://www.googleapis.com/auth/youtube.upload"
+# videos.update needs one of these; youtube.upload alone can only insert
+UPDATE_SCOPES = {
+    "https://www.googleapis.com/auth/youtube.force-ssl",
+    "https://www.googleapis.com/auth/youtube",
+}
+# Zero-edit fast path (opt-in: asks users for youtube.force-ssl, i.e. full
+# manage-account access): upload while the AI runs, then patch the metadata in
+FAST_PATH = os.getenv('YOUTUBE_FAST_PATH', '0') == '1'
+
+
+def oauth_scopes():
+    """Scopes requested when a user connects YouTube."""
+    if FAST_PATH:
+        return [UPLOAD_SCOPE, "https://www.googleapis.com/auth/youtube.force-ssl"]
+    return [UPLOAD_SCOPE]
+
+
+def credentials_json(creds):
+    """Serialise OAuth credentials, recording the scopes the user actually granted."""
+    import json
+    data = json.loads(creds.to_json())
+    granted = getattr(creds, 'granted_scopes', None)
+    if granted:
+        data['scopes'] = granted.split() if isinstance(granted, str) else list(granted)
+    return json.dumps(data)
+
 def get_credentials(user_id):
     """Get or refresh YouTube API credentials for specific user from the database."""
     from models import get_youtube_credentials, update_youtube_credentials
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
     import json
     
     creds = None
@@ -26,8 +51,9 @@ def get_credentials(user_id):
     
     if creds_json:
         try:
-            creds = Credentials.from_authorized_user_info(json.loads(creds_json), 
-                ["https://www.googleapis.com/auth/youtube.upload"])
+            info = json.loads(creds_json)
+            # Keep the granted scopes so a refresh never asks for more than consented
+            creds = Credentials.from_authorized_user_info(info, info.get('scopes') or [UPLOAD_SCOPE])
         except Exception as e:
             logger.error(f"Failed to load credentials from DB: {e}")
             update_youtube_credentials(user_id, None)
@@ -38,7 +64,7 @@ def get_credentials(user_id):
         if creds and creds.expired and creds.refresh_token:
             try:
                 logger.info("Refreshing expired credentials...")
-                creds.refresh(Request())
+                creds.refresh(Request(session=get_session('google')))
                 # Save the refreshed credentials back to DB
                 update_youtube_credentials(user_id, creds.to_json())
                 logger.info("✅ Credentials refreshed successfully")
@@ -53,6 +79,8 @@ def get_credentials(user_id):
 
 def authenticate_youtube(token_path='token.json'):
     """Authenticate with YouTube API - creates new credentials if needed"""
+    import google_auth_oauthlib.flow
+
     try:
         scopes = ["https://www.googleapis.com/auth/youtube.upload"]
         client_secrets_file = "client_secret.json"
@@ -111,16 +139,44 @@ def check_authentication(user_id):
     except Exception:
         return False
 
+def can_update_metadata(user_id):
+    """True if the fast path may upload first and set the metadata afterwards."""
+    if not FAST_PATH:
+        return False
+    try:
+        creds = get_credentials(user_id)
+    except Exception:
+        return False
+    return bool(creds and UPDATE_SCOPES.intersection(creds.scopes or []))
+
+
 def get_youtube_service(user_id):
     """Get authenticated YouTube service for specific user"""
     creds = get_credentials(user_id)
     if not creds:
         raise Exception("Not authenticated. Please connect YouTube first.")
     
+    import googleapiclient.discovery
     return googleapiclient.discovery.build("youtube", "v3", credentials=creds)
 
-def upload_to_youtube(video_path, title, description, tags, privacy_status="public", category_id="22", user_id=None):
-    """Upload video to YouTube with proper error handling for specific user"""
+def _video_body(title, description, tags, privacy_status, category_id):
+    return {
+        "snippet": {
+            "title": title[:100],  # YouTube title limit
+            "description": description[:5000],  # YouTube description limit
+            "tags": tags[:500] if isinstance(tags, list) else [],  # YouTube tags limit
+            "categoryId": str(category_id)
+        },
+        "status": {
+            "privacyStatus": privacy_status,
+            "selfDeclaredMadeForKids": False
+        }
+    }
+
+def upload_to_youtube(video_path, title, description, tags, privacy_status="public", category_id="22", user_id=None,
+                      progress=None):
+    """Upload video to YouTube with proper error handling for specific user.
+    progress: optional callback(fraction) called after each uploaded chunk."""
     try:
         # Verify file exists and is accessible
         if not os.path.exists(video_path):
@@ -138,20 +194,10 @@ def upload_to_youtube(video_path, title, description, tags, privacy_status="publ
         youtube = get_youtube_service(user_id)
 
         # Prepare video metadata
-        video_metadata = {
-            "snippet": {
-                "title": title[:100],  # YouTube title limit
-                "description": description[:5000],  # YouTube description limit
-                "tags": tags[:500] if isinstance(tags, list) else [],  # YouTube tags limit
-                "categoryId": str(category_id)
-            },
-            "status": {
-                "privacyStatus": privacy_status,
-                "selfDeclaredMadeForKids": False
-            }
-        }
+        video_metadata = _video_body(title, description, tags, privacy_status, category_id)
 
         # Create media upload object
+        from googleapiclient.http import MediaFileUpload
         media = MediaFileUpload(
             video_path, 
             chunksize=1024*1024,  # 1MB chunks
@@ -166,21 +212,21 @@ def upload_to_youtube(video_path, title, description, tags, privacy_status="publ
             media_body=media
         )
 
-        # Execute upload with retry logic
+        # Execute upload chunk by chunk; a retry resumes the same session
         response = None
         max_retries = 3
         retry_count = 0
         
-        while retry_count < max_retries:
+        while response is None:
             try:
-                print(f"Upload attempt {retry_count + 1}/{max_retries}")
-                response = request.execute()
-                break
+                status, response = request.next_chunk()
+                if status and progress:
+                    progress(status.progress())
             except Exception as upload_error:
                 retry_count += 1
                 if retry_count >= max_retries:
                     raise upload_error
-                print(f"Upload failed, retrying... Error: {str(upload_error)}")
+                print(f"Upload failed, retrying ({retry_count}/{max_retries})... Error: {str(upload_error)}")
         
         if not response or 'id' not in response:
             raise Exception("Upload completed but no video ID returned")
@@ -195,6 +241,23 @@ def upload_to_youtube(video_path, title, description, tags, privacy_status="publ
         print(f"❌ Upload failed: {str(e)}")
         raise Exception(f"Failed to upload video: {str(e)}")
 
+def update_video_metadata(video_id, title, description, tags, privacy_status="public", category_id="22",
+                          user_id=None, retries=3):
+    """Replace the snippet and privacy of an uploaded video (needs an update scope)."""
+    youtube = get_youtube_service(user_id)
+    body = _video_body(title, description, tags, privacy_status, category_id)
+    body["id"] = video_id
+    for attempt in range(1, retries + 1):
+        try:
+            youtube.videos().update(part="snippet,status", body=body).execute()
+            print(f"✅ Metadata applied to video {video_id}")
+            return
+        except Exception as e:
+            if attempt >= retries:
+                raise Exception(f"Failed to update video metadata: {str(e)}")
+            print(f"Metadata update failed, retrying... Error: {str(e)}")
+            time.sleep(2 ** attempt)
+
 def get_channel_info(user_id):
     """Get information about the authenticated YouTube channel for specific user"""
     try:
@@ -231,6 +294,7 @@ def get_channel_info(user_id):
 def logout_youtube(user_id):
     """Revoke credentials and log out from YouTube for specific user"""
     from models import get_youtube_credentials, update_youtube_credentials
+    from google.oauth2.credentials import Credentials
     import json
     
     try:
@@ -238,19 +302,13 @@ def logout_youtube(user_id):
         if creds_json:
             creds = Credentials.from_authorized_user_info(json.loads(creds_json))
             
-            # Revoke the token
-            import google.oauth2.credentials
-            import google.auth.transport.requests
-            import requests
-            
-            transport = google.auth.transport.requests.Request()
-            
             # Try to revoke the token
             try:
-                requests.post(
+                get_session('google').post(
                     'https://oauth2.googleapis.com/revoke',
                     params={'token': creds.token},
-                    headers={'content-type': 'application/x-www-form-urlencoded'}
+                    headers={'content-type': 'application/x-www-form-urlencoded'},
+                    timeout=10
                 )
             except Exception as e:
                 print(f"Error revoking token: {e}")
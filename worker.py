@@ -0,0 +1,125 @@
+"""
+Media worker for AutoTube AI.
+Consumes upload jobs from the job queue and runs the download / edit / AI /
+YouTube pipeline, so ffmpeg encodes and uploads stay out of the web
+processes.  Run it next to the web app on the same host (it shares the local
+job store and downloads/ directory):
+
+    MEDIA_WORKER=external gunicorn wsgi:app ...   # web: enqueue + status only
+    python -m worker --concurrency 2              # media tier
+"""
+
+import os
+import time
+import signal
+import logging
+import argparse
+import threading
+
+from dotenv import load_dotenv
+
+import job_queue
+import scheduler
+import disk_janitor
+import token_system  # noqa: F401  (registers the daily refill job)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '2'))
+WORKER_POLL_INTERVAL = float(os.getenv('WORKER_POLL_INTERVAL', '1'))
+# Seconds between checks for jobs orphaned by a crashed worker
+RECOVER_INTERVAL = 60
+
+
+def _run_one():
+    """Claim and run one job. Returns False when the queue is empty."""
+    job = job_queue.claim()
+    if job is None:
+        return False
+    job_id, kind, payload = job
+    from pipeline import run_job  # deferred: the web process only needs it in inline mode
+    logger.info(f"🎬 Job {job_id[:8]} ({kind}) started")
+    try:
+        run_job(job_id, kind, payload)
+    except Exception as e:
+        logger.error(f"Job {job_id[:8]} crashed: {e}")
+        job_queue.finish(job_id, failed=True)
+    else:
+        job_queue.finish(job_id)
+        logger.info(f"✅ Job {job_id[:8]} finished")
+    return True
+
+
+def _consume(stop):
+    while not stop.is_set():
+        try:
+            if not _run_one():
+                stop.wait(WORKER_POLL_INTERVAL)
+        except Exception as e:
+            logger.error(f"Worker loop error: {e}")
+            stop.wait(WORKER_POLL_INTERVAL)
+
+
+def _recover_loop(stop):
+    while not stop.is_set():
+        try:
+            job_queue.recover()
+        except Exception as e:
+            logger.error(f"Job recovery failed: {e}")
+        stop.wait(RECOVER_INTERVAL)
+
+
+def start(concurrency=WORKER_CONCURRENCY, stop=None):
+    """Start consumer threads in this process. Returns the consumer threads."""
+    stop = stop or threading.Event()
+    threading.Thread(target=_recover_loop, args=(stop,), name='job-recover', daemon=True).start()
+    consumers = [threading.Thread(target=_consume, args=(stop,), name=f'media-worker-{i}', daemon=True)
+                 for i in range(concurrency)]
+    for t in consumers:
+        t.start()
+    return consumers
+
+
+_started = None
+
+
+def start_inline():
+    """Run jobs inside the web process when MEDIA_WORKER=inline (idempotent per process)."""
+    global _started
+    if job_queue.MEDIA_WORKER != 'inline' or _started == os.getpid():
+        return
+    _started = os.getpid()
+    start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AutoTube AI media worker')
+    parser.add_argument('--concurrency', type=int, default=WORKER_CONCURRENCY,
+                        help='jobs run in parallel by this process')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    os.makedirs(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'downloads'), exist_ok=True)
+    disk_janitor.start()
+    scheduler.start()
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    consumers = start(args.concurrency, stop)
+    logger.info(f"👷 Media worker {os.getpid()} running {args.concurrency} job slot(s)")
+    while not stop.is_set():
+        time.sleep(0.5)
+
+    # Let running jobs finish; if the process is killed first, the next
+    # worker's job_queue.recover() marks them failed
+    logger.info("Media worker stopping, waiting for running jobs...")
+    for t in consumers:
+        t.join()
+
+
+if __name__ == '__main__':
+    main()